@@ -80,3 +80,24 @@ class TestArrow(unittest.TestCase):
         np.testing.assert_almost_equal(
             arrow.get_center(), [1.5070313, 1.5070313, 1.5070313]
         )
+
+    def test_build_arrows(self):
+        """
+        Test the construction of many arrows from the unit template.
+
+        Returns
+        -------
+        Test if every arrow is scaled, rotated and placed like a single arrow.
+        """
+        positions = np.array([[1.0, 1.0, 1.0], [-2.0, 0.0, 3.0], [0.0, 0.0, 0.0]])
+        directions = np.array([[1.0, 1.0, 1.0], [0.0, 0.0, -0.5], [0.0, 3.0, 0.0]])
+
+        arrows = self.arrow.instantiate_meshes(positions, directions)
+        vertices = np.asarray(arrows.vertices).reshape(3, -1, 3)
+        for index, (position, direction) in enumerate(zip(positions, directions)):
+            arrow = self.arrow.instantiate_mesh(position, direction)
+            np.testing.assert_almost_equal(vertices[index], np.asarray(arrow.vertices))
+            self.assertAlmostEqual(
+                np.max(np.asarray(arrow.vertices) @ direction) - position @ direction,
+                np.linalg.norm(direction) ** 2,
+            )
@@ -21,14 +21,17 @@ Summary
 Run unit tests on the CustomMesh module.
 """
 
+import pickle
 import unittest
 from pathlib import Path
+from unittest.mock import patch
 
 import numpy as np
 import open3d as o3d
 
 from znvis import Material
 from znvis.mesh.custom import CustomMesh
+from znvis.mesh.template_cache import template_cache
 
 
 class TestCustomMesh(unittest.TestCase):
@@ -86,3 +89,32 @@ class TestCustomMesh(unittest.TestCase):
         np.testing.assert_almost_equal(
             custom.get_center(), [1.9000875, 2.0035554, 1.9946454]
         )
+
+    def test_file_is_parsed_once(self):
+        """
+        Test that repeated instantiation reuses the parsed file.
+
+        Returns
+        -------
+        Check that the file reader is not called again for cached geometry.
+        """
+        self.custom.get_template()
+        with patch("znvis.mesh.custom.o3d.io.read_triangle_mesh") as reader:
+            self.custom.instantiate_meshes(np.zeros((4, 3)), np.ones((4, 3)))
+            CustomMesh(file=self.custom.file, scale=1.0).get_template()
+        reader.assert_not_called()
+
+    def test_pickled_mesh_ships_geometry(self):
+        """
+        Test that an unpickled custom mesh gets its geometry from the pickle.
+
+        Returns
+        -------
+        Check that the unpickled mesh fills the template cache without reading.
+        """
+        blob = pickle.dumps(self.custom)
+        template_cache.clear()
+        with patch("znvis.mesh.custom.o3d.io.read_triangle_mesh") as reader:
+            custom = pickle.loads(blob)
+            custom.instantiate_mesh(starting_position=np.array([2, 2, 2]))
+        reader.assert_not_called()
@@ -0,0 +1,112 @@
+"""
+ZnVis: A Zincwarecode package.
+License
+-------
+This program and the accompanying materials are made available under the terms
+of the Eclipse Public License v2.0 which accompanies this distribution, and is
+available at https://www.eclipse.org/legal/epl-v20.html
+SPDX-License-Identifier: EPL-2.0
+Copyright Contributors to the Zincwarecode Project.
+Contact Information
+-------------------
+email: zincwarecode@gmail.com
+github: https://github.com/zincware
+web: https://zincwarecode.com/
+Citation
+--------
+If you use this module please cite us with:
+
+Summary
+-------
+Test the compact frame store.
+"""
+
+import unittest
+
+import numpy as np
+
+from znvis import Material
+from znvis.mesh.frame_store import FrameStore
+from znvis.mesh.sphere import Sphere
+from znvis.mesh_cache.mesh_frame_cache import estimate_mesh_nbytes
+from znvis.particle.particle import Particle
+
+
+class TestFrameStore(unittest.TestCase):
+    """
+    A test class for the FrameStore class.
+    """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """
+        Build the meshes of a short trajectory.
+        """
+        particle = Particle(
+            name="frame_store_particle",
+            position=np.random.uniform(-5, 5, (5, 4, 3)),
+            director=np.random.uniform(-5, 5, (5, 4, 3)),
+            mesh=Sphere(material=Material(colour=np.random.uniform(0, 1, (5, 4, 3)))),
+        )
+        cls.meshes = [particle.get_mesh_for_frame(i) for i in range(5)]
+
+    def test_frames_share_topology(self):
+        """
+        Test that frames with equal topology keep one triangle array.
+        """
+        store = FrameStore(self.meshes)
+
+        self.assertEqual(len(store), 5)
+        triangles = store.frame(0).triangles
+        for index in range(1, 5):
+            self.assertIs(store.frame(index).triangles, triangles)
+        self.assertEqual(store.frame(0).vertices.dtype, np.float32)
+
+    def test_frames_are_materialized_on_access(self):
+        """
+        Test that stored frames give back equivalent Open3D meshes.
+        """
+        store = FrameStore(self.meshes)
+
+        for expected, mesh in zip(self.meshes, store[:]):
+            np.testing.assert_allclose(
+                np.asarray(mesh.vertices), np.asarray(expected.vertices), atol=1e-5
+            )
+            np.testing.assert_array_equal(
+                np.asarray(mesh.triangles), np.asarray(expected.triangles)
+            )
+            np.testing.assert_allclose(
+                np.asarray(mesh.vertex_colors),
+                np.asarray(expected.vertex_colors),
+                atol=1e-6,
+            )
+
+    def test_recent_frames_are_materialized_once(self):
+        """
+        Test that repeated accesses reuse the meshes of recent frames.
+        """
+        store = FrameStore(self.meshes, cached_frames=2)
+
+        first = store[0]
+        self.assertIs(store[0], first)
+        self.assertIs(store[-5], first)
+        store[1]
+        store[2]
+        # Frame 0 was evicted by the two later frames.
+        self.assertIsNot(store[0], first)
+        self.assertIsNot(store[:1][0], store[0])
+        with self.assertRaises(IndexError):
+            store[5]
+
+    def test_store_uses_less_than_half_the_memory(self):
+        """
+        Test the memory footprint against a list of legacy meshes.
+        """
+        store = FrameStore(self.meshes)
+        legacy_nbytes = sum(estimate_mesh_nbytes(mesh) for mesh in self.meshes)
+
+        self.assertLess(store.nbytes, legacy_nbytes / 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -27,6 +27,7 @@ import numpy as np
 
 from znvis import Material
 from znvis.mesh.mesh import Mesh
+from znvis.mesh.torus import Torus
 
 
 class TestMesh(unittest.TestCase):
@@ -53,3 +54,21 @@ class TestMesh(unittest.TestCase):
         mesh = Mesh()
         with self.assertRaises(NotImplementedError):
             mesh.create_mesh()
+
+    def test_instance_transforms_match_instances(self):
+        """
+        Test that the instance transforms map the template onto the instances.
+        """
+        rng = np.random.default_rng(0)
+        positions = rng.uniform(-2, 2, (4, 3))
+        orientations = rng.normal(size=(4, 3))
+        mesh = Torus(tubular_resolution=8, radial_resolution=6)
+
+        transforms = mesh.instance_transforms(positions, orientations=orientations)
+        template = mesh.get_template().vertices
+        instances = transforms[:, :3, :3] @ template.T + transforms[:, :3, 3:]
+        np.testing.assert_allclose(
+            instances.transpose(0, 2, 1).reshape(-1, 3),
+            mesh.instantiate_meshes(positions, orientations=orientations).vertices,
+            atol=1e-12,
+        )
@@ -68,3 +68,30 @@ class TestSphere(unittest.TestCase):
         self.assertEqual(sphere.has_vertex_normals(), True)
         self.assertEqual(type(sphere), o3d.geometry.TriangleMesh)
         np.testing.assert_almost_equal(sphere.get_center(), [1.0, 1.0, 1.0])
+
+    def test_instantiate_meshes(self):
+        """
+        Test the batched construction of several sphere instances.
+
+        Returns
+        -------
+        Test that the combined mesh matches individually built spheres.
+        """
+        positions = np.array([[1.0, 1.0, 1.0], [-2.0, 0.0, 3.0], [0.0, 5.0, 0.0]])
+        orientations = np.array([[0.0, 1.0, 0.0], [1.0, 1.0, 0.0], [0.0, 0.0, 1.0]])
+        combined = self.sphere.instantiate_meshes(positions, orientations)
+
+        reference = self.sphere.instantiate_mesh(positions[0], orientations[0])
+        for position, orientation in zip(positions[1:], orientations[1:]):
+            reference += self.sphere.instantiate_mesh(position, orientation)
+
+        self.assertEqual(combined.has_vertex_normals(), True)
+        np.testing.assert_array_equal(
+            np.asarray(combined.triangles), np.asarray(reference.triangles)
+        )
+        np.testing.assert_almost_equal(
+            np.asarray(combined.vertices), np.asarray(reference.vertices)
+        )
+        np.testing.assert_almost_equal(
+            np.asarray(combined.vertex_normals), np.asarray(reference.vertex_normals)
+        )
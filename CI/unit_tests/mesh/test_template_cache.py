@@ -0,0 +1,94 @@
+"""
+ZnVis: A Zincwarecode package.
+License
+-------
+This program and the accompanying materials are made available under the terms
+of the Eclipse Public License v2.0 which accompanies this distribution, and is
+available at https://www.eclipse.org/legal/epl-v20.html
+SPDX-License-Identifier: EPL-2.0
+Copyright Contributors to the Zincwarecode Project.
+Contact Information
+-------------------
+email: zincwarecode@gmail.com
+github: https://github.com/zincware
+web: https://zincwarecode.com/
+Citation
+--------
+If you use this module please cite us with:
+Summary
+-------
+Test the template mesh cache.
+"""
+
+import unittest
+
+import numpy as np
+
+from znvis import Material
+from znvis.mesh.sphere import Sphere
+from znvis.mesh.template_cache import MeshTemplate, TemplateCache, template_cache
+
+
+class TestTemplateCache(unittest.TestCase):
+    """
+    A test class for the TemplateCache class.
+    """
+
+    def test_identical_meshes_share_one_template(self):
+        """
+        Test that equal geometry parameters share a template across materials.
+        """
+        first = Sphere(radius=3.0, resolution=7)
+        second = Sphere(
+            radius=3.0,
+            resolution=7,
+            material=Material(colour=np.array([1.0, 0.0, 0.0])),
+        )
+        other = Sphere(radius=2.0, resolution=7)
+
+        self.assertIs(first.get_template(), second.get_template())
+        self.assertIsNot(first.get_template(), other.get_template())
+        self.assertIn(first._template_key(), template_cache)
+
+    def test_smoothed_template_is_cached(self):
+        """
+        Test that smoothing is applied once and keeps the rotation pivot.
+        """
+        sphere = Sphere(radius=2.5, resolution=6)
+        template = sphere.get_template()
+        smoothed = sphere.get_template(smoothing=True)
+
+        self.assertIs(smoothed, sphere.get_template(smoothing=True))
+        self.assertIsNot(smoothed, template)
+        self.assertEqual(smoothed.vertices.shape, template.vertices.shape)
+        self.assertFalse(np.allclose(smoothed.vertices, template.vertices))
+        np.testing.assert_array_equal(smoothed.pivot, template.pivot)
+
+    def test_templates_are_read_only(self):
+        """
+        Test that shared template arrays cannot be modified in place.
+        """
+        template = Sphere(radius=1.5).get_template()
+
+        self.assertFalse(template.vertices.flags.writeable)
+        self.assertFalse(template.normals.flags.writeable)
+        self.assertEqual(template.normals.shape, template.vertices.shape)
+
+    def test_lru_eviction_by_max_bytes(self):
+        """
+        Test that the least recently used template is evicted over budget.
+        """
+        template = MeshTemplate.from_triangle_mesh(
+            Sphere(resolution=4).create_template()
+        )
+        cache = TemplateCache(max_bytes=2 * template.nbytes)
+
+        cache.put("a", template)
+        cache.put("b", template)
+        cache.get("a", lambda: template)
+        cache.put("c", template)
+
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertIn("c", cache)
+        self.assertEqual(cache.current_bytes, 2 * template.nbytes)
@@ -213,3 +213,67 @@ class TestParticle(unittest.TestCase):
             "NaN value at time step 0.",
             str(context.exception),
         )
+
+    def test_static_mesh_with_dynamic_colours(self):
+        """
+        Test re-colouring cached static geometry for different frames.
+
+        Returns
+        -------
+        Checks that every sphere takes the colour of its frame and index.
+        """
+        colours = np.random.uniform(0, 1, (5, 3, 3))
+        particle = Particle(
+            name="coloured_static_particle",
+            position=np.random.uniform(-5, 5, (3, 3)),
+            mesh=Sphere(material=Material(colour=colours)),
+            static=True,
+        )
+        particle.construct_mesh_list()
+        self.assertTrue(particle.has_dynamic_colour)
+
+        mesh = particle.paint_mesh(particle.mesh_list[0], 4)
+        vertex_colours = np.asarray(mesh.vertex_colors).reshape(3, -1, 3)
+
+        np.testing.assert_almost_equal(vertex_colours[:, 0, :], colours[4])
+        np.testing.assert_almost_equal(vertex_colours[:, -1, :], colours[4])
+
+    def test_parallel_construct_mesh_list(self):
+        """
+        Test building the mesh list in a process pool.
+
+        Returns
+        -------
+        Checks that the parallel build matches the serial one frame by frame.
+        """
+        position = np.random.uniform(-5, 5, (6, 3, 3))
+        director = np.random.uniform(-5, 5, (6, 3, 3))
+        colours = np.random.uniform(0, 1, (6, 3, 3))
+
+        def build(workers):
+            particle = Particle(
+                name="parallel_particle",
+                position=position.copy(),
+                director=director.copy(),
+                mesh=Sphere(material=Material(colour=colours)),
+                smoothing=True,
+            )
+            particle.construct_mesh_list(workers=workers)
+            return particle.mesh_list
+
+        serial = build(1)
+        parallel = build(2)
+
+        self.assertEqual(len(parallel), len(serial))
+        for expected, mesh in zip(serial, parallel):
+            np.testing.assert_allclose(
+                np.asarray(mesh.vertices), np.asarray(expected.vertices), atol=1e-5
+            )
+            np.testing.assert_array_equal(
+                np.asarray(mesh.triangles), np.asarray(expected.triangles)
+            )
+            np.testing.assert_allclose(
+                np.asarray(mesh.vertex_colors),
+                np.asarray(expected.vertex_colors),
+                atol=1e-6,
+            )
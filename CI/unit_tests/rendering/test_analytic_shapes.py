@@ -0,0 +1,221 @@
+"""
+ZnVis: A Zincwarecode package.
+License
+-------
+This program and the accompanying materials are made available under the terms
+of the Eclipse Public License v2.0 which accompanies this distribution, and is
+available at https://www.eclipse.org/legal/epl-v20.html
+SPDX-License-Identifier: EPL-2.0
+Copyright Contributors to the Zincwarecode Project.
+Contact Information
+-------------------
+email: zincwarecode@gmail.com
+github: https://github.com/zincware
+web: https://zincwarecode.com/
+Citation
+--------
+If you use this module please cite us with:
+
+Summary
+-------
+Test the analytic Mitsuba shapes of instanced meshes.
+"""
+
+import copy
+import pathlib
+import shutil
+import unittest
+from unittest import mock
+
+import cv2
+import numpy as np
+
+from znvis import Material
+from znvis.mesh.cylinder import Cylinder
+from znvis.mesh.sphere import Sphere
+from znvis.particle.particle import Particle
+from znvis.rendering.analytic_shapes import analytic_parts, supports_analytic_shapes
+from znvis.rendering.mitsuba import Mitsuba, default_scene_dict
+from znvis.visualizer.base_visualizer import build_mesh_dict_for_frame
+
+
+class TestAnalyticShapes(unittest.TestCase):
+    """
+    A test class for the analytic shapes.
+    """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """
+        Prepare a small trajectory and the output folder.
+        """
+        project_root = pathlib.Path(__file__).resolve().parents[2]
+        cls.output_folder = project_root / "test_files" / "analytic_shapes"
+        cls.output_folder.mkdir(parents=True, exist_ok=True)
+
+        rng = np.random.default_rng(0)
+        position = [rng.uniform(-2, 2, (4, 3)) for _ in range(2)]
+        director = [rng.normal(size=(4, 3)) for _ in range(2)]
+        colours = rng.uniform(0, 1, (2, 4, 3))
+        cls.particles = [
+            Particle(
+                name="spheres",
+                position=position,
+                mesh=Sphere(radius=0.6, resolution=30, material=Material(colours)),
+            ),
+            Particle(
+                name="cylinders",
+                position=[frame + 0.5 for frame in position],
+                director=director,
+                mesh=Cylinder(radius=0.3, height=1.2, resolution=60),
+            ),
+        ]
+        cls.view_matrix = np.eye(4)
+        cls.view_matrix[2, 3] = -10
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        """
+        Clean up the rendered frames.
+        """
+        if cls.output_folder.exists():
+            shutil.rmtree(cls.output_folder)
+
+    def _render(self, renderer: Mitsuba, frame_index: int) -> np.ndarray:
+        """
+        Render one frame of the trajectory and return the image.
+        """
+        save_name = f"frame_{frame_index}_{renderer.analytic_shapes}.png"
+        renderer.render_mesh_objects(
+            build_mesh_dict_for_frame(
+                self.particles, None, frame_index, analytic=renderer.renders_analytic
+            ),
+            self.view_matrix,
+            resolution=[64, 48],
+            samples_per_pixel=4,
+            save_dir=self.output_folder,
+            save_name=save_name,
+        )
+        return cv2.imread(str(self.output_folder / save_name)).astype(int)
+
+    def test_cylinder_parts(self):
+        """
+        Test that the analytic cylinders enclose the rotated meshes.
+        """
+        cylinder = Cylinder(radius=0.5, height=2.0)
+        position = np.array([[1.0, 2.0, 3.0], [-1.0, 0.0, 0.5]])
+        director = np.array([[0.0, 0.0, -2.0], [1.0, 1.0, 0.0]])
+        mesh = cylinder.instantiate_meshes(position, orientations=director)
+        tube, bottom_cap, top_cap = analytic_parts(
+            cylinder, cylinder.instance_transforms(position, orientations=director)
+        )
+
+        # Every vertex lies on the surface of the unit cylinder.
+        vertices = np.asarray(mesh.vertices).reshape(2, -1, 3)
+        for to_world, instance in zip(tube.to_world, vertices):
+            self.assertGreater(np.linalg.det(to_world), 0)
+            local = instance @ np.linalg.inv(to_world[:3, :3]).T
+            local -= np.linalg.inv(to_world[:3, :3]) @ to_world[:3, 3]
+            radius = np.linalg.norm(local[:, :2], axis=1)
+            on_tube = np.isclose(radius, 1.0)
+            on_caps = np.isclose(local[:, 2], 0.0) | np.isclose(local[:, 2], 1.0)
+            self.assertTrue(np.all(on_tube | on_caps))
+            self.assertTrue(np.all(radius < 1.0 + 1e-9))
+            self.assertTrue(np.all((local[:, 2] > -1e-9) & (local[:, 2] < 1 + 1e-9)))
+
+        # Both caps close the tube and face away from it.
+        axes = tube.to_world[:, :3, 2] / 2.0
+        np.testing.assert_allclose(
+            bottom_cap.to_world[:, :3, 3], tube.to_world[:, :3, 3]
+        )
+        np.testing.assert_allclose(bottom_cap.to_world[:, :3, 2], -0.5 * axes)
+        np.testing.assert_allclose(
+            top_cap.to_world[:, :3, 3], tube.to_world[:, :3, 3] + 2.0 * axes
+        )
+        np.testing.assert_allclose(top_cap.to_world[:, :3, 2], 0.5 * axes)
+
+    def test_supported_meshes(self):
+        """
+        Test that only plain spheres and cylinders are drawn analytically.
+        """
+        self.assertTrue(supports_analytic_shapes(Sphere()))
+        self.assertTrue(supports_analytic_shapes(Cylinder()))
+        self.assertFalse(supports_analytic_shapes(None))
+
+        mesh_dict = build_mesh_dict_for_frame(
+            [
+                Particle(
+                    name="smooth",
+                    position=np.zeros((1, 1, 3)),
+                    mesh=Sphere(),
+                    smoothing=True,
+                )
+            ],
+            None,
+            0,
+            analytic=supports_analytic_shapes,
+        )
+        self.assertIsNone(mesh_dict["smooth"]["primitive"])
+
+    def test_analytic_render_matches_mesh_render(self):
+        """
+        Test that analytic shapes render like the tessellated meshes and
+        follow the particles in a persistent scene.
+        """
+        analytic = Mitsuba(scene_dict=copy.deepcopy(default_scene_dict))
+        tessellated = Mitsuba(
+            scene_dict=copy.deepcopy(default_scene_dict), analytic_shapes=False
+        )
+
+        for frame_index in range(2):
+            scene = analytic._scene
+            expected = self._render(tessellated, frame_index)
+            image = self._render(analytic, frame_index)
+
+            # Only the silhouettes of the tessellation differ.
+            self.assertLess(np.abs(image - expected).mean(), 1)
+            if frame_index == 1:
+                self.assertIs(analytic._scene, scene)
+
+        self.assertIn("cylinders_3_cap1", analytic.scene_dict)
+        self.assertNotIn("spheres", analytic.scene_dict)
+
+    def test_analytic_shapes_skip_the_combined_mesh(self):
+        """
+        Test that analytic shapes are placed from the particle data and that
+        instances of the same colour share a BSDF.
+        """
+        colours = np.array([[[1.0, 0.0, 0.0], [0.0, 0.0, 1.0], [1.0, 0.0, 0.0]]])
+        particle = Particle(
+            name="painted",
+            position=np.array([[[-1.0, 0.0, 0.0], [0.0, 0.0, 0.0], [1.0, 0.0, 0.0]]]),
+            mesh=Sphere(radius=0.4, material=Material(colours)),
+        )
+        renderer = Mitsuba(scene_dict=copy.deepcopy(default_scene_dict))
+        with mock.patch.object(
+            Particle, "get_mesh_for_frame", side_effect=AssertionError
+        ):
+            mesh_dict = build_mesh_dict_for_frame(
+                [particle], None, 0, analytic=renderer.renders_analytic
+            )
+        self.assertNotIn("mesh", mesh_dict["painted"])
+
+        renderer.render_mesh_objects(
+            mesh_dict,
+            self.view_matrix,
+            resolution=[32, 24],
+            samples_per_pixel=4,
+            save_dir=self.output_folder,
+            save_name="painted.png",
+        )
+        shapes = [renderer.scene_dict[f"painted_{index}"] for index in range(3)]
+        np.testing.assert_allclose(
+            [shape["to_world"].matrix[0, 3] for shape in shapes], [-1.0, 0.0, 1.0]
+        )
+        self.assertIs(shapes[0]["bsdf"], shapes[2]["bsdf"])
+        self.assertIsNot(shapes[0]["bsdf"], shapes[1]["bsdf"])
+        self.assertEqual(len(renderer._analytic_bsdfs["painted"]), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
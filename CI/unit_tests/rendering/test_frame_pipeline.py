@@ -0,0 +1,124 @@
+"""
+ZnVis: A Zincwarecode package.
+License
+-------
+This program and the accompanying materials are made available under the terms
+of the Eclipse Public License v2.0 which accompanies this distribution, and is
+available at https://www.eclipse.org/legal/epl-v20.html
+SPDX-License-Identifier: EPL-2.0
+Copyright Contributors to the Zincwarecode Project.
+Contact Information
+-------------------
+email: zincwarecode@gmail.com
+github: https://github.com/zincware
+web: https://zincwarecode.com/
+Citation
+--------
+If you use this module please cite us with:
+
+Summary
+-------
+Test the staged frame pipeline.
+"""
+
+import threading
+import unittest
+
+from znvis.rendering.frame_pipeline import FramePipeline
+
+
+class TestFramePipeline(unittest.TestCase):
+    """
+    A test class for the frame pipeline.
+    """
+
+    def test_frames_pass_all_stages_in_order(self):
+        """
+        Test that every stage sees the frames in submission order.
+        """
+        calls = {"build": [], "render": [], "write": []}
+
+        def build(frame):
+            calls["build"].append(frame)
+            return frame * 10
+
+        def render(frame, built):
+            calls["render"].append(frame)
+            return built + 1
+
+        def write(frame, image):
+            calls["write"].append((frame, image))
+
+        written = []
+        with FramePipeline(build, render, write, on_written=written.append) as pipe:
+            for frame in [3, 1, 2]:
+                pipe.submit(frame)
+            pipe.join()
+            self.assertEqual(pipe.pending, 0)
+
+        self.assertEqual(calls["build"], [3, 1, 2])
+        self.assertEqual(calls["render"], [3, 1, 2])
+        self.assertEqual(calls["write"], [(3, 31), (1, 11), (2, 21)])
+        self.assertEqual(written, [3, 1, 2])
+
+    def test_stages_overlap(self):
+        """
+        Test that the next frame is built and the last one written while
+        a frame renders.
+        """
+        second_built = threading.Event()
+        first_written = threading.Event()
+
+        def build(frame):
+            if frame == 1:
+                second_built.set()
+
+        def render(frame, built):
+            if frame == 1:
+                # Frame 0 can only be written while frame 1 renders.
+                self.assertTrue(first_written.wait(5))
+            else:
+                self.assertTrue(second_built.wait(5))
+
+        def write(frame, image):
+            if frame == 0:
+                first_written.set()
+
+        with FramePipeline(build, render, write) as pipeline:
+            pipeline.submit(0)
+            pipeline.submit(1)
+            pipeline.join()
+
+    def test_error_stops_pipeline(self):
+        """
+        Test that a failing stage skips the remaining frames and raises.
+        """
+        written = []
+        errors = []
+
+        def render(frame, built):
+            if frame == 1:
+                raise RuntimeError("render failed")
+
+        pipeline = FramePipeline(
+            lambda frame: None,
+            render,
+            lambda frame, image: written.append(frame),
+            on_error=lambda frame, error: errors.append(frame),
+        )
+        for frame in range(4):
+            try:
+                pipeline.submit(frame)
+            except RuntimeError:
+                break
+        with self.assertRaisesRegex(RuntimeError, "render failed"):
+            pipeline.join()
+        pipeline.close()
+
+        self.assertEqual(written, [0])
+        self.assertEqual(errors, [1])
+        self.assertEqual(pipeline.failed_frame, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
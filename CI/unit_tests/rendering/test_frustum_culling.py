@@ -0,0 +1,208 @@
+"""
+ZnVis: A Zincwarecode package.
+License
+-------
+This program and the accompanying materials are made available under the terms
+of the Eclipse Public License v2.0 which accompanies this distribution, and is
+available at https://www.eclipse.org/legal/epl-v20.html
+SPDX-License-Identifier: EPL-2.0
+Copyright Contributors to the Zincwarecode Project.
+Contact Information
+-------------------
+email: zincwarecode@gmail.com
+github: https://github.com/zincware
+web: https://zincwarecode.com/
+Citation
+--------
+If you use this module please cite us with:
+
+Summary
+-------
+Test the view-frustum culling.
+"""
+
+import copy
+import functools
+import unittest
+
+import numpy as np
+
+from znvis import Material
+from znvis.mesh.sphere import Sphere
+from znvis.mesh.torus import Torus
+from znvis.particle.particle import Particle
+from znvis.rendering.frustum_culling import spheres_in_frustum
+from znvis.rendering.mitsuba import Mitsuba, default_scene_dict
+from znvis.visualizer.base_visualizer import build_mesh_dict_for_frame
+
+
+class TestFrustumCulling(unittest.TestCase):
+    """
+    A test class for the view-frustum culling.
+    """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """
+        Prepare a rotated camera.
+        """
+        angle = 0.4
+        rotation = np.array(
+            [
+                [np.cos(angle), 0, np.sin(angle)],
+                [0, 1, 0],
+                [-np.sin(angle), 0, np.cos(angle)],
+            ]
+        )
+        cls.view_matrix = np.eye(4)
+        cls.view_matrix[:3, :3] = rotation
+        cls.view_matrix[:3, 3] = [1.0, -2.0, -5.0]
+
+    def test_visible_spheres_are_kept(self):
+        """
+        Test that culling only drops spheres no point of which is in view.
+        """
+        rng = np.random.default_rng(0)
+        centers = rng.uniform(-20, 20, (500, 3))
+        radii = rng.uniform(0.1, 3.0, 500)
+        tan_half_fov = (1.0, 0.5)
+        visible = spheres_in_frustum(centers, radii, self.view_matrix, tan_half_fov)
+        self.assertTrue(visible.any())
+        self.assertFalse(visible.all())
+
+        # Points inside every sphere, mapped to camera coordinates.
+        offsets = rng.normal(size=(2000, 3))
+        offsets *= (
+            rng.uniform(0, 1, (2000, 1)) / np.linalg.norm(offsets, axis=1)[:, None]
+        )
+        points = centers[:, None] + radii[:, None, None] * offsets
+        camera = points @ self.view_matrix[:3, :3].T + self.view_matrix[:3, 3]
+        depth = -camera[..., 2]
+        in_view = (
+            (depth > 0)
+            & (np.abs(camera[..., 0]) < depth * tan_half_fov[0])
+            & (np.abs(camera[..., 1]) < depth * tan_half_fov[1])
+        ).any(axis=1)
+
+        self.assertTrue(np.all(visible[in_view]))
+        # A margin only ever keeps more spheres.
+        with_margin = spheres_in_frustum(
+            centers, radii, self.view_matrix, tan_half_fov, margin=2.0
+        )
+        self.assertTrue(np.all(with_margin[visible]))
+        self.assertGreater(with_margin.sum(), visible.sum())
+
+    def test_sensor_field_of_view(self):
+        """
+        Test that the field of view is taken along the sensor's fov axis.
+        """
+        # A point just inside the right edge of a 90 degree horizontal view.
+        point = np.array([[9.9, 0.0, -10.0]])
+        renderer = Mitsuba(scene_dict=copy.deepcopy(default_scene_dict))
+        self.assertTrue(renderer.visible_spheres(point, 0.0, np.eye(4), [200, 100]))
+
+        # A 90 degree vertical view of a portrait image is half as wide.
+        renderer.scene_dict["sensor"]["fov_axis"] = "y"
+        for x, expected in ((5.1, False), (4.9, True)):
+            visible = renderer.visible_spheres(
+                np.array([[x, 0.0, -10.0]]), 0.0, np.eye(4), [100, 200]
+            )
+            self.assertEqual(visible[0], expected)
+
+    def test_culled_particles_keep_their_colours(self):
+        """
+        Test that only particles in view are built, with their own colours.
+        """
+        n_particles = 6
+        position = np.zeros((1, n_particles, 3))
+        position[0, :, 0] = np.linspace(-30, 30, n_particles)
+        position[0, :, 2] = -10
+        colours = np.random.default_rng(0).uniform(0, 1, (1, n_particles, 3))
+        particle = Particle(
+            name="spheres",
+            position=position,
+            mesh=Sphere(resolution=4, material=Material(colour=colours)),
+        )
+        renderer = Mitsuba(scene_dict=copy.deepcopy(default_scene_dict))
+        visible = functools.partial(
+            renderer.visible_spheres, view_matrix=np.eye(4), resolution=[100, 100]
+        )
+
+        mesh = build_mesh_dict_for_frame([particle], None, 0, visible=visible)[
+            "spheres"
+        ]["mesh"]
+        in_view = np.abs(position[0, :, 0]) < 11
+        n_vertices = len(particle.mesh.get_template().vertices)
+        self.assertEqual(len(mesh.vertices), in_view.sum() * n_vertices)
+        np.testing.assert_allclose(
+            np.asarray(mesh.vertex_colors)[::n_vertices], colours[0, in_view]
+        )
+
+        # Without particles in view the item is left out.
+        self.assertEqual(
+            build_mesh_dict_for_frame(
+                [particle],
+                None,
+                0,
+                visible=lambda centers, radius: np.zeros(len(centers), bool),
+            ),
+            {},
+        )
+
+    def test_culled_instances_keep_their_slots(self):
+        """
+        Test that culled instances are shrunk to a point, so a persistent
+        scene is updated in place and renders like the unculled frames.
+        """
+        position = np.zeros((2, 4, 3))
+        position[:, :, 0] = [np.linspace(-30, 0, 4), np.linspace(0, 30, 4)]
+        position[:, :, 2] = -10
+        particles = [
+            Particle(name="spheres", position=position, mesh=Sphere()),
+            Particle(
+                name="tori",
+                position=position + [0.0, 3.0, 0.0],
+                mesh=Torus(torus_radius=0.5, tube_radius=0.2),
+            ),
+        ]
+        culled = Mitsuba(scene_dict=copy.deepcopy(default_scene_dict))
+        unculled = Mitsuba(scene_dict=copy.deepcopy(default_scene_dict))
+        visible = functools.partial(
+            culled.visible_spheres, view_matrix=np.eye(4), resolution=[32, 32]
+        )
+
+        for frame_index in range(2):
+            scene = culled._scene
+            mesh_dict = build_mesh_dict_for_frame(
+                particles,
+                None,
+                frame_index,
+                instanced=culled.renders_instances,
+                analytic=culled.renders_analytic,
+                visible=visible,
+            )
+            for entry in mesh_dict.values():
+                scales = np.abs(entry["instances"][:, :3, :3]).sum(axis=(1, 2))
+                in_view = np.abs(position[frame_index, :, 0]) < 11
+                np.testing.assert_array_equal(scales > 0, in_view)
+
+            image = culled.render_image(mesh_dict, np.eye(4), [32, 32], 4)
+            expected = unculled.render_image(
+                build_mesh_dict_for_frame(
+                    particles,
+                    None,
+                    frame_index,
+                    instanced=unculled.renders_instances,
+                    analytic=unculled.renders_analytic,
+                ),
+                np.eye(4),
+                [32, 32],
+                4,
+            )
+            np.testing.assert_array_equal(np.array(image), np.array(expected))
+            if frame_index == 1:
+                self.assertIs(culled._scene, scene)
+
+
+if __name__ == "__main__":
+    unittest.main()
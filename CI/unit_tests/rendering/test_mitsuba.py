@@ -0,0 +1,205 @@
+"""
+ZnVis: A Zincwarecode package.
+License
+-------
+This program and the accompanying materials are made available under the terms
+of the Eclipse Public License v2.0 which accompanies this distribution, and is
+available at https://www.eclipse.org/legal/epl-v20.html
+SPDX-License-Identifier: EPL-2.0
+Copyright Contributors to the Zincwarecode Project.
+Contact Information
+-------------------
+email: zincwarecode@gmail.com
+github: https://github.com/zincware
+web: https://zincwarecode.com/
+Citation
+--------
+If you use this module please cite us with:
+
+Summary
+-------
+Test the Mitsuba renderer.
+"""
+
+import copy
+import pathlib
+import shutil
+import unittest
+
+import cv2
+import mitsuba as mi
+import numpy as np
+
+from znvis import Material
+from znvis.mesh.sphere import Sphere
+from znvis.mesh.torus import Torus
+from znvis.particle.particle import Particle
+from znvis.rendering.mitsuba import Mitsuba, default_scene_dict
+from znvis.visualizer.base_visualizer import build_mesh_dict_for_frame
+
+
+class TestMitsuba(unittest.TestCase):
+    """
+    A test class for the Mitsuba renderer.
+    """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """
+        Prepare a small trajectory and the output folder.
+        """
+        project_root = pathlib.Path(__file__).resolve().parents[2]
+        cls.output_folder = project_root / "test_files" / "mitsuba"
+        cls.output_folder.mkdir(parents=True, exist_ok=True)
+
+        position = [np.random.uniform(-2, 2, (n, 3)) for n in (3, 3, 2)]
+        colours = np.random.uniform(0, 1, (3, 3, 3))
+        cls.particle = Particle(
+            name="spheres",
+            position=position,
+            mesh=Sphere(resolution=6, material=Material(colour=colours)),
+        )
+        cls.view_matrix = np.eye(4)
+        cls.view_matrix[2, 3] = -10
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        """
+        Clean up the rendered frames.
+        """
+        if cls.output_folder.exists():
+            shutil.rmtree(cls.output_folder)
+
+    def _render(self, renderer: Mitsuba, frame_index: int) -> np.ndarray:
+        """
+        Render one frame of the trajectory and return the image.
+        """
+        save_name = f"frame_{frame_index}_{renderer.persistent_scene}.png"
+        renderer.render_mesh_objects(
+            build_mesh_dict_for_frame([self.particle], None, frame_index),
+            self.view_matrix,
+            resolution=[32, 24],
+            samples_per_pixel=4,
+            save_dir=self.output_folder,
+            save_name=save_name,
+        )
+        return cv2.imread(str(self.output_folder / save_name)).astype(int)
+
+    def test_persistent_scene_matches_reloaded_scene(self):
+        """
+        Test that updating the loaded scene renders the same frames.
+        """
+        persistent = Mitsuba(scene_dict=copy.deepcopy(default_scene_dict))
+        reloading = Mitsuba(
+            scene_dict=copy.deepcopy(default_scene_dict), persistent_scene=False
+        )
+
+        for frame_index in range(3):
+            scene = persistent._scene
+            expected = self._render(reloading, frame_index)
+            image = self._render(persistent, frame_index)
+
+            np.testing.assert_array_equal(image, expected)
+            if frame_index == 1:
+                # Same topology as the previous frame, the scene is updated.
+                self.assertIs(persistent._scene, scene)
+            else:
+                self.assertIsNot(persistent._scene, scene)
+
+    def test_scene_dict_changes_reload_the_scene(self):
+        """
+        Test that changing the lights of a persistent scene reloads it.
+        """
+        renderer = Mitsuba(scene_dict=copy.deepcopy(default_scene_dict))
+        self._render(renderer, 0)
+        scene = renderer._scene
+        self._render(renderer, 1)
+        self.assertIs(renderer._scene, scene)
+
+        renderer.scene_dict["light"]["radiance"]["value"] = 0.0
+        image = self._render(renderer, 1)
+        self.assertIsNot(renderer._scene, scene)
+        # Only the black background and unlit spheres are left.
+        self.assertEqual(image.max(), 0)
+
+    def test_meshes_reused_across_reloads(self):
+        """
+        Test that reloads refill the Mitsuba mesh of an unchanged item.
+        """
+        renderer = Mitsuba(
+            scene_dict=copy.deepcopy(default_scene_dict),
+            persistent_scene=False,
+            analytic_shapes=False,
+        )
+        meshes = []
+        for frame_index in range(3):
+            self._render(renderer, frame_index)
+            meshes.append(renderer._meshes["spheres"][1])
+
+        # The last frame has fewer spheres and needs a new mesh.
+        self.assertIs(meshes[1], meshes[0])
+        self.assertIsNot(meshes[2], meshes[1])
+
+        mesh = build_mesh_dict_for_frame([self.particle], None, 2)["spheres"]["mesh"]
+        parameters = mi.traverse(meshes[2])
+        for key, value in [
+            ("vertex_positions", mesh.vertices),
+            ("vertex_normals", mesh.vertex_normals),
+            ("vertex_color", mesh.vertex_colors),
+            ("faces", mesh.triangles),
+        ]:
+            np.testing.assert_allclose(
+                np.array(parameters[key]), np.ravel(value), rtol=1e-6
+            )
+
+    def test_instanced_meshes_match_combined_meshes(self):
+        """
+        Test that instancing a template renders like the combined mesh and
+        follows the particles in a persistent scene.
+        """
+        rng = np.random.default_rng(1)
+        particle = Particle(
+            name="tori",
+            position=[rng.uniform(-2, 2, (3, 3)) for _ in range(2)],
+            director=[rng.normal(size=(3, 3)) for _ in range(2)],
+            mesh=Torus(torus_radius=0.5, tube_radius=0.15),
+        )
+        instanced = Mitsuba(scene_dict=copy.deepcopy(default_scene_dict))
+        combined = Mitsuba(
+            scene_dict=copy.deepcopy(default_scene_dict), instanced_meshes=False
+        )
+
+        images = {}
+        for frame_index in range(2):
+            scene = instanced._scene
+            for renderer in (instanced, combined):
+                mesh_dict = build_mesh_dict_for_frame(
+                    [particle], None, frame_index, renderer.renders_instances
+                )
+                save_name = f"tori_{frame_index}_{renderer.instanced_meshes}.png"
+                renderer.render_mesh_objects(
+                    mesh_dict,
+                    self.view_matrix,
+                    resolution=[32, 24],
+                    samples_per_pixel=4,
+                    save_dir=self.output_folder,
+                    save_name=save_name,
+                )
+                images[renderer.instanced_meshes] = cv2.imread(
+                    str(self.output_folder / save_name)
+                ).astype(int)
+
+            self.assertLessEqual(np.abs(images[True] - images[False]).max(), 8)
+            if frame_index == 1:
+                self.assertIs(instanced._scene, scene)
+
+        # Each torus is an instance of one shared template.
+        mesh_dict = build_mesh_dict_for_frame(
+            [particle], None, 0, instanced.renders_instances
+        )
+        self.assertNotIn("mesh", mesh_dict["tori"])
+        self.assertEqual(len(instanced._scene.shapes()), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -24,7 +24,7 @@ import unittest
 
 import numpy as np
 
-from znvis.transformations.rotation_matrices import rotation_matrix
+from znvis.transformations.rotation_matrices import rotation_matrices, rotation_matrix
 
 
 class TestRotationMatrix(unittest.TestCase):
@@ -55,3 +55,37 @@ class TestRotationMatrix(unittest.TestCase):
         rotated_vector = np.dot(rotation, reference)
         np.testing.assert_array_equal(np.eye(3), rotation)
         np.testing.assert_array_equal(new_direction, rotated_vector)
+
+    def test_batched_rotations(self):
+        """
+        Test that every matrix of a batch rotates the reference into its target.
+        """
+        reference = np.array([1.0, 0.0, 0.0])
+        targets = np.random.uniform(-5, 5, (50, 3))
+
+        rotations = rotation_matrices(reference, targets)
+        rotated = np.einsum("nij,j->ni", rotations, reference)
+        expected = targets / np.linalg.norm(targets, axis=1, keepdims=True)
+
+        self.assertEqual(rotations.shape, (50, 3, 3))
+        np.testing.assert_almost_equal(rotated, expected)
+        np.testing.assert_almost_equal(
+            np.einsum("nji,njk->nik", rotations, rotations),
+            np.broadcast_to(np.eye(3), (50, 3, 3)),
+        )
+        np.testing.assert_almost_equal(np.linalg.det(rotations), np.ones(50))
+
+    def test_batched_degenerate_rotations(self):
+        """
+        Test parallel, antiparallel and zero length targets in one batch.
+        """
+        reference = np.array([0.0, 0.0, 1.0])
+        targets = np.array([[0.0, 0.0, 3.0], [0.0, 0.0, -2.0], [0.0, 0.0, 0.0]])
+
+        rotations = rotation_matrices(reference, targets)
+
+        self.assertTrue(np.isfinite(rotations).all())
+        np.testing.assert_array_equal(rotations[0], np.eye(3))
+        np.testing.assert_almost_equal(rotations[1] @ reference, -reference)
+        np.testing.assert_almost_equal(np.linalg.det(rotations[1]), 1.0)
+        np.testing.assert_array_equal(rotations[2], np.eye(3))
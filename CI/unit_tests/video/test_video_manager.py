@@ -2,6 +2,7 @@ import os
 import pathlib
 import shutil
 import unittest
+from unittest.mock import patch
 
 import cv2
 import numpy as np
@@ -92,6 +93,136 @@ class TestVideoManager(unittest.TestCase):
         self.assertTrue(video_path.exists())
         self.assertTrue(str(video_path).endswith(".mp4"))
 
+    def test_video_stream_reorders_frames(self):
+        def frame(i):
+            return np.full((100, 200, 3), i * 60, dtype=np.uint8)
+
+        stream = self.manager.open_video_stream(
+            [0, 1, 2, 3], video_name="test_stream", frame_loader=frame
+        )
+        stream.add_frame(2, frame(2))
+        stream.add_frame(1, frame(1))
+        self.assertEqual(stream.frames_written, 0)
+        # Frame 0 comes from the loader, then the buffered frames follow.
+        stream.add_frame(0)
+        self.assertEqual(stream.frames_written, 3)
+        stream.add_frame(1, frame(1))
+        stream.add_frame(3, frame(3))
+        video_path = stream.close()
+
+        capture = cv2.VideoCapture(video_path.as_posix())
+        levels = []
+        while True:
+            success, image = capture.read()
+            if not success:
+                break
+            levels.append(image.mean())
+        capture.release()
+        self.assertEqual(len(levels), 4)
+        np.testing.assert_allclose(levels, [0, 60, 120, 180], atol=10)
+
+    def test_video_stream_moves_excess_frames_to_disk(self):
+        def frame(i):
+            return np.full((100, 200, 3), i * 60, dtype=np.uint8)
+
+        stream = self.manager.open_video_stream(
+            [0, 1, 2, 3], video_name="test_spill", max_buffered_frames=1
+        )
+        for frame_index in (3, 1, 2):
+            stream.add_frame(frame_index, frame(frame_index))
+
+        # Only the frame needed next stays in memory.
+        in_memory = [
+            index
+            for index, image in stream._buffer.items()
+            if isinstance(image, np.ndarray)
+        ]
+        self.assertEqual(in_memory, [1])
+        self.assertEqual(len(list(stream._spill_folder.glob("*.npy"))), 2)
+
+        stream.add_frame(0, frame(0))
+        video_path = stream.close()
+
+        capture = cv2.VideoCapture(video_path.as_posix())
+        levels = []
+        while True:
+            success, image = capture.read()
+            if not success:
+                break
+            levels.append(image.mean())
+        capture.release()
+        np.testing.assert_allclose(levels, [0, 60, 120, 180], atol=10)
+        self.assertEqual(list(self.output_folder.glob(".test_spill-*")), [])
+
+    def test_video_stream_missing_frames(self):
+        stream = self.manager.open_video_stream([0, 1], video_name="test_missing")
+        stream.add_frame(1, np.zeros((100, 200, 3), dtype=np.uint8))
+
+        with self.assertRaisesRegex(
+            RuntimeError, "2 missing frames, starting at frame 0"
+        ):
+            stream.close()
+        with self.assertRaises(ValueError):
+            stream.add_frame(5, np.zeros((100, 200, 3), dtype=np.uint8))
+
+    def test_decode_frames_in_order_with_bounded_prefetch(self):
+        manager = VideoManager(
+            output_folder=self.output_folder, decode_workers=4, prefetch_frames=3
+        )
+        paths = [f"frame_{i}.png" for i in range(10)]
+        decoded = []
+
+        def imread(path):
+            decoded.append(path)
+            return None if path == "frame_4.png" else path
+
+        with patch.object(cv2, "imread", side_effect=imread):
+            frames = manager._decode_frames(paths)
+            results = []
+            for path, image in frames:
+                # Only the prefetched frames are decoded ahead of the consumer.
+                self.assertLessEqual(len(decoded), len(results) + 1 + 3)
+                results.append((path, image))
+
+        self.assertEqual([path for path, _ in results], paths)
+        self.assertIsNone(results[4][1])
+        self.assertEqual(results[5][1], "frame_5.png")
+
+    def _write_segment_frames(self, name: str, number_of_frames: int):
+        frame_folder = self.temp_dir / name
+        frame_folder.mkdir(parents=True, exist_ok=True)
+        for i in range(number_of_frames):
+            img = np.full((100, 200, 3), i * 20, dtype=np.uint8)
+            cv2.imwrite(str(frame_folder / f"frame_{i:03d}.png"), img)
+        return frame_folder
+
+    def test_segment_encoding_falls_back_without_ffmpeg(self):
+        frame_folder = self._write_segment_frames("segment_fallback", 9)
+        manager = VideoManager(output_folder=self.output_folder, encode_segments=3)
+
+        with patch("znvis.video.video_manager.shutil.which", return_value=None):
+            video_path = manager.create_video_from_frames(
+                frame_folder=frame_folder, video_name="test_fallback"
+            )
+
+        self.assertEqual(manager.get_video_info(video_path)["frame_count"], 9)
+
+    @unittest.skipUnless(shutil.which("ffmpeg"), "ffmpeg is not installed")
+    def test_segment_encoding_joins_segments(self):
+        frame_folder = self._write_segment_frames("segment_join", 9)
+        manager = VideoManager(output_folder=self.output_folder, encode_segments=3)
+
+        video_path = manager.create_video_from_frames(
+            frame_folder=frame_folder, video_name="test_segments"
+        )
+
+        info = manager.get_video_info(video_path)
+        self.assertEqual(info["frame_count"], 9)
+        self.assertTrue(abs(info["fps"] - manager.frame_rate) < 0.5)
+        self.assertEqual(
+            [path.name for path in self.output_folder.glob(".test_segments-*")], []
+        )
+
     def test_get_supported_formats(self):
         supported_formats = [
             "mp4",
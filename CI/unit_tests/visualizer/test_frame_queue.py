@@ -0,0 +1,141 @@
+"""
+ZnVis: A Zincwarecode package.
+
+License
+-------
+This program and the accompanying materials are made available under the terms
+of the Eclipse Public License v2.0 which accompanies this distribution, and is
+available at https://www.eclipse.org/legal/epl-v20.html
+SPDX-License-Identifier: EPL-2.0
+Copyright Contributors to the Zincwarecode Project.
+Contact Information
+-------------------
+email: zincwarecode@gmail.com
+github: https://github.com/zincware
+web: https://zincwarecode.com/
+
+Citation
+--------
+If you use this module please cite us with:
+
+Summary
+-------
+Unit tests for the lease-based frame queue.
+"""
+
+import os
+import shutil
+import time
+import unittest
+from pathlib import Path
+
+from znvis.parallel_render.frame_queue import FrameLeaseQueue
+
+
+class TestFrameLeaseQueue(unittest.TestCase):
+    """
+    Test claiming, stealing and completing frame batches.
+    """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        project_root = Path(__file__).resolve().parents[2]
+        cls.output_folder = project_root / "test_files" / "frame_queue"
+
+    def setUp(self) -> None:
+        if self.output_folder.exists():
+            shutil.rmtree(self.output_folder)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        if cls.output_folder.exists():
+            shutil.rmtree(cls.output_folder)
+
+    def _queue(self, frames=range(5), **kwargs) -> FrameLeaseQueue:
+        kwargs.setdefault("batch_size", 2)
+        kwargs.setdefault("lease_timeout", 60.0)
+        return FrameLeaseQueue(self.output_folder, list(frames), **kwargs)
+
+    def test_processes_claim_disjoint_batches(self):
+        first, second = self._queue(), self._queue()
+
+        claimed = [first.claim(), second.claim(), first.claim()]
+        self.assertEqual([batch.index for batch in claimed], [0, 1, 2])
+        self.assertEqual(claimed[2].frame_indices, (4,))
+        self.assertIsNone(second.claim())
+
+        for queue, batch in zip((first, second, first), claimed):
+            self.assertFalse(first.all_done())
+            self.assertFalse(first.claim_finalization())
+            queue.complete(batch)
+
+        self.assertTrue(second.all_done())
+        self.assertTrue(second.claim_finalization())
+        self.assertFalse(first.claim_finalization())
+        leases = [path.name for path in self.output_folder.glob("*.lease")]
+        self.assertEqual(leases, ["finalize.lease"])
+
+    def test_released_batch_can_be_claimed_again(self):
+        first, second = self._queue(), self._queue()
+
+        batch = first.claim()
+        first.release(batch)
+
+        self.assertEqual(second.claim(), batch)
+        second.release(batch)
+
+    def test_expired_lease_is_stolen(self):
+        crashed, survivor = self._queue(), self._queue(lease_timeout=5.0)
+
+        batch = crashed.claim()
+        # Simulate a process that died without renewing its lease.
+        crashed._stop_heartbeat()
+        lease_path = crashed._lease_path(batch)
+        old = time.time() - 10
+        os.utime(lease_path, (old, old))
+
+        self.assertEqual(survivor.claim(), batch)
+        self.assertEqual(lease_path.read_text(), survivor.owner)
+        survivor.release(batch)
+
+    def test_live_lease_is_renewed_and_not_stolen(self):
+        owner, other = self._queue(lease_timeout=0.4), self._queue(lease_timeout=0.4)
+
+        batch = owner.claim()
+        time.sleep(0.6)
+        claimed = other.claim()
+
+        self.assertNotEqual(claimed, batch)
+        other.release(claimed)
+        owner.release(batch)
+
+    def test_lease_moved_during_renewal_is_lost(self):
+        queue = self._queue(lease_timeout=0.2)
+        batch = queue.claim()
+        lease_path = queue._lease_path(batch)
+        read_lease = queue._read_lease
+
+        def read_then_steal(path):
+            # A stealer renames the lease right after the owner has read it.
+            lease = read_lease(path)
+            path.unlink(missing_ok=True)
+            return lease
+
+        queue._read_lease = read_then_steal
+        with self.assertLogs("znvis", level="WARNING") as logs:
+            queue._heartbeat.join(5)
+
+        self.assertFalse(queue._heartbeat.is_alive())
+        self.assertIn("Lost the lease", logs.output[0])
+        self.assertFalse(lease_path.exists())
+        queue.release(batch)
+
+    def test_mismatching_queue_raises(self):
+        self._queue()
+
+        with self.assertRaisesRegex(ValueError, "different frame selection"):
+            self._queue(frames=range(6))
+
+
+if __name__ == "__main__":
+    unittest.main()
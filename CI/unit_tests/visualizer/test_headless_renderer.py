@@ -23,9 +23,10 @@ Summary
 Test the headless visualizer module.
 """
 
+import shutil
 import unittest
 from pathlib import Path
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 
 import numpy as np
 
@@ -34,6 +35,8 @@ from znvis.mesh.arrow import Arrow
 from znvis.mesh.sphere import Sphere
 from znvis.particle.particle import Particle
 from znvis.particle.vector_field import VectorField
+from znvis.rendering.mitsuba import Mitsuba
+from znvis.video.video_manager import VideoManager
 from znvis.visualizer.headless_visualizer import HeadlessVisualizer
 
 
@@ -182,6 +185,22 @@ class TestHeadlessVisualizer(unittest.TestCase):
         self.assertEqual(self.visualizer.keep_frames, True)
         self.assertFalse(self.visualizer.parallel_render)
 
+    def test_video_settings_reach_video_manager(self):
+        """
+        Test that the frame decoding settings are passed to the video manager.
+        """
+        visualizer = HeadlessVisualizer(
+            particles=self.visualizer.particles,
+            output_folder=self.visualizer.output_folder,
+            video_decode_workers=3,
+            video_prefetch_frames=5,
+            video_encode_segments=2,
+        )
+
+        self.assertEqual(visualizer.video_manager.decode_workers, 3)
+        self.assertEqual(visualizer.video_manager.prefetch_frames, 5)
+        self.assertEqual(visualizer.video_manager.encode_segments, 2)
+
     def test_default_parallel_workers_use_visible_gpu_count(self):
         """
         Test that automatic worker count uses one worker per visible GPU.
@@ -198,13 +217,42 @@ class TestHeadlessVisualizer(unittest.TestCase):
 
         self.assertEqual(visualizer.parallel_render_workers, 3)
 
-    def test_default_parallel_workers_fall_back_to_one_without_gpu(self):
+    def test_default_parallel_workers_use_cpu_cores_without_gpu(self):
         """
-        Test that automatic worker count remains valid without visible GPUs.
+        Test that automatic worker count uses the CPU cores without visible GPUs.
         """
-        with patch(
-            "znvis.visualizer.base_visualizer._detect_available_gpu_devices",
-            return_value=0,
+        with (
+            patch(
+                "znvis.visualizer.base_visualizer._detect_available_gpu_devices",
+                return_value=0,
+            ),
+            patch(
+                "znvis.visualizer.base_visualizer._detect_available_cpu_cores",
+                return_value=16,
+            ),
+        ):
+            visualizer = HeadlessVisualizer(
+                particles=[self.visualizer.particles[0]],
+                renderer_resolution=[64, 64],
+                do_create_video=False,
+            )
+
+        self.assertEqual(visualizer.parallel_render_device, "cpu")
+        self.assertEqual(visualizer.parallel_render_workers, 4)
+
+    def test_default_parallel_workers_fall_back_to_one_on_few_cores(self):
+        """
+        Test that automatic worker count remains valid on small CPU-only machines.
+        """
+        with (
+            patch(
+                "znvis.visualizer.base_visualizer._detect_available_gpu_devices",
+                return_value=0,
+            ),
+            patch(
+                "znvis.visualizer.base_visualizer._detect_available_cpu_cores",
+                return_value=2,
+            ),
         ):
             visualizer = HeadlessVisualizer(
                 particles=[self.visualizer.particles[0]],
@@ -249,7 +297,9 @@ class TestHeadlessVisualizer(unittest.TestCase):
         Test that frame_range renders the selected global frame indices.
         """
         with (
-            patch.object(self.visualizer, "_render_frame") as render_frame_mock,
+            patch.object(self.visualizer, "_build_frame"),
+            patch.object(self.visualizer, "_render_built_frame"),
+            patch.object(self.visualizer, "_write_frame") as write_frame_mock,
             patch.object(self.visualizer, "_create_movie") as create_movie_mock,
         ):
             self.visualizer.do_create_video = False
@@ -260,11 +310,34 @@ class TestHeadlessVisualizer(unittest.TestCase):
             )
 
         self.assertEqual(
-            [call.args[0] for call in render_frame_mock.call_args_list],
+            [call.args[0] for call in write_frame_mock.call_args_list],
             [2, 3, 4],
         )
         create_movie_mock.assert_not_called()
 
+    def test_static_items_are_built_once(self):
+        """
+        Test that every frame of a render reuses the static items.
+        """
+        with (
+            patch.object(self.visualizer, "_render_built_frame") as render_mock,
+            patch.object(self.visualizer, "_write_frame"),
+            patch.object(self.visualizer, "_create_movie"),
+        ):
+            self.visualizer.do_create_video = False
+            self.visualizer.parallel_render = False
+            self.visualizer.render_visualization(
+                frame_range=(0, 3),
+                skip_existing_frames=False,
+            )
+
+        mesh_dicts = [call.args[1][0] for call in render_mock.call_args_list]
+        self.assertEqual(len(mesh_dicts), 3)
+        for mesh_dict in mesh_dicts[1:]:
+            for name in ("static_particle", "static_field"):
+                self.assertIs(mesh_dict[name], mesh_dicts[0][name])
+            self.assertIsNot(mesh_dict["my_particle"], mesh_dicts[0]["my_particle"])
+
     def test_render_visualization_rejects_multiple_frame_selectors(self):
         """
         Test that only one frame selection mode can be used at a time.
@@ -284,7 +357,9 @@ class TestHeadlessVisualizer(unittest.TestCase):
         existing_frame.touch()
 
         with (
-            patch.object(self.visualizer, "_render_frame") as render_frame_mock,
+            patch.object(self.visualizer, "_build_frame"),
+            patch.object(self.visualizer, "_render_built_frame"),
+            patch.object(self.visualizer, "_write_frame") as write_frame_mock,
             patch.object(self.visualizer, "_create_movie") as create_movie_mock,
         ):
             self.visualizer.do_create_video = False
@@ -292,7 +367,7 @@ class TestHeadlessVisualizer(unittest.TestCase):
             self.visualizer.render_visualization(frame_range=(2, 5))
 
         self.assertEqual(
-            [call.args[0] for call in render_frame_mock.call_args_list],
+            [call.args[0] for call in write_frame_mock.call_args_list],
             [2, 4],
         )
         create_movie_mock.assert_not_called()
@@ -306,7 +381,9 @@ class TestHeadlessVisualizer(unittest.TestCase):
         existing_frame.touch()
 
         with (
-            patch.object(self.visualizer, "_render_frame") as render_frame_mock,
+            patch.object(self.visualizer, "_build_frame"),
+            patch.object(self.visualizer, "_render_built_frame"),
+            patch.object(self.visualizer, "_write_frame") as write_frame_mock,
             patch.object(self.visualizer, "_create_movie") as create_movie_mock,
         ):
             self.visualizer.do_create_video = False
@@ -317,7 +394,7 @@ class TestHeadlessVisualizer(unittest.TestCase):
             )
 
         self.assertEqual(
-            [call.args[0] for call in render_frame_mock.call_args_list],
+            [call.args[0] for call in write_frame_mock.call_args_list],
             [2, 3, 4],
         )
         create_movie_mock.assert_not_called()
@@ -375,6 +452,58 @@ class TestHeadlessVisualizer(unittest.TestCase):
             ).exists()
         )
 
+    def test_stream_video(self):
+        """
+        Test that streamed frames end up in the video without frame files.
+        """
+        visualizer = self.visualizer_delete_frames
+        visualizer.stream_video = True
+        try:
+            visualizer.render_visualization()
+        finally:
+            visualizer.stream_video = False
+
+        self.assertFalse((visualizer.output_folder / "video_frames").exists())
+        info = visualizer.video_manager.get_video_info(
+            visualizer.output_folder / "ZnVis-Video.mp4"
+        )
+        self.assertEqual(info["frame_count"], 10)
+        self.assertEqual((info["width"], info["height"]), (192, 108))
+
+    @unittest.skipUnless(shutil.which("ffmpeg"), "ffmpeg is not installed")
+    def test_segmented_video_encoding(self):
+        """
+        Test that a visualizer encodes its video as joined segments.
+        """
+        output_folder = self.visualizer.output_folder.parent / "segments_test"
+        visualizer = HeadlessVisualizer(
+            particles=self.visualizer.particles,
+            frame_rate=10,
+            renderer_resolution=[64, 36],
+            output_folder=output_folder,
+            renderer_spp=4,
+            keep_frames=False,
+            video_encode_segments=3,
+        )
+
+        with patch.object(
+            VideoManager,
+            "_encode_segments",
+            autospec=True,
+            side_effect=VideoManager._encode_segments,
+        ) as encode_segments:
+            visualizer.render_visualization()
+
+        encode_segments.assert_called_once()
+        info = visualizer.video_manager.get_video_info(
+            output_folder / "ZnVis-Video.mp4"
+        )
+        self.assertEqual(info["frame_count"], 10)
+        self.assertEqual((info["width"], info["height"]), (64, 36))
+        self.assertEqual(
+            [path.name for path in output_folder.iterdir()], ["ZnVis-Video.mp4"]
+        )
+
     def test_empty_visualizer(self):
         """
         Test the empty visualizer.
@@ -433,4 +562,98 @@ class TestHeadlessVisualizer(unittest.TestCase):
         self.assertEqual(passed_config["number_of_steps"], 10)
         self.assertEqual(passed_config["parallel_render_workers"], 4)
         self.assertEqual(passed_config["available_gpu_devices"], 2)
+        self.assertEqual(
+            passed_config["render_device"], self.visualizer.parallel_render_device
+        )
         self.assertIn("worker_state", passed_config)
+
+    def test_frustum_culling_follows_the_renderer_camera(self):
+        """
+        Test that particles are only culled if the renderer camera is the view.
+        """
+        position = np.array([[[0.0, 0.0, -10.0], [0.0, 0.0, 10.0]]])
+        particle = Particle(name="spheres", position=position, mesh=Sphere())
+        for update_camera, expected in ((True, [True, False]), (False, [True, True])):
+            visualizer = HeadlessVisualizer(
+                particles=[particle],
+                output_folder=self.visualizer.output_folder,
+                renderer=Mitsuba(update_camera=update_camera),
+                frustum_culling=True,
+            )
+            visualizer.view_matrix = np.eye(4)
+
+            mesh_dict, _ = visualizer._build_frame(0)
+            scales = np.abs(mesh_dict["spheres"]["instances"][:, :3, :3]).sum(
+                axis=(1, 2)
+            )
+            np.testing.assert_array_equal(scales > 0, expected)
+
+    @patch("znvis.visualizer.headless_visualizer.render_frames_parallel")
+    def test_worker_settings_reach_render_config(self, mock_render_parallel):
+        """
+        Test that the queue depth and timeouts are passed to the workers.
+        """
+        visualizer = HeadlessVisualizer(
+            particles=self.visualizer.particles,
+            output_folder=self.visualizer.output_folder,
+            parallel_render=True,
+            parallel_render_queue_depth=4,
+            parallel_render_heartbeat_timeout=12.0,
+            parallel_render_frame_timeout=3600.0,
+        )
+        visualizer._render_frames_parallel(frame_indices=[0])
+
+        passed_config = mock_render_parallel.call_args.args[0]
+        self.assertEqual(passed_config["worker_queue_depth"], 4)
+        self.assertEqual(passed_config["heartbeat_timeout"], 12.0)
+        self.assertEqual(passed_config["frame_timeout"], 3600.0)
+
+        # The frame deadline is off unless it is asked for.
+        self.assertIsNone(self.visualizer._make_render_config()["frame_timeout"])
+
+    @patch("znvis.visualizer.headless_visualizer.render_frames_parallel")
+    def test_render_server_renders_frames_on_warm_workers(self, mock_render_parallel):
+        server = MagicMock()
+        self.visualizer.render_server = server
+        self.visualizer.do_create_video = False
+        self.visualizer.parallel_render = False
+        try:
+            self.visualizer._record_trajectory(frame_indices=[0, 1])
+        finally:
+            self.visualizer.render_server = None
+
+        mock_render_parallel.assert_not_called()
+        server.render_frames.assert_called_once()
+        self.assertEqual(server.render_frames.call_args.kwargs["frame_indices"], [0, 1])
+        self.assertIn("worker_state", server.render_frames.call_args.args[0])
+
+    def test_render_from_queue_renders_every_batch_once(self):
+        """
+        Test that queue rendering covers the selection and finalizes once.
+        """
+        queue_folder = self.visualizer.output_folder / ".frame_queue"
+        rendered = []
+        with (
+            patch.object(
+                self.visualizer,
+                "_render_frames",
+                side_effect=lambda frame_indices: rendered.append(frame_indices),
+            ),
+            patch.object(self.visualizer, "_create_movie") as movie_mock,
+        ):
+            self.visualizer.do_create_video = True
+            try:
+                finalized = self.visualizer.render_visualization_from_queue(
+                    frame_range=(0, 3), batch_size=2
+                )
+                finalized_again = self.visualizer.render_visualization_from_queue(
+                    frame_range=(0, 3), batch_size=2
+                )
+            finally:
+                self.visualizer.do_create_video = False
+                shutil.rmtree(queue_folder, ignore_errors=True)
+
+        self.assertTrue(finalized)
+        self.assertFalse(finalized_again)
+        movie_mock.assert_called_once()
+        self.assertEqual(sorted(sum(rendered, [])), [0, 1, 2])
@@ -27,7 +27,9 @@ import unittest
 
 import numpy as np
 
+from znvis.mesh.sphere import Sphere
 from znvis.mesh_cache.mesh_frame_cache import MeshFrameCache, estimate_mesh_nbytes
+from znvis.particle.particle import Particle
 
 
 class DummyMesh:
@@ -176,6 +178,58 @@ class TestMeshFrameCache(unittest.TestCase):
         self.assertTrue(cache.contains(item, 3))
         self.assertEqual(cache.dynamic_bytes, 20)
 
+    def test_dynamic_meshes_are_stored_compactly(self):
+        """
+        Test that dynamic Open3D meshes are cached as compact shared frames.
+        """
+        item = Particle(
+            name="cached_particle",
+            position=np.random.uniform(-5, 5, (3, 4, 3)),
+            mesh=Sphere(),
+        )
+        cache = MeshFrameCache()
+
+        first = cache.get(item, 0)
+        second = cache.get(item, 1)
+        cached = cache.get(item, 0)
+
+        self.assertLess(
+            cache.dynamic_bytes,
+            estimate_mesh_nbytes(first) + estimate_mesh_nbytes(second),
+        )
+        np.testing.assert_allclose(
+            np.asarray(cached.vertices), np.asarray(first.vertices), atol=1e-5
+        )
+        np.testing.assert_array_equal(
+            np.asarray(cached.triangles), np.asarray(first.triangles)
+        )
+
+    def test_shared_triangles_stay_counted_until_the_last_frame_is_evicted(self):
+        """
+        Test that shared arrays are counted once while any frame holds them.
+        """
+        item = Particle(
+            name="cached_particle",
+            position=np.random.uniform(-5, 5, (3, 4, 3)),
+            mesh=Sphere(),
+        )
+        cache = MeshFrameCache()
+        for frame_index in range(3):
+            cache.get(item, frame_index)
+
+        frames = [cache._dynamic_cache[(id(item), index)][0] for index in range(3)]
+        self.assertIs(frames[2].triangles, frames[0].triangles)
+        per_frame = frames[0].vertices.nbytes + frames[0].normals.nbytes
+        triangles = frames[0].triangles.nbytes
+        self.assertEqual(cache.dynamic_bytes, 3 * per_frame + triangles)
+
+        cache.evict_dynamic_frame(0)
+        self.assertEqual(cache.dynamic_bytes, 2 * per_frame + triangles)
+
+        cache.evict_dynamic_frames_not_in(set())
+        self.assertEqual(cache.dynamic_bytes, 0)
+        self.assertEqual(cache._shared_arrays, {})
+
 
 if __name__ == "__main__":
     unittest.main()
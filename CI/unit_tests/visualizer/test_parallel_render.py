@@ -23,11 +23,26 @@ Summary
 Unit tests for internal parallel rendering helpers.
 """
 
+import io
+import os
+import tempfile
+import time
 import unittest
 from types import SimpleNamespace
 from unittest.mock import MagicMock, patch
 
+import numpy as np
+
 import znvis.parallel_render.parallel_render_manager as parallel_render_manager
+from znvis import Material
+from znvis.mesh.sphere import Sphere
+from znvis.parallel_render.protocol import (
+    MessageReader,
+    MessageType,
+    encode_message,
+    read_message,
+)
+from znvis.particle.particle import Particle
 
 
 class _DummyProgress:
@@ -89,6 +104,78 @@ class TestParallelRender(unittest.TestCase):
                 config["parallel_render_workers"], config["available_gpu_devices"]
             )
 
+    @patch(
+        "znvis.parallel_render.parallel_render_manager._available_cpu_cores",
+        return_value=list(range(8)),
+    )
+    def test_cpu_worker_specs_partition_available_cores(self, _cores_mock):
+        specs = parallel_render_manager._build_worker_specs(3, 0, render_device="cpu")
+
+        self.assertEqual(
+            [spec.cpu_cores for spec in specs], [(0, 1, 2), (3, 4, 5), (6, 7)]
+        )
+        self.assertTrue(all(spec.variant == "llvm_ad_rgb" for spec in specs))
+        self.assertTrue(all(spec.cuda_visible_device == "-1" for spec in specs))
+
+    @patch(
+        "znvis.parallel_render.parallel_render_manager._available_cpu_cores",
+        return_value=[0, 1],
+    )
+    def test_cpu_worker_specs_warn_when_oversubscribed(self, _cores_mock):
+        with self.assertWarnsRegex(UserWarning, "oversubscribes"):
+            specs = parallel_render_manager._build_worker_specs(
+                3, 0, render_device="cpu"
+            )
+
+        self.assertEqual([spec.cpu_cores for spec in specs], [(0,), (1,), (0,)])
+
+    def test_worker_specs_reject_unknown_device(self):
+        with self.assertRaisesRegex(ValueError, "Unknown parallel render device"):
+            parallel_render_manager._build_worker_specs(2, 1, render_device="tpu")
+
+    def test_worker_state_memory_maps_large_arrays(self):
+        trajectory = np.random.uniform(size=(64, 1024, 3))
+        small = np.arange(3.0)
+        state = {"positions": trajectory, "directors": trajectory, "small": small}
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            state_path = os.path.join(temp_dir, "state.pkl")
+            parallel_render_manager._dump_worker_state(state, state_path)
+            loaded = parallel_render_manager.load_worker_state(state_path)
+
+            # The shared array is written once and not pickled into the state.
+            self.assertEqual(
+                sorted(os.listdir(temp_dir)), ["array_0000.npy", "state.pkl"]
+            )
+            self.assertLess(os.path.getsize(state_path), trajectory.nbytes // 100)
+            self.assertIsInstance(loaded["positions"], np.memmap)
+            self.assertNotIsInstance(loaded["small"], np.memmap)
+            np.testing.assert_array_equal(loaded["positions"], trajectory)
+            np.testing.assert_array_equal(loaded["directors"], trajectory)
+            np.testing.assert_array_equal(loaded["small"], small)
+            del loaded
+
+    def test_worker_state_memory_maps_particle_colours(self):
+        colours = np.random.uniform(size=(64, 1024, 3))
+        particle = Particle(
+            name="spheres",
+            position=np.random.uniform(size=(64, 1024, 3)),
+            mesh=Sphere(material=Material(colour=colours)),
+        )
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            state_path = os.path.join(temp_dir, "state.pkl")
+            parallel_render_manager._dump_worker_state(
+                {"particles": [particle]}, state_path
+            )
+            loaded = parallel_render_manager.load_worker_state(state_path)
+
+            loaded_particle = loaded["particles"][0]
+            self.assertIsInstance(loaded_particle.position, np.memmap)
+            self.assertIsInstance(loaded_particle.mesh.material.colour, np.memmap)
+            np.testing.assert_array_equal(loaded_particle.mesh.material.colour, colours)
+            del loaded, loaded_particle
+
     @patch("znvis.parallel_render.parallel_render_manager.subprocess.Popen")
     def test_start_worker_process_pins_cuda_visible_device(self, popen_mock):
         spec = parallel_render_manager._WorkerSpec(gpu_id=1, cuda_visible_device="3")
@@ -98,6 +185,22 @@ class TestParallelRender(unittest.TestCase):
         env = popen_mock.call_args.kwargs["env"]
         self.assertEqual(env["CUDA_VISIBLE_DEVICES"], "3")
 
+    @patch("znvis.parallel_render.parallel_render_manager.subprocess.Popen")
+    def test_start_worker_process_sets_cpu_partition(self, popen_mock):
+        spec = parallel_render_manager._WorkerSpec(
+            gpu_id=-1,
+            cuda_visible_device="-1",
+            variant="llvm_ad_rgb",
+            cpu_cores=(4, 5, 6),
+        )
+
+        parallel_render_manager._start_worker_process(spec, "/tmp/state.pkl")
+
+        env = popen_mock.call_args.kwargs["env"]
+        self.assertEqual(env["ZNVIS_MITSUBA_VARIANT"], "llvm_ad_rgb")
+        self.assertEqual(env["ZNVIS_RENDER_CPU_CORES"], "4,5,6")
+        self.assertEqual(env["OMP_NUM_THREADS"], "3")
+
     def test_parallel_without_visible_gpu_raises_runtime_error(self):
         config = self._make_render_config(workers=2, gpus=0)
 
@@ -134,6 +237,31 @@ class TestParallelRender(unittest.TestCase):
         with self.assertRaisesRegex(RuntimeError, "boom"):
             parallel_render_manager.render_frames_parallel(config, _DummyProgress)
 
+    @patch("znvis.parallel_render.parallel_render_manager.mp.current_process")
+    @patch("znvis.parallel_render.parallel_render_manager._start_worker_process")
+    def test_worker_state_is_removed_when_workers_fail_to_start(
+        self, start_worker_mock, current_process_mock
+    ):
+        config = self._make_render_config(workers=2, gpus=2)
+        config["worker_state"]["positions"] = np.zeros((1024, 1024))
+        current_process_mock.return_value = SimpleNamespace(name="MainProcess")
+        state_files = []
+
+        def fail_to_start(_spec, state_path):
+            state_files.extend(os.listdir(os.path.dirname(state_path)))
+            raise RuntimeError("boom")
+
+        start_worker_mock.side_effect = fail_to_start
+
+        with tempfile.TemporaryDirectory() as state_dir:
+            config["state_dir"] = state_dir
+            with self.assertRaisesRegex(RuntimeError, "boom"):
+                parallel_render_manager.render_frames_parallel(config, _DummyProgress)
+
+            # The state was spilled to the given folder and removed again.
+            self.assertEqual(sorted(state_files), ["array_0000.npy", "state.pkl"])
+            self.assertEqual(os.listdir(state_dir), [])
+
     @patch("znvis.parallel_render.parallel_render_manager.selectors.DefaultSelector")
     @patch("znvis.parallel_render.parallel_render_manager._force_stop_processes")
     @patch("znvis.parallel_render.parallel_render_manager.mp.current_process")
@@ -163,6 +291,104 @@ class TestParallelRender(unittest.TestCase):
         stop_processes_mock.assert_called_once()
         self.assertEqual(stop_processes_mock.call_args.args[0], [process, process])
 
+    def test_message_reader_reassembles_split_messages(self):
+        read_fd, write_fd = os.pipe()
+        reader = MessageReader(read_fd)
+        data = encode_message(MessageType.DONE, {"frame": 3}) + encode_message(
+            MessageType.HEARTBEAT
+        )
+        try:
+            os.write(write_fd, data[:4])
+            self.assertEqual(reader.read_available(), [])
+            os.write(write_fd, data[4:])
+            self.assertEqual(
+                reader.read_available(),
+                [(MessageType.DONE, {"frame": 3}), (MessageType.HEARTBEAT, {})],
+            )
+        finally:
+            os.close(write_fd)
+        self.assertEqual(reader.read_available(), [])
+        self.assertTrue(reader.closed)
+        os.close(read_fd)
+
+    def test_dispatch_keeps_queue_depth_frames_per_worker(self):
+        workers = [
+            {"process": MagicMock(stdin=io.BytesIO()), "pending": 0, "last_seen": 0}
+            for _ in range(2)
+        ]
+        sent_before_first_reply = []
+
+        def replies(_selector, _workers, _timeout, **_kwargs):
+            sent_before_first_reply.extend(w["pending"] for w in workers)
+            for frame in range(5):
+                worker = workers[frame % 2]
+                worker["pending"] -= 1
+                yield worker, MessageType.DONE, {"frame": frame}
+
+        with patch.object(parallel_render_manager, "_worker_messages", replies):
+            parallel_render_manager._dispatch_frames(
+                MagicMock(), workers, list(range(5)), _DummyProgress, queue_depth=2
+            )
+
+        self.assertEqual(sent_before_first_reply, [2, 2])
+        frames = []
+        for worker in workers:
+            worker["process"].stdin.seek(0)
+            while (message := read_message(worker["process"].stdin)) is not None:
+                self.assertEqual(message[0], MessageType.FRAME)
+                frames.append(message[1]["frame"])
+        self.assertEqual(sorted(frames), [0, 1, 2, 3, 4])
+
+    def test_busy_worker_without_heartbeat_is_reported_hung(self):
+        selector = MagicMock()
+        selector.select.return_value = []
+        worker = {
+            "process": MagicMock(pid=123),
+            "pending": 1,
+            "last_seen": time.monotonic() - 10,
+        }
+
+        with self.assertRaisesRegex(RuntimeError, "stopped responding pid=123"):
+            next(parallel_render_manager._worker_messages(selector, [worker], 5.0))
+
+    def test_busy_worker_with_heartbeats_but_no_frames_is_reported_stuck(self):
+        read_fd, write_fd = os.pipe()
+        os.write(write_fd, encode_message(MessageType.HEARTBEAT))
+        key = SimpleNamespace(fileobj=read_fd)
+        selector = MagicMock()
+        selector.select.return_value = [(key, None)]
+        worker = {
+            "process": MagicMock(pid=123),
+            "reader": MessageReader(read_fd),
+            "pending": 1,
+            "last_seen": time.monotonic(),
+            "last_reply": time.monotonic() - 10,
+        }
+        key.data = worker
+
+        try:
+            with self.assertRaisesRegex(RuntimeError, "no progress pid=123"):
+                next(
+                    parallel_render_manager._worker_messages(
+                        selector, [worker], 5.0, frame_timeout=5.0
+                    )
+                )
+        finally:
+            os.close(read_fd)
+            os.close(write_fd)
+
+    def test_idle_worker_without_heartbeat_is_not_hung(self):
+        selector = MagicMock()
+        selector.select.side_effect = [[], KeyboardInterrupt]
+        worker = {
+            "process": MagicMock(pid=123),
+            "pending": 0,
+            "last_seen": time.monotonic() - 10,
+        }
+
+        with self.assertRaises(KeyboardInterrupt):
+            next(parallel_render_manager._worker_messages(selector, [worker], 5.0))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,176 @@
+"""
+ZnVis: A Zincwarecode package.
+
+License
+-------
+This program and the accompanying materials are made available under the terms
+of the Eclipse Public License v2.0 which accompanies this distribution, and is
+available at https://www.eclipse.org/legal/epl-v20.html
+SPDX-License-Identifier: EPL-2.0
+Copyright Contributors to the Zincwarecode Project.
+Contact Information
+-------------------
+email: zincwarecode@gmail.com
+github: https://github.com/zincware
+web: https://zincwarecode.com/
+
+Citation
+--------
+If you use this module please cite us with:
+
+Summary
+-------
+Unit tests for the warm render server.
+"""
+
+import os
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+
+from znvis.parallel_render.protocol import MessageType
+from znvis.parallel_render.render_server import RenderServer
+
+_MODULE = "znvis.parallel_render.render_server"
+
+
+class _DummyProgress:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def add_task(self, *_args, **_kwargs):
+        return "task"
+
+    def update(self, *_args, **_kwargs):
+        return None
+
+
+def _fake_start_workers(server):
+    server._workers = [{"process": MagicMock()}, {"process": MagicMock()}]
+    server._selector = MagicMock()
+
+
+class TestRenderServer(unittest.TestCase):
+    def setUp(self):
+        start_patch = patch.object(
+            RenderServer,
+            "_start_workers",
+            autospec=True,
+            side_effect=_fake_start_workers,
+        )
+        self.start_workers_mock = start_patch.start()
+        self.addCleanup(start_patch.stop)
+        self.server = RenderServer(workers=2, device="cpu")
+
+    def test_jobs_are_rendered_in_submission_order(self):
+        order = []
+        servers = []
+        visualizers = []
+        for index in range(3):
+            visualizer = MagicMock(render_server=None)
+            visualizer.render_visualization.side_effect = (
+                lambda index=index, visualizer=visualizer, **_kwargs: (
+                    order.append(index),
+                    servers.append(visualizer.render_server),
+                )
+            )
+            visualizers.append(visualizer)
+
+        with self.server as server:
+            futures = [
+                server.submit(visualizer, frame_range=(0, 2))
+                for visualizer in visualizers
+            ]
+            for future in futures:
+                future.result(timeout=10)
+
+        self.assertEqual(order, [0, 1, 2])
+        # Visualizers only use the server while their job runs.
+        self.assertEqual(servers, [self.server] * 3)
+        self.assertTrue(all(v.render_server is None for v in visualizers))
+        visualizers[0].render_visualization.assert_called_once_with(
+            frame_indices=None, frame_range=(0, 2), skip_existing_frames=True
+        )
+        self.assertEqual(self.start_workers_mock.call_count, 1)
+        self.assertFalse(self.server.running)
+
+    def test_failed_job_sets_future_exception(self):
+        visualizer = MagicMock()
+        visualizer.render_visualization.side_effect = RuntimeError("boom")
+
+        with self.server as server:
+            future = server.submit(visualizer)
+            with self.assertRaisesRegex(RuntimeError, "boom"):
+                future.result(timeout=10)
+
+    def test_shutdown_cancels_pending_jobs(self):
+        release = threading.Event()
+        blocking = MagicMock()
+        blocking.render_visualization.side_effect = lambda **_kwargs: release.wait(10)
+
+        self.server.start()
+        running = self.server.submit(blocking)
+        pending = self.server.submit(MagicMock())
+        threading.Timer(0.2, release.set).start()
+        self.server.shutdown(cancel_pending=True)
+
+        self.assertTrue(running.done())
+        self.assertTrue(pending.cancelled())
+
+    def test_submit_requires_running_server(self):
+        with self.assertRaisesRegex(RuntimeError, "not running"):
+            self.server.submit(MagicMock())
+
+    @patch(f"{_MODULE}._dispatch_frames")
+    @patch(f"{_MODULE}._wait_until_ready")
+    @patch(f"{_MODULE}._send_state")
+    def test_render_frames_loads_job_state_into_warm_workers(
+        self, send_state_mock, wait_mock, dispatch_mock
+    ):
+        config = {"number_of_steps": 3, "worker_state": {"particles": []}}
+
+        with self.server as server:
+            server.render_frames(config, _DummyProgress)
+            first_state = send_state_mock.call_args.args[1]
+            self.assertTrue(os.path.exists(first_state))
+
+            server.render_frames(config, _DummyProgress, frame_indices=[2])
+            second_state = send_state_mock.call_args.args[1]
+
+            # The state of the previous job is removed once workers switched.
+            self.assertFalse(os.path.exists(first_state))
+            self.assertTrue(os.path.exists(second_state))
+
+        self.assertFalse(os.path.exists(second_state))
+        self.assertEqual(send_state_mock.call_count, 4)
+        self.assertEqual(wait_mock.call_args.kwargs["status"], MessageType.LOADED)
+        self.assertEqual(dispatch_mock.call_args_list[0].args[2], [0, 1, 2])
+        self.assertEqual(dispatch_mock.call_args_list[1].args[2], [2])
+        self.assertEqual(self.start_workers_mock.call_count, 1)
+
+    @patch(f"{_MODULE}._force_stop_processes")
+    @patch(f"{_MODULE}._dispatch_frames")
+    @patch(f"{_MODULE}._wait_until_ready")
+    @patch(f"{_MODULE}._send_state")
+    def test_failed_render_restarts_workers_for_next_job(
+        self, _send_state_mock, _wait_mock, dispatch_mock, force_stop_mock
+    ):
+        config = {"number_of_steps": 2, "worker_state": {}}
+        dispatch_mock.side_effect = [RuntimeError("worker died"), None]
+
+        with self.server as server:
+            with self.assertRaisesRegex(RuntimeError, "worker died"):
+                server.render_frames(config, _DummyProgress)
+            force_stop_mock.assert_called_once()
+            self.assertEqual(server._workers, [])
+
+            server.render_frames(config, _DummyProgress)
+
+        self.assertEqual(self.start_workers_mock.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
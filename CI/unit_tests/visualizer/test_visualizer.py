@@ -276,6 +276,42 @@ class TestVisualizer(unittest.TestCase):
 
         self.assertEqual(item.loaded_frames, [3])
 
+    def test_dynamic_geometry_is_updated_in_place(self):
+        """
+        Test that playback updates registered geometry while topology is fixed.
+        """
+        position = [np.random.uniform(-5, 5, (n, 3)) for n in (4, 4, 2)]
+        particle = Particle(name="in_place_particle", position=position, mesh=Sphere())
+        visualizer = Visualizer([particle])
+        window = mock.Mock()
+        particle.construct_mesh_list()
+
+        visualizer._draw_particles(visualizer=window, initial=True)
+        visualizer.counter = 1
+        with mock.patch.object(
+            type(particle.mesh_list), "__getitem__", side_effect=AssertionError
+        ):
+            # The stored buffers are used without materializing the frame.
+            visualizer._draw_particles(visualizer=window)
+
+        window.add_geometry.assert_called_once()
+        window.remove_geometry.assert_not_called()
+        name, points, _ = window.update_geometry.call_args.args
+        self.assertEqual(name, "in_place_particle")
+        np.testing.assert_allclose(
+            points.point.positions.numpy(),
+            np.asarray(particle.mesh_list[1].vertices),
+            atol=1e-5,
+        )
+
+        # A different number of particles needs the geometry to be replaced.
+        visualizer.counter = 2
+        visualizer._draw_particles(visualizer=window)
+
+        window.remove_geometry.assert_called_once_with("in_place_particle")
+        self.assertEqual(window.add_geometry.call_count, 2)
+        self.assertEqual(window.update_geometry.call_count, 1)
+
     def test_initialize_app(self):
         """
         test instantiation of the app.
@@ -36,6 +36,7 @@ from znvis.mesh.octahedron import Octahedron
 from znvis.mesh.sphere import Sphere
 from znvis.mesh.tetrahedron import Tetrahedron
 from znvis.mesh.torus import Torus
+from znvis.parallel_render.render_server import RenderServer
 from znvis.particle.particle import Particle
 from znvis.particle.vector_field import VectorField
 from znvis.visualizer.headless_visualizer import HeadlessVisualizer
@@ -55,6 +56,7 @@ __all__ = [
     VectorField.__name__,
     Visualizer.__name__,
     HeadlessVisualizer.__name__,
+    RenderServer.__name__,
     Cylinder.__name__,
     CustomMesh.__name__,
     BoundingBox.__name__,
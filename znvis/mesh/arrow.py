@@ -27,14 +27,18 @@ import numpy as np
 import open3d as o3d
 
 from znvis.mesh import Mesh
-from znvis.transformations.rotation_matrices import rotation_matrix
+from znvis.mesh.instancing import instance_template, to_triangle_mesh
+from znvis.transformations.rotation_matrices import rotation_matrices
 
 
 @dataclass
 class Arrow(Mesh):
     """
     A class to produce arrow meshes. Arrow meshes are a special case and need to
-    overwrite the instantiate_mesh of the parent mesh class.
+    overwrite the instantiate_meshes of the parent mesh class.
+
+    All arrows are built from one template of unit length which is scaled by
+    the length of each direction vector.
 
     Attributes
     ----------
@@ -47,28 +51,64 @@ class Arrow(Mesh):
     scale: float = 1.0
     resolution: int = 10
 
-    def instantiate_mesh(
-        self, starting_position: np.ndarray, starting_orientation: np.ndarray = None
+    def instantiate_meshes(
+        self,
+        positions: np.ndarray,
+        orientations: np.ndarray = None,
+        smoothing: bool = False,
     ) -> o3d.geometry.TriangleMesh:
         """
-        Create and correctly orient an arrow mesh. Overwrites the parent class
+        Create a single mesh holding one arrow per position. Overwrites the
+        parent class.
+
+        Parameters
+        ----------
+        positions : np.ndarray shape=(n_instances, 3)
+                Starting point of every arrow.
+        orientations : np.ndarray shape=(n_instances, 3) (default = None)
+                Direction of every arrow. The length of the arrow is
+                proportional to the length of the direction. If None, arrows
+                of unit length point along the z axis.
+        smoothing : bool (default = False)
+                If true, instantiate the smoothed template.
+
+        Returns
+        -------
+        mesh : o3d.geometry.TriangleMesh
+                One mesh containing all arrows.
         """
-        mesh = self.create_mesh(starting_orientation)
-        mesh.compute_vertex_normals()
-        if starting_orientation is not None:
-            matrix = rotation_matrix(np.array([0, 0, 1]), starting_orientation)
-            mesh.rotate(matrix, center=(0, 0, 0))
+        template = self.get_template(smoothing=smoothing)
 
-        # Translate the arrow to the starting position and center the origin
-        mesh.translate(starting_position.astype(float))
+        rotations = None
+        scales = None
+        if orientations is not None:
+            orientations = np.reshape(orientations, (-1, 3)).astype(float)
+            rotations = rotation_matrices(np.array([0, 0, 1]), orientations)
+            scales = np.linalg.norm(orientations, axis=1)
 
-        return mesh
+        # The arrow template starts at the origin, which is the rotation center.
+        vertices, normals, triangles = instance_template(
+            template.vertices,
+            template.normals,
+            template.triangles,
+            positions,
+            rotations=rotations,
+            scales=scales,
+        )
+
+        return to_triangle_mesh(vertices, triangles, normals)
 
-    def create_mesh(self, direction: np.ndarray) -> o3d.geometry.TriangleMesh:
+    def create_mesh(self, direction: np.ndarray = None) -> o3d.geometry.TriangleMesh:
         """
         Creates an arrow mesh object.
+
+        Parameters
+        ----------
+        direction : np.ndarray shape=(3,) (default = None)
+                Direction defining the length of the arrow. If None, an arrow
+                of unit length is created.
         """
-        direction_length = np.linalg.norm(direction)
+        direction_length = 1.0 if direction is None else np.linalg.norm(direction)
 
         cylinder_radius = 0.06 * direction_length * self.scale
         cylinder_height = 0.85 * direction_length * self.scale
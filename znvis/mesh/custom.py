@@ -24,42 +24,72 @@ Summary
 Create a custom mesh
 """
 
+import os
 from dataclasses import dataclass
 
-import numpy as np
 import open3d as o3d
 
 from znvis.mesh import Mesh
-from znvis.transformations.rotation_matrices import rotation_matrix
+from znvis.mesh.template_cache import MeshTemplate, template_cache
 
 
 @dataclass
 class CustomMesh(Mesh):
     """
     A class to produce custom meshes. Custom meshes are special and need to override
-    the create_mesh method.
+    the create_template method.
+
+    The parsed, scaled and normal-computed file is cached per file, modification
+    time and scale, so every file is only read once per process. Pickled copies
+    carry the parsed geometry along so worker processes do not read it again.
 
     Attributes
     ----------
     file : str
             Path to mesh file.
+    scale : float
+            Scale applied to the mesh about its center.
     """
 
     file: str = None
     scale: float = 1.0
 
-    def instantiate_mesh(
-        self, starting_position: np.ndarray, starting_orientation: np.ndarray = None
-    ) -> o3d.geometry.TriangleMesh:
+    def create_template(self) -> o3d.geometry.TriangleMesh:
         """
-        Create a mesh object defined by the dataclass.
+        Load the mesh file and scale it about its center.
         """
         mesh = o3d.io.read_triangle_mesh(self.file)
         mesh.compute_vertex_normals()
         mesh.scale(self.scale, center=mesh.get_center())
-        mesh.translate(starting_position.astype(float))
-        if starting_orientation is not None:
-            matrix = rotation_matrix(self.base_direction, starting_orientation)
-            mesh.rotate(matrix)
 
         return mesh
+
+    def _template_key(self) -> tuple:
+        """
+        Key the template on the file, its modification time and the scale.
+        """
+        path = os.path.abspath(self.file)
+        return (type(self).__qualname__, path, os.stat(path).st_mtime_ns, self.scale)
+
+    def __getstate__(self):
+        """
+        Attach the parsed geometry so unpickled copies skip reading the file.
+        """
+        state = super().__getstate__()
+        if self.file is not None and os.path.isfile(self.file):
+            state["_template_state"] = (
+                self._template_key(),
+                self.get_template().to_bytes(),
+            )
+        return state
+
+    def __setstate__(self, state):
+        """
+        Seed the process template cache with the shipped geometry.
+        """
+        template_state = state.pop("_template_state", None)
+        super().__setstate__(state)
+        if template_state is not None:
+            key, blob = template_state
+            if key not in template_cache:
+                template_cache.put(key, MeshTemplate.from_bytes(blob))
@@ -0,0 +1,252 @@
+"""
+ZnVis: A Zincwarecode package.
+License
+-------
+This program and the accompanying materials are made available under the terms
+of the Eclipse Public License v2.0 which accompanies this distribution, and is
+available at https://www.eclipse.org/legal/epl-v20.html
+SPDX-License-Identifier: EPL-2.0
+Copyright Contributors to the Zincwarecode Project.
+Contact Information
+-------------------
+email: zincwarecode@gmail.com
+github: https://github.com/zincware
+web: https://zincwarecode.com/
+Citation
+--------
+If you use this module please cite us with:
+Summary
+-------
+Compact storage of per-frame mesh arrays with shared topology.
+"""
+
+import typing
+from collections import OrderedDict
+from collections.abc import Sequence
+from dataclasses import dataclass
+
+import numpy as np
+import open3d as o3d
+
+from znvis.mesh.instancing import to_triangle_mesh
+
+
+def _share(array: np.ndarray | None, previous: np.ndarray | None):
+    """
+    Return ``previous`` if it holds the same values as ``array``.
+    """
+    if (
+        array is not None
+        and previous is not None
+        and array.shape == previous.shape
+        and np.array_equal(array, previous)
+    ):
+        return previous
+    return array
+
+
+@dataclass(frozen=True)
+class CompactFrame:
+    """
+    Arrays of one frame mesh in compact precision.
+
+    Attributes
+    ----------
+    vertices : np.ndarray shape=(n_vertices, 3) dtype=float32
+            Vertices of the frame.
+    normals : np.ndarray shape=(n_vertices, 3) dtype=float32
+            Vertex normals of the frame.
+    triangles : np.ndarray shape=(n_triangles, 3) dtype=int32
+            Triangle indices of the frame, usually shared with other frames.
+    colours : np.ndarray shape=(n_vertices, 3) dtype=float32
+            Vertex colours of the frame or None if the mesh is not painted.
+    """
+
+    vertices: np.ndarray
+    normals: np.ndarray
+    triangles: np.ndarray
+    colours: np.ndarray | None = None
+
+    @classmethod
+    def from_triangle_mesh(
+        cls,
+        mesh: o3d.geometry.TriangleMesh,
+        previous: typing.Optional["CompactFrame"] = None,
+    ) -> "CompactFrame":
+        """
+        Copy an Open3D mesh into a compact frame.
+
+        Parameters
+        ----------
+        mesh : o3d.geometry.TriangleMesh
+                Mesh to copy.
+        previous : CompactFrame (default = None)
+                Frame whose triangle and colour arrays are reused when equal.
+        """
+        return cls.from_arrays(
+            np.asarray(mesh.vertices),
+            np.asarray(mesh.vertex_normals),
+            np.asarray(mesh.triangles),
+            np.asarray(mesh.vertex_colors) if mesh.has_vertex_colors() else None,
+            previous=previous,
+        )
+
+    @classmethod
+    def from_arrays(
+        cls,
+        vertices: np.ndarray,
+        normals: np.ndarray,
+        triangles: np.ndarray,
+        colours: np.ndarray | None = None,
+        previous: typing.Optional["CompactFrame"] = None,
+    ) -> "CompactFrame":
+        """
+        Build a compact frame from mesh arrays.
+
+        Parameters
+        ----------
+        vertices : np.ndarray shape=(n_vertices, 3)
+                Vertices of the frame.
+        normals : np.ndarray shape=(n_vertices, 3)
+                Vertex normals of the frame.
+        triangles : np.ndarray shape=(n_triangles, 3)
+                Triangle indices of the frame.
+        colours : np.ndarray shape=(n_vertices, 3) (default = None)
+                Vertex colours of the frame.
+        previous : CompactFrame (default = None)
+                Frame whose triangle and colour arrays are reused when equal.
+        """
+        triangles = np.asarray(triangles, dtype=np.int32)
+        if colours is not None:
+            colours = np.asarray(colours, dtype=np.float32)
+        if previous is not None:
+            triangles = _share(triangles, previous.triangles)
+            colours = _share(colours, previous.colours)
+
+        return cls(
+            vertices=np.asarray(vertices, dtype=np.float32),
+            normals=np.asarray(normals, dtype=np.float32),
+            triangles=triangles,
+            colours=colours,
+        )
+
+    def to_triangle_mesh(self) -> o3d.geometry.TriangleMesh:
+        """
+        Materialize the frame as an Open3D triangle mesh.
+        """
+        mesh = to_triangle_mesh(self.vertices, self.triangles, self.normals)
+        if self.colours is not None:
+            mesh.vertex_colors = o3d.utility.Vector3dVector(
+                self.colours.astype(np.float64)
+            )
+        return mesh
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Return the memory used by the frame arrays including shared ones.
+        """
+        return int(sum(array.nbytes for array in self._arrays()))
+
+    def _arrays(self) -> list[np.ndarray]:
+        """
+        Return all arrays held by the frame.
+        """
+        arrays = [self.vertices, self.normals, self.triangles]
+        if self.colours is not None:
+            arrays.append(self.colours)
+        return arrays
+
+
+class FrameStore(Sequence):
+    """
+    List-like store of frame meshes kept as compact arrays.
+
+    Frames with the same topology share one triangle array and Open3D meshes
+    are only materialized when a frame is accessed. The meshes of the last few
+    accessed frames are kept, so repeated accesses return the same mesh.
+    Modifying it does not change the stored frame. Slices always materialize
+    new meshes.
+    """
+
+    def __init__(
+        self,
+        meshes: typing.Iterable[o3d.geometry.TriangleMesh] = (),
+        cached_frames: int = 2,
+    ):
+        """
+        Constructor for the frame store.
+
+        Parameters
+        ----------
+        meshes : typing.Iterable[o3d.geometry.TriangleMesh]
+                Meshes to store as the first frames.
+        cached_frames : int
+                Number of materialized meshes kept for repeated accesses.
+        """
+        if cached_frames < 0:
+            raise ValueError("cached_frames must not be negative.")
+        self.cached_frames = cached_frames
+        self._frames = []
+        self._meshes = OrderedDict()
+        for mesh in meshes:
+            self.append(mesh)
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [frame.to_triangle_mesh() for frame in self._frames[index]]
+
+        index = range(len(self._frames))[index]
+        mesh = self._meshes.get(index)
+        if mesh is not None:
+            self._meshes.move_to_end(index)
+            return mesh
+
+        mesh = self._frames[index].to_triangle_mesh()
+        if self.cached_frames:
+            self._meshes[index] = mesh
+            if len(self._meshes) > self.cached_frames:
+                self._meshes.popitem(last=False)
+        return mesh
+
+    def append(self, mesh: o3d.geometry.TriangleMesh) -> None:
+        """
+        Store a mesh as the next frame.
+        """
+        previous = self._frames[-1] if self._frames else None
+        self._frames.append(CompactFrame.from_triangle_mesh(mesh, previous=previous))
+
+    def append_frame(self, frame: CompactFrame) -> None:
+        """
+        Store a compact frame as the next frame, sharing equal arrays.
+        """
+        if self._frames:
+            previous = self._frames[-1]
+            if frame is not previous:
+                frame = CompactFrame(
+                    vertices=frame.vertices,
+                    normals=frame.normals,
+                    triangles=_share(frame.triangles, previous.triangles),
+                    colours=_share(frame.colours, previous.colours),
+                )
+        self._frames.append(frame)
+
+    def frame(self, index: int) -> CompactFrame:
+        """
+        Return the compact arrays of a frame without materializing a mesh.
+        """
+        return self._frames[index]
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Return the memory used by all frames, counting shared arrays once.
+        """
+        unique = {}
+        for frame in self._frames:
+            for array in frame._arrays():
+                unique[id(array)] = array.nbytes
+        return int(sum(unique.values()))
@@ -0,0 +1,190 @@
+"""
+ZnVis: A Zincwarecode package.
+License
+-------
+This program and the accompanying materials are made available under the terms
+of the Eclipse Public License v2.0 which accompanies this distribution, and is
+available at https://www.eclipse.org/legal/epl-v20.html
+SPDX-License-Identifier: EPL-2.0
+Copyright Contributors to the Zincwarecode Project.
+Contact Information
+-------------------
+email: zincwarecode@gmail.com
+github: https://github.com/zincware
+web: https://zincwarecode.com/
+Citation
+--------
+If you use this module please cite us with:
+Summary
+-------
+Batched instancing of template meshes.
+"""
+
+import numpy as np
+import open3d as o3d
+
+
+def instance_template(
+    vertices: np.ndarray,
+    normals: np.ndarray,
+    triangles: np.ndarray,
+    positions: np.ndarray,
+    rotations: np.ndarray = None,
+    pivot: np.ndarray = None,
+    scales: np.ndarray = None,
+):
+    """
+    Place copies of a template mesh at many positions in one array operation.
+
+    Each instance is computed as ``R_i (s_i (v - pivot)) + pivot + p_i``, which
+    matches translating a template mesh and then rotating it about its center.
+
+    Parameters
+    ----------
+    vertices : np.ndarray shape=(n_vertices, 3)
+            Vertices of the template mesh.
+    normals : np.ndarray shape=(n_vertices, 3)
+            Vertex normals of the template mesh.
+    triangles : np.ndarray shape=(n_triangles, 3)
+            Triangle indices of the template mesh.
+    positions : np.ndarray shape=(n_instances, 3)
+            Position of every instance.
+    rotations : np.ndarray shape=(n_instances, 3, 3) (default = None)
+            Rotation matrix of every instance. If None, instances are not rotated.
+    pivot : np.ndarray shape=(3,) (default = None)
+            Point of the template the rotation is applied around. Defaults to
+            the origin.
+    scales : np.ndarray shape=(n_instances,) (default = None)
+            Uniform scale factor of every instance. If None, instances are not
+            scaled.
+
+    Returns
+    -------
+    vertices : np.ndarray shape=(n_instances * n_vertices, 3)
+    normals : np.ndarray shape=(n_instances * n_vertices, 3)
+    triangles : np.ndarray shape=(n_instances * n_triangles, 3)
+    """
+    positions = np.asarray(positions, dtype=float).reshape(-1, 3)
+    n_instances = positions.shape[0]
+    n_vertices = vertices.shape[0]
+    pivot = np.zeros(3) if pivot is None else np.asarray(pivot, dtype=float)
+
+    local = np.broadcast_to(vertices - pivot, (n_instances, n_vertices, 3))
+    if scales is not None:
+        local = local * np.asarray(scales, dtype=float)[:, None, None]
+    if rotations is not None:
+        local = np.einsum("nij,nvj->nvi", rotations, local)
+        instance_normals = np.einsum("nij,vj->nvi", rotations, normals)
+    else:
+        instance_normals = np.tile(normals, (n_instances, 1, 1))
+
+    instance_vertices = local + (pivot + positions)[:, None, :]
+
+    offsets = np.arange(n_instances, dtype=triangles.dtype) * n_vertices
+    instance_triangles = triangles[None, :, :] + offsets[:, None, None]
+
+    return (
+        instance_vertices.reshape(-1, 3),
+        instance_normals.reshape(-1, 3),
+        instance_triangles.reshape(-1, 3),
+    )
+
+
+def instance_transforms(
+    positions: np.ndarray,
+    rotations: np.ndarray = None,
+    pivot: np.ndarray = None,
+    scales: np.ndarray = None,
+) -> np.ndarray:
+    """
+    Build the affine transforms placing the instances of ``instance_template``.
+
+    Renderers that instance a shared template use these instead of the
+    combined vertex arrays.
+
+    Parameters
+    ----------
+    positions : np.ndarray shape=(n_instances, 3)
+            Position of every instance.
+    rotations : np.ndarray shape=(n_instances, 3, 3) (default = None)
+            Rotation matrix of every instance. If None, instances are not rotated.
+    pivot : np.ndarray shape=(3,) (default = None)
+            Point of the template the rotation is applied around. Defaults to
+            the origin.
+    scales : np.ndarray shape=(n_instances,) (default = None)
+            Uniform scale factor of every instance. If None, instances are not
+            scaled.
+
+    Returns
+    -------
+    transforms : np.ndarray shape=(n_instances, 4, 4)
+            Homogeneous transform mapping the template onto every instance.
+    """
+    positions = np.asarray(positions, dtype=float).reshape(-1, 3)
+    n_instances = positions.shape[0]
+    pivot = np.zeros(3) if pivot is None else np.asarray(pivot, dtype=float)
+
+    linear = np.tile(np.eye(3), (n_instances, 1, 1))
+    if scales is not None:
+        linear = linear * np.asarray(scales, dtype=float)[:, None, None]
+    if rotations is not None:
+        linear = np.einsum("nij,njk->nik", rotations, linear)
+
+    transforms = np.zeros((n_instances, 4, 4))
+    transforms[:, :3, :3] = linear
+    transforms[:, :3, 3] = pivot + positions - linear @ pivot
+    transforms[:, 3, 3] = 1.0
+    return transforms
+
+
+def to_triangle_mesh(
+    vertices: np.ndarray,
+    triangles: np.ndarray,
+    normals: np.ndarray = None,
+) -> o3d.geometry.TriangleMesh:
+    """
+    Wrap vertex and triangle arrays into an Open3D triangle mesh.
+
+    Parameters
+    ----------
+    vertices : np.ndarray shape=(n_vertices, 3)
+            Vertices of the mesh.
+    triangles : np.ndarray shape=(n_triangles, 3)
+            Triangle indices of the mesh.
+    normals : np.ndarray shape=(n_vertices, 3) (default = None)
+            Vertex normals of the mesh.
+
+    Returns
+    -------
+    mesh : o3d.geometry.TriangleMesh
+    """
+    mesh = o3d.geometry.TriangleMesh(
+        o3d.utility.Vector3dVector(np.asarray(vertices, dtype=np.float64)),
+        o3d.utility.Vector3iVector(np.asarray(triangles, dtype=np.int32)),
+    )
+    if normals is not None:
+        mesh.vertex_normals = o3d.utility.Vector3dVector(
+            np.asarray(normals, dtype=np.float64)
+        )
+    return mesh
+
+
+def paint_instances(mesh: o3d.geometry.TriangleMesh, colours: np.ndarray) -> None:
+    """
+    Give every instance of a combined mesh its own uniform colour.
+
+    The vertex colour buffer is filled in one operation by repeating each
+    instance colour over the vertices of one instance.
+
+    Parameters
+    ----------
+    mesh : o3d.geometry.TriangleMesh
+            Combined mesh of equally sized instances, painted in place.
+    colours : np.ndarray shape=(n_instances, 3)
+            RGB colour of every instance in the range 0, 1.
+    """
+    colours = np.asarray(colours, dtype=np.float64).reshape(-1, 3)
+    n_vertices = len(mesh.vertices) // max(1, len(colours))
+    mesh.vertex_colors = o3d.utility.Vector3dVector(
+        np.repeat(colours, n_vertices, axis=0)
+    )
@@ -20,14 +20,22 @@ Summary
 Module for the mesh parent class.
 """
 
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
 
 import numpy as np
 import open3d as o3d
 import open3d.visualization.rendering as rendering
 
 from znvis.material.material import Material
-from znvis.transformations.rotation_matrices import rotation_matrix
+from znvis.mesh.instancing import (
+    instance_template,
+    instance_transforms,
+    to_triangle_mesh,
+)
+from znvis.mesh.template_cache import MeshTemplate, template_cache
+from znvis.transformations.rotation_matrices import rotation_matrices
+
+SMOOTHING_ITERATIONS = 100
 
 
 @dataclass
@@ -55,7 +63,8 @@ class Mesh:
         Build the Open3D material record from ZnVis material parameters.
         """
         material = rendering.MaterialRecord()
-        self.material.colour = np.array(self.material.colour)
+        # Keep memory-mapped colours of worker states shared.
+        self.material.colour = np.asanyarray(self.material.colour)
         if self.material.colour.ndim != 3:
             material.base_color = np.hstack((self.material.colour, self.material.alpha))
         material.shader = "defaultLitTransparency"
@@ -94,16 +103,176 @@ class Mesh:
         starting_orientation : np.ndarray shape=(3,) (default = None)
                 Starting orientation of the mesh.
 
+        Returns
+        -------
+        mesh : o3d.geometry.TriangleMesh
+        """
+        if starting_orientation is not None:
+            starting_orientation = np.reshape(starting_orientation, (1, 3))
+
+        return self.instantiate_meshes(
+            np.reshape(starting_position, (1, 3)), starting_orientation
+        )
+
+    def instantiate_meshes(
+        self,
+        positions: np.ndarray,
+        orientations: np.ndarray = None,
+        smoothing: bool = False,
+    ) -> o3d.geometry.TriangleMesh:
+        """
+        Create a single mesh holding one instance of the mesh per position.
+
+        The template is tessellated once and all instances are transformed
+        together, which is much faster than instantiating and merging the
+        meshes one by one.
+
+        Parameters
+        ----------
+        positions : np.ndarray shape=(n_instances, 3)
+                Position of every instance.
+        orientations : np.ndarray shape=(n_instances, 3) (default = None)
+                Orientation of every instance.
+        smoothing : bool (default = False)
+                If true, instantiate the smoothed template.
+
+        Returns
+        -------
+        mesh : o3d.geometry.TriangleMesh
+                One mesh containing all instances.
+        """
+        template = self.get_template(smoothing=smoothing)
+
+        rotations = None
+        if orientations is not None:
+            rotations = rotation_matrices(self.base_direction, orientations)
+
+        vertices, normals, triangles = instance_template(
+            template.vertices,
+            template.normals,
+            template.triangles,
+            positions,
+            rotations=rotations,
+            pivot=template.pivot,
+        )
+
+        return to_triangle_mesh(vertices, triangles, normals)
+
+    def instance_transforms(
+        self, positions: np.ndarray, orientations: np.ndarray = None
+    ) -> np.ndarray:
+        """
+        Compute the transforms of the instances ``instantiate_meshes`` creates.
+
+        Applying them to the template gives the same vertices as the combined
+        mesh, smoothed or not, without building it.
+
+        Parameters
+        ----------
+        positions : np.ndarray shape=(n_instances, 3)
+                Position of every instance.
+        orientations : np.ndarray shape=(n_instances, 3) (default = None)
+                Orientation of every instance.
+
+        Returns
+        -------
+        transforms : np.ndarray shape=(n_instances, 4, 4)
+        """
+        rotations = None
+        if orientations is not None:
+            rotations = rotation_matrices(self.base_direction, orientations)
+
+        return instance_transforms(
+            positions, rotations=rotations, pivot=self.get_template().pivot
+        )
+
+    def bounding_radius(self, smoothing: bool = False) -> float:
+        """
+        Return the radius of the smallest sphere about the template pivot
+        that contains the template.
+
+        Instances are rotated about the pivot, so this sphere, moved by the
+        position of an instance, bounds the instance in every orientation.
+
+        Parameters
+        ----------
+        smoothing : bool (default = False)
+                If true, bound the smoothed template.
+
+        Returns
+        -------
+        radius : float
+        """
+        template = self.get_template(smoothing=smoothing)
+        return float(np.linalg.norm(template.vertices - template.pivot, axis=1).max())
+
+    def get_template(self, smoothing: bool = False) -> MeshTemplate:
+        """
+        Return the cached template arrays of this mesh configuration.
+
+        Templates are shared process-wide between all meshes with identical
+        geometry parameters, so every configuration is tessellated only once.
+
+        Parameters
+        ----------
+        smoothing : bool (default = False)
+                If true, return the Taubin smoothed template. Smoothing is
+                linear in the vertex positions, so smoothing the template once
+                gives the same instances as smoothing every instance.
+
+        Returns
+        -------
+        template : MeshTemplate
+        """
+        if smoothing:
+            return template_cache.get(
+                (self._template_key(), "smoothed"), self._create_smoothed_template
+            )
+
+        return template_cache.get(
+            self._template_key(),
+            lambda: MeshTemplate.from_triangle_mesh(self.create_template()),
+        )
+
+    def _create_smoothed_template(self) -> MeshTemplate:
+        """
+        Smooth the template of this mesh configuration.
+
+        The pivot of the unsmoothed template is kept so that instances are
+        rotated about the same point as before smoothing.
+        """
+        template = self.get_template()
+        mesh = to_triangle_mesh(
+            template.vertices.copy(), template.triangles.copy(), template.normals.copy()
+        )
+        mesh = mesh.filter_smooth_taubin(SMOOTHING_ITERATIONS)
+
+        return MeshTemplate.from_triangle_mesh(mesh, pivot=template.pivot)
+
+    def _template_key(self) -> tuple:
+        """
+        Build the template cache key from the geometry defining fields.
+
+        The material and base direction do not change the template and are
+        therefore not part of the key.
+        """
+        parameters = tuple(
+            (item.name, getattr(self, item.name))
+            for item in fields(self)
+            if item.name not in ("material", "base_direction")
+        )
+        return (type(self).__module__, type(self).__qualname__, parameters)
+
+    def create_template(self) -> o3d.geometry.TriangleMesh:
+        """
+        Create the untransformed template mesh including vertex normals.
+
         Returns
         -------
         mesh : o3d.geometry.TriangleMesh
         """
         mesh = self.create_mesh()
         mesh.compute_vertex_normals()
-        mesh.translate(starting_position.astype(float))
-        if starting_orientation is not None:
-            matrix = rotation_matrix(self.base_direction, starting_orientation)
-            mesh.rotate(matrix)
 
         return mesh
 
@@ -0,0 +1,194 @@
+"""
+ZnVis: A Zincwarecode package.
+License
+-------
+This program and the accompanying materials are made available under the terms
+of the Eclipse Public License v2.0 which accompanies this distribution, and is
+available at https://www.eclipse.org/legal/epl-v20.html
+SPDX-License-Identifier: EPL-2.0
+Copyright Contributors to the Zincwarecode Project.
+Contact Information
+-------------------
+email: zincwarecode@gmail.com
+github: https://github.com/zincware
+web: https://zincwarecode.com/
+Citation
+--------
+If you use this module please cite us with:
+Summary
+-------
+Process-wide cache of tessellated template meshes.
+"""
+
+import io
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+import open3d as o3d
+
+
+@dataclass(frozen=True)
+class MeshTemplate:
+    """
+    Read-only arrays of a tessellated template mesh.
+
+    Attributes
+    ----------
+    vertices : np.ndarray shape=(n_vertices, 3)
+            Vertices of the template.
+    normals : np.ndarray shape=(n_vertices, 3)
+            Vertex normals of the template.
+    triangles : np.ndarray shape=(n_triangles, 3)
+            Triangle indices of the template.
+    pivot : np.ndarray shape=(3,)
+            Center of the template, used as the rotation origin.
+    """
+
+    vertices: np.ndarray
+    normals: np.ndarray
+    triangles: np.ndarray
+    pivot: np.ndarray
+
+    @classmethod
+    def from_triangle_mesh(
+        cls, mesh: o3d.geometry.TriangleMesh, pivot: np.ndarray = None
+    ) -> "MeshTemplate":
+        """
+        Copy the arrays of an Open3D mesh into a read-only template.
+
+        Parameters
+        ----------
+        mesh : o3d.geometry.TriangleMesh
+                Mesh to copy.
+        pivot : np.ndarray shape=(3,) (default = None)
+                Rotation origin of the template. Defaults to the vertex mean.
+        """
+        vertices = np.array(mesh.vertices, dtype=np.float64)
+        if pivot is None:
+            pivot = vertices.mean(axis=0)
+        arrays = {
+            "vertices": vertices,
+            "normals": np.array(mesh.vertex_normals, dtype=np.float64),
+            "triangles": np.array(mesh.triangles, dtype=np.int32),
+            "pivot": np.array(pivot, dtype=np.float64),
+        }
+        for array in arrays.values():
+            array.flags.writeable = False
+
+        return cls(**arrays)
+
+    @classmethod
+    def from_bytes(cls, blob: bytes) -> "MeshTemplate":
+        """
+        Restore a template serialized with ``to_bytes``.
+        """
+        with np.load(io.BytesIO(blob)) as data:
+            arrays = {name: data[name] for name in data.files}
+        for array in arrays.values():
+            array.flags.writeable = False
+
+        return cls(**arrays)
+
+    def to_bytes(self) -> bytes:
+        """
+        Serialize the template arrays into a compact binary blob.
+        """
+        buffer = io.BytesIO()
+        np.savez(
+            buffer,
+            vertices=self.vertices,
+            normals=self.normals,
+            triangles=self.triangles,
+            pivot=self.pivot,
+        )
+        return buffer.getvalue()
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Return the memory used by the template arrays.
+        """
+        return int(self.vertices.nbytes + self.normals.nbytes + self.triangles.nbytes)
+
+
+class TemplateCache:
+    """
+    Thread-safe LRU cache of mesh templates bounded by their total size.
+    """
+
+    def __init__(self, max_bytes: int | None = 256 * 1024**2):
+        """
+        Constructor for the template cache.
+
+        Parameters
+        ----------
+        max_bytes : int | None
+                Maximum total bytes of cached templates. If None, the cache is
+                unbounded. The most recently used template is always kept.
+        """
+        self.max_bytes = max_bytes
+        self._templates = OrderedDict()
+        self.current_bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._templates)
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            return key in self._templates
+
+    def get(self, key, factory) -> MeshTemplate:
+        """
+        Return the template stored under ``key``, building it if necessary.
+
+        Parameters
+        ----------
+        key : hashable
+                Key describing the template geometry.
+        factory : callable
+                Function returning a new MeshTemplate when ``key`` is missing.
+        """
+        with self._lock:
+            template = self._templates.get(key)
+            if template is not None:
+                self._templates.move_to_end(key)
+                return template
+
+        template = factory()
+        self.put(key, template)
+
+        return template
+
+    def put(self, key, template: MeshTemplate) -> None:
+        """
+        Store ``template`` under ``key`` and evict old entries over budget.
+        """
+        with self._lock:
+            previous = self._templates.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= previous.nbytes
+            self._templates[key] = template
+            self.current_bytes += template.nbytes
+
+            while (
+                self.max_bytes is not None
+                and len(self._templates) > 1
+                and self.current_bytes > self.max_bytes
+            ):
+                _, evicted = self._templates.popitem(last=False)
+                self.current_bytes -= evicted.nbytes
+
+    def clear(self) -> None:
+        """
+        Remove all cached templates.
+        """
+        with self._lock:
+            self._templates.clear()
+            self.current_bytes = 0
+
+
+template_cache = TemplateCache()
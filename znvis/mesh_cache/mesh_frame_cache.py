@@ -8,8 +8,10 @@ from collections import OrderedDict
 from dataclasses import dataclass, field
 
 import numpy as np
+import open3d as o3d
 
 import znvis
+from znvis.mesh.frame_store import CompactFrame
 
 
 @dataclass(frozen=True)
@@ -51,6 +53,15 @@ def estimate_mesh_nbytes(mesh) -> int:
     return int(total)
 
 
+def _materialize(entry):
+    """
+    Return a mesh for a cache entry stored as compact frame or as mesh.
+    """
+    if isinstance(entry, CompactFrame):
+        return entry.to_triangle_mesh()
+    return entry
+
+
 class MeshFrameCache:
     """
     Class to manage the mesh frame caching in LRU-style.
@@ -70,6 +81,11 @@ class MeshFrameCache:
         self._dynamic_cache = OrderedDict()
         self.static_bytes = 0
         self.dynamic_bytes = 0
+        # Last compact frame of every item by name, whose arrays the next
+        # frame of the item shares.
+        self._last_frames = {}
+        # Arrays shared by compact frames, counted once while referenced.
+        self._shared_arrays = {}
         self._lock = threading.Lock()
 
     @property
@@ -89,12 +105,61 @@ class MeshFrameCache:
             and self.max_bytes is not None
             and self.current_bytes > self.max_bytes
         ):
-            key, (_, nbytes) = self._dynamic_cache.popitem(last=False)
-            self.dynamic_bytes -= nbytes
+            key = next(iter(self._dynamic_cache))
+            self._remove_dynamic_entry(key)
             _, frame_index = key
             evicted_frames.add(frame_index)
         return evicted_frames
 
+    @staticmethod
+    def _shared_parts(entry) -> list[np.ndarray]:
+        """
+        Return the arrays a compact frame may share with other frames.
+        """
+        if not isinstance(entry, CompactFrame):
+            return []
+        return [
+            array for array in (entry.triangles, entry.colours) if array is not None
+        ]
+
+    def _new_shared_nbytes(self, entry) -> int:
+        """
+        Return the bytes of the shared arrays of an entry not yet counted.
+        """
+        return sum(
+            array.nbytes
+            for array in self._shared_parts(entry)
+            if id(array) not in self._shared_arrays
+        )
+
+    def _add_dynamic_entry(self, key, entry, nbytes: int) -> None:
+        """
+        Store a dynamic entry and count the shared arrays it references.
+        """
+        self._dynamic_cache[key] = (entry, nbytes)
+        self._dynamic_cache.move_to_end(key)
+        self.dynamic_bytes += nbytes
+        for array in self._shared_parts(entry):
+            shared = self._shared_arrays.get(id(array))
+            if shared is None:
+                # The array is kept, so its id is not reused while counted.
+                shared = self._shared_arrays[id(array)] = [array, 0]
+                self.dynamic_bytes += array.nbytes
+            shared[1] += 1
+
+    def _remove_dynamic_entry(self, key) -> None:
+        """
+        Drop a dynamic entry and release the shared arrays it references.
+        """
+        entry, nbytes = self._dynamic_cache.pop(key)
+        self.dynamic_bytes -= nbytes
+        for array in self._shared_parts(entry):
+            shared = self._shared_arrays[id(array)]
+            shared[1] -= 1
+            if shared[1] == 0:
+                del self._shared_arrays[id(array)]
+                self.dynamic_bytes -= array.nbytes
+
     def get(self, item: znvis.Particle | znvis.VectorField, frame_index: int):
         """
         Return the mesh for ``item`` at ``frame_index``.
@@ -113,7 +178,9 @@ class MeshFrameCache:
         If the mesh is already cached, it is returned and marked as recently used.
         Otherwise, the mesh is built with ``item.get_mesh_for_frame()``, stored in
         the cache, and then returned. Old cache entries are evicted when the cache
-        exceeds ``max_bytes`` unless ``allow_eviction`` is false.
+        exceeds ``max_bytes`` unless ``allow_eviction`` is false. Dynamic Open3D
+        meshes are stored as compact frames sharing the triangles of the item and
+        are materialized again on access.
 
         Parameters
         ----
@@ -133,14 +200,21 @@ class MeshFrameCache:
             if not is_static and key in self._dynamic_cache:
                 self._dynamic_cache.move_to_end(key)
                 return MeshCacheResult(
-                    mesh=self._dynamic_cache[key][0],
+                    mesh=_materialize(self._dynamic_cache[key][0]),
                     created=False,
                 )
 
+            previous_frame = self._last_frames.get(item.name)
+
         start = time.perf_counter()
         mesh = item.get_mesh_for_frame(frame_index)
         build_seconds = time.perf_counter() - start
-        nbytes = estimate_mesh_nbytes(mesh)
+        compact = not is_static and isinstance(mesh, o3d.geometry.TriangleMesh)
+        if compact:
+            entry = CompactFrame.from_triangle_mesh(mesh, previous=previous_frame)
+            nbytes = int(entry.vertices.nbytes + entry.normals.nbytes)
+        else:
+            entry, nbytes = mesh, estimate_mesh_nbytes(mesh)
         evicted_frames = set()
 
         with self._lock:
@@ -151,11 +225,17 @@ class MeshFrameCache:
                 self._static_cache[key] = (mesh, nbytes)
                 self.static_bytes += nbytes
             else:
+                if compact:
+                    self._last_frames[item.name] = entry
                 previous = self._dynamic_cache.get(key)
                 previous_nbytes = previous[1] if previous is not None else 0
                 would_exceed = (
                     self.max_bytes is not None
-                    and self.current_bytes - previous_nbytes + nbytes > self.max_bytes
+                    and self.current_bytes
+                    - previous_nbytes
+                    + nbytes
+                    + self._new_shared_nbytes(entry)
+                    > self.max_bytes
                 )
                 if would_exceed and not allow_eviction:
                     return MeshCacheResult(
@@ -165,10 +245,8 @@ class MeshFrameCache:
                         stored=False,
                     )
                 if previous is not None:
-                    self.dynamic_bytes -= previous[1]
-                self._dynamic_cache[key] = (mesh, nbytes)
-                self._dynamic_cache.move_to_end(key)
-                self.dynamic_bytes += nbytes
+                    self._remove_dynamic_entry(key)
+                self._add_dynamic_entry(key, entry, nbytes)
                 evicted_frames = self._evict_dynamic_entries()
 
         return MeshCacheResult(
@@ -188,8 +266,7 @@ class MeshFrameCache:
                 _, key_frame_index = key
                 if key_frame_index != frame_index:
                     continue
-                _, nbytes = self._dynamic_cache.pop(key)
-                self.dynamic_bytes -= nbytes
+                self._remove_dynamic_entry(key)
                 evicted_frames.add(frame_index)
         return evicted_frames
 
@@ -203,8 +280,7 @@ class MeshFrameCache:
                 _, frame_index = key
                 if frame_index in retained_frames:
                     continue
-                _, nbytes = self._dynamic_cache.pop(key)
-                self.dynamic_bytes -= nbytes
+                self._remove_dynamic_entry(key)
                 evicted_frames.add(frame_index)
         return evicted_frames
 
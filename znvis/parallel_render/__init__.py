@@ -22,7 +22,9 @@ Package for the ZnVis Cameras.
 """
 
 from znvis.parallel_render.parallel_render_manager import render_frames_parallel
+from znvis.parallel_render.render_server import RenderServer
 
 __all__ = [
     "render_frames_parallel",
+    "RenderServer",
 ]
@@ -0,0 +1,316 @@
+"""
+ZnVis: A Zincwarecode package.
+License
+-------
+This program and the accompanying materials are made available under the terms
+of the Eclipse Public License v2.0 which accompanies this distribution, and is
+available at https://www.eclipse.org/legal/epl-v20.html
+SPDX-License-Identifier: EPL-2.0
+Copyright Contributors to the Zincwarecode Project.
+Contact Information
+-------------------
+email: zincwarecode@gmail.com
+github: https://github.com/zincware
+web: https://zincwarecode.com/
+Citation
+--------
+If you use this module please cite us with:
+
+Summary
+-------
+Lease-based frame queue shared by independent render processes.
+
+Batches of frames are claimed by hard-linking a lease file into place, which
+fails atomically if the lease exists, on local filesystems as well as NFS and
+Lustre. Owners renew their lease
+by touching it. Leases that were not renewed within the timeout are stolen by
+renaming them away, which only one process can do. Lease ages are measured
+against the clock of the file server, so node clocks do not need to agree.
+"""
+
+import json
+import logging
+import os
+import pathlib
+import socket
+import threading
+import uuid
+from dataclasses import dataclass
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class FrameBatch:
+    """
+    Batch of frames claimed as one unit.
+
+    Attributes
+    ----------
+    index : int
+            Position of the batch in the queue.
+    frame_indices : tuple[int, ...]
+            Global frame indices of the batch.
+    """
+
+    index: int
+    frame_indices: tuple[int, ...]
+
+
+class FrameLeaseQueue:
+    """
+    Queue of frame batches distributed through lease files in a shared folder.
+
+    All processes working on the same queue must use the same frame selection
+    and batch size, which is checked against the queue manifest.
+
+    Attributes
+    ----------
+    queue_folder : pathlib.Path
+            Folder holding the manifest, lease and done files.
+    batches : list[FrameBatch]
+            All batches of the queue.
+    lease_timeout : float
+            Seconds after the last renewal at which a lease may be stolen.
+    owner : str
+            Unique identifier of this process written into its leases.
+    """
+
+    def __init__(
+        self,
+        queue_folder: str | pathlib.Path,
+        frame_indices: list[int],
+        batch_size: int = 16,
+        lease_timeout: float = 600.0,
+    ):
+        """
+        Constructor for the frame lease queue.
+
+        Parameters
+        ----------
+        queue_folder : str | pathlib.Path
+                Folder on the shared filesystem used by all processes.
+        frame_indices : list[int]
+                Global frame indices to render.
+        batch_size : int
+                Number of frames claimed at once.
+        lease_timeout : float
+                Seconds after the last renewal at which a lease may be stolen.
+                Leases are renewed in the background every quarter of this.
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be greater than or equal to 1.")
+        if lease_timeout <= 0:
+            raise ValueError("lease_timeout must be positive.")
+
+        self.queue_folder = pathlib.Path(queue_folder)
+        self.queue_folder.mkdir(parents=True, exist_ok=True)
+        frame_indices = [int(frame_index) for frame_index in frame_indices]
+        self.batches = [
+            FrameBatch(index=index, frame_indices=tuple(frame_indices[start:stop]))
+            for index, (start, stop) in enumerate(
+                (start, start + batch_size)
+                for start in range(0, len(frame_indices), batch_size)
+            )
+        ]
+        self.lease_timeout = float(lease_timeout)
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex}"
+
+        self._heartbeat = None
+        self._heartbeat_stop = threading.Event()
+        self._check_manifest(frame_indices, batch_size)
+
+    def claim(self) -> FrameBatch | None:
+        """
+        Claim the next batch that is neither done nor held by a live lease.
+
+        The lease is renewed in the background until the batch is completed or
+        released.
+
+        Returns
+        -------
+        batch : FrameBatch | None
+                Claimed batch, or None if no batch is currently available.
+        """
+        for batch in self.batches:
+            if self._done_path(batch).exists():
+                continue
+            if self._create_lease(batch) or self._steal_lease(batch):
+                self._start_heartbeat(batch)
+                return batch
+
+        return None
+
+    def complete(self, batch: FrameBatch) -> None:
+        """
+        Mark a claimed batch as rendered and drop its lease.
+        """
+        self._stop_heartbeat()
+        self._create_file(self._done_path(batch), self.owner)
+        self._remove_own_lease(batch)
+
+    def release(self, batch: FrameBatch) -> None:
+        """
+        Give a claimed batch back so that another process can claim it.
+        """
+        self._stop_heartbeat()
+        self._remove_own_lease(batch)
+
+    def all_done(self) -> bool:
+        """
+        Return whether every batch of the queue has been rendered.
+        """
+        return all(self._done_path(batch).exists() for batch in self.batches)
+
+    def claim_finalization(self) -> bool:
+        """
+        Claim the single post-processing step once all batches are done.
+
+        Returns
+        -------
+        claimed : bool
+                True for exactly one process, the first to call this after the
+                last batch was completed.
+        """
+        if not self.all_done():
+            return False
+        return self._create_file(self.queue_folder / "finalize.lease", self.owner)
+
+    def _check_manifest(self, frame_indices: list[int], batch_size: int) -> None:
+        """
+        Create the queue manifest or verify that it matches this queue.
+        """
+        manifest = json.dumps(
+            {"frame_indices": frame_indices, "batch_size": batch_size}
+        )
+        path = self.queue_folder / "queue.json"
+        if self._create_file(path, manifest):
+            return
+        if json.loads(path.read_text()) != json.loads(manifest):
+            raise ValueError(
+                f"The frame queue in {self.queue_folder} was created with a "
+                "different frame selection or batch size."
+            )
+
+    def _lease_path(self, batch: FrameBatch) -> pathlib.Path:
+        return self.queue_folder / f"batch_{batch.index:0>6}.lease"
+
+    def _done_path(self, batch: FrameBatch) -> pathlib.Path:
+        return self.queue_folder / f"batch_{batch.index:0>6}.done"
+
+    @staticmethod
+    def _create_file(path: pathlib.Path, content: str) -> bool:
+        """
+        Atomically create a file, returning False if it already exists.
+
+        The content is written to a private file first and then hard-linked
+        into place, so other processes never see a partially written file.
+        """
+        temporary_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}")
+        temporary_path.write_text(content)
+        try:
+            os.link(temporary_path, path)
+        except FileExistsError:
+            return False
+        finally:
+            temporary_path.unlink()
+        return True
+
+    @staticmethod
+    def _read_lease(path: pathlib.Path) -> tuple[str, float] | None:
+        """
+        Return the owner and modification time of a lease, None if missing.
+        """
+        try:
+            return path.read_text(), path.stat().st_mtime
+        except FileNotFoundError:
+            return None
+
+    def _server_now(self) -> float:
+        """
+        Return the current time of the filesystem holding the queue.
+        """
+        clock = self.queue_folder / f".clock-{self.owner.replace(':', '-')}"
+        clock.touch()
+        now = clock.stat().st_mtime
+        clock.unlink(missing_ok=True)
+        return now
+
+    def _create_lease(self, batch: FrameBatch) -> bool:
+        return self._create_file(self._lease_path(batch), self.owner)
+
+    def _steal_lease(self, batch: FrameBatch) -> bool:
+        """
+        Take over the lease of a batch if it expired.
+        """
+        path = self._lease_path(batch)
+        lease = self._read_lease(path)
+        if lease is None:
+            return self._create_lease(batch)
+        if self._server_now() - lease[1] < self.lease_timeout:
+            return False
+
+        # Renaming is atomic, so only one process moves the expired lease away.
+        stolen = path.with_name(f"{path.name}.{uuid.uuid4().hex}.stolen")
+        try:
+            os.rename(path, stolen)
+        except FileNotFoundError:
+            return False
+        try:
+            if self._read_lease(stolen) != lease:
+                # The lease was renewed or replaced since it was checked.
+                try:
+                    os.link(stolen, path)
+                except FileExistsError:
+                    pass
+                return False
+        finally:
+            stolen.unlink(missing_ok=True)
+
+        logger.warning(
+            "Stealing expired lease of frame batch %d from %s.", batch.index, lease[0]
+        )
+        return self._create_lease(batch)
+
+    def _remove_own_lease(self, batch: FrameBatch) -> None:
+        path = self._lease_path(batch)
+        lease = self._read_lease(path)
+        if lease is not None and lease[0] == self.owner:
+            path.unlink(missing_ok=True)
+
+    def _start_heartbeat(self, batch: FrameBatch) -> None:
+        """
+        Renew the lease of a claimed batch until it is completed or released.
+        """
+        self._stop_heartbeat()
+        self._heartbeat_stop.clear()
+        self._heartbeat = threading.Thread(
+            target=self._renew_lease,
+            args=(batch,),
+            name=f"znvis-lease-{batch.index}",
+            daemon=True,
+        )
+        self._heartbeat.start()
+
+    def _stop_heartbeat(self) -> None:
+        if self._heartbeat is not None:
+            self._heartbeat_stop.set()
+            self._heartbeat.join()
+            self._heartbeat = None
+
+    def _renew_lease(self, batch: FrameBatch) -> None:
+        path = self._lease_path(batch)
+        while not self._heartbeat_stop.wait(self.lease_timeout / 4):
+            lease = self._read_lease(path)
+            if lease is not None and lease[0] == self.owner:
+                try:
+                    os.utime(path)
+                    continue
+                except FileNotFoundError:
+                    # A stealer moved the lease away after it was read.
+                    pass
+            logger.warning(
+                "Lost the lease of frame batch %d; its frames may be rendered twice.",
+                batch.index,
+            )
+            return
@@ -1,28 +1,53 @@
 """Parallel rendering utilities for the headless visualizer."""
 
-import json
+import functools
 import logging
 import multiprocessing as mp
 import os
 import pickle
 import selectors
+import shutil
 import subprocess
 import sys
 import tempfile
+import time
 import warnings
 from copy import copy
 from dataclasses import dataclass
 
+import numpy as np
+
+from znvis.parallel_render.protocol import (
+    HEARTBEAT_INTERVAL,
+    MessageReader,
+    MessageType,
+    write_message,
+)
+
 logger = logging.getLogger(__name__)
 _PARALLEL_RENDER_STATE = {}
 
+CPU_THREADS_PER_WORKER = 4
+_SHARED_ARRAY_MIN_BYTES = 1024**2
+DEFAULT_QUEUE_DEPTH = 2
+DEFAULT_HEARTBEAT_TIMEOUT = 30.0
+# Renders may legitimately take hours, so workers only need to keep beating.
+DEFAULT_FRAME_TIMEOUT = None
+_CPU_RENDER_VARIANT = "llvm_ad_rgb"
+
 
 @dataclass(frozen=True)
 class _WorkerSpec:
-    """CUDA device assignment for one worker process."""
+    """Device assignment for one worker process.
+
+    CPU workers use ``gpu_id=-1``, hide all CUDA devices and render with the
+    ``variant`` on their own partition of ``cpu_cores``.
+    """
 
     gpu_id: int
     cuda_visible_device: str
+    variant: str | None = None
+    cpu_cores: tuple[int, ...] = ()
 
 
 def _visible_cuda_devices(available_gpu_devices: int) -> list[str]:
@@ -40,10 +65,53 @@ def _visible_cuda_devices(available_gpu_devices: int) -> list[str]:
     return [str(device_id) for device_id in range(visible_gpus)]
 
 
+def _available_cpu_cores() -> list[int]:
+    """Return the CPU cores the parent process is allowed to run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def _cpu_core_partitions(total_workers: int, cores: list[int]) -> list[tuple]:
+    """Split the CPU cores into one contiguous partition per worker."""
+    if total_workers > len(cores):
+        warnings.warn(
+            "Using more CPU render workers than available cores oversubscribes "
+            "the machine. Workers will share cores round-robin.",
+            UserWarning,
+            stacklevel=4,
+        )
+        return [(cores[worker_id % len(cores)],) for worker_id in range(total_workers)]
+
+    partition_size, extra_cores = divmod(len(cores), total_workers)
+    partitions = []
+    start = 0
+    for worker_id in range(total_workers):
+        stop = start + partition_size + (worker_id < extra_cores)
+        partitions.append(tuple(cores[start:stop]))
+        start = stop
+    return partitions
+
+
+def _build_cpu_worker_specs(total_workers: int) -> list[_WorkerSpec]:
+    """Assign CPU workers to disjoint partitions of the available cores."""
+    return [
+        _WorkerSpec(
+            gpu_id=-1,
+            cuda_visible_device="-1",
+            variant=_CPU_RENDER_VARIANT,
+            cpu_cores=cores,
+        )
+        for cores in _cpu_core_partitions(total_workers, _available_cpu_cores())
+    ]
+
+
 def _build_worker_specs(
-    parallel_render_workers: int, available_gpu_devices: int
+    parallel_render_workers: int,
+    available_gpu_devices: int,
+    render_device: str = "cuda",
 ) -> list[_WorkerSpec]:
-    """Assign CUDA workers to visible GPUs.
+    """Assign workers to visible GPUs or to partitions of the CPU cores.
 
     EXPERIMENTAL FEATURE
     -----
@@ -51,6 +119,14 @@ def _build_worker_specs(
     GPUs, workers are assigned round-robin across devices.
     """
     total_workers = int(parallel_render_workers)
+    if render_device == "cpu":
+        return _build_cpu_worker_specs(total_workers)
+    if render_device != "cuda":
+        raise ValueError(
+            f"Unknown parallel render device {render_device!r}, "
+            "expected 'cuda' or 'cpu'."
+        )
+
     devices = _visible_cuda_devices(available_gpu_devices)
     if not devices:
         raise RuntimeError("Parallel rendering requires at least one visible CUDA GPU.")
@@ -84,6 +160,64 @@ def make_spawn_safe_render_items(items):
     return safe_items
 
 
+class _WorkerStatePickler(pickle.Pickler):
+    """Pickler that moves large NumPy arrays into ``.npy`` files.
+
+    Only a reference to the file is pickled, so the worker state stays small
+    and every worker memory-maps the same trajectory data.
+    """
+
+    def __init__(self, file, array_dir: str):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.array_dir = array_dir
+        self.array_names = {}
+        # Keep the arrays alive so their ids stay unique while pickling.
+        self._arrays = []
+
+    def persistent_id(self, obj):
+        if (
+            not isinstance(obj, np.ndarray)
+            or obj.dtype.hasobject
+            or obj.nbytes < _SHARED_ARRAY_MIN_BYTES
+        ):
+            return None
+
+        name = self.array_names.get(id(obj))
+        if name is None:
+            name = f"array_{len(self.array_names):0>4}.npy"
+            np.save(os.path.join(self.array_dir, name), obj)
+            self.array_names[id(obj)] = name
+            self._arrays.append(obj)
+        return ("ndarray", name)
+
+
+class _WorkerStateUnpickler(pickle.Unpickler):
+    """Unpickler that memory-maps arrays stored by ``_WorkerStatePickler``."""
+
+    def __init__(self, file, array_dir: str):
+        super().__init__(file)
+        self.array_dir = array_dir
+
+    def persistent_load(self, pid):
+        kind, name = pid
+        if kind != "ndarray":
+            raise pickle.UnpicklingError(f"Unknown persistent id {pid!r}.")
+        # Copy-on-write keeps pages shared unless a worker modifies them.
+        return np.load(os.path.join(self.array_dir, name), mmap_mode="c")
+
+
+def _dump_worker_state(state: dict, state_path: str) -> None:
+    """Write the worker state with large arrays next to it as ``.npy`` files."""
+    with open(state_path, "wb") as file:
+        _WorkerStatePickler(file, os.path.dirname(state_path)).dump(state)
+
+
+def load_worker_state(state_path: str) -> dict:
+    """Load a worker state written by ``_dump_worker_state``."""
+    with open(state_path, "rb") as file:
+        return _WorkerStateUnpickler(file, os.path.dirname(state_path)).load()
+
+
 def _worker_processes(workers: list[dict]) -> list[subprocess.Popen]:
     """Return process handles from worker dictionaries."""
     return [worker["process"] for worker in workers]
@@ -108,8 +242,8 @@ def _force_stop_processes(processes) -> None:
     _wait_or_kill_processes(processes, timeout=1.0)
 
 
-def _render_frame_parallel_worker(frame_index: int) -> int:
-    """Render one frame inside a worker process."""
+def _parallel_worker_renderer():
+    """Return the renderer of this worker, creating it on first use."""
     state = _PARALLEL_RENDER_STATE
     renderer = state.get("renderer")
     if renderer is None:
@@ -117,62 +251,149 @@ def _render_frame_parallel_worker(frame_index: int) -> int:
 
         renderer = Mitsuba()
         state["renderer"] = renderer
+    return renderer
+
+
+def _build_frame_parallel_worker(frame_index: int) -> tuple[dict, np.ndarray]:
+    """Build the mesh dict and view matrix of one frame inside a worker."""
+    state = _PARALLEL_RENDER_STATE
 
     from znvis.visualizer.base_visualizer import build_mesh_dict_for_frame
 
-    mesh_dict = build_mesh_dict_for_frame(
-        particles=state["particles"],
-        vector_field=state["vector_field"],
-        frame_index=frame_index,
-    )
+    renderer = _parallel_worker_renderer()
     view_matrix = (
         state["camera"].get_view_matrix(frame_index)
         if state["camera"] is not None
         else state["view_matrix"]
     )
+    visible = None
+    if state.get("frustum_culling") and renderer.update_camera:
+        visible = functools.partial(
+            renderer.visible_spheres,
+            view_matrix=view_matrix,
+            resolution=state["renderer_resolution"],
+            margin=state["frustum_culling_margin"],
+        )
+    mesh_dict = build_mesh_dict_for_frame(
+        particles=state["particles"],
+        vector_field=state["vector_field"],
+        frame_index=frame_index,
+        instanced=renderer.renders_instances,
+        analytic=renderer.renders_analytic,
+        static_entries=state["static_entries"],
+        visible=visible,
+    )
+    return mesh_dict, view_matrix
+
 
-    renderer.render_mesh_objects(
+def _render_built_frame_parallel_worker(frame_index: int, built: tuple):
+    """Render a built frame inside a worker and return the image."""
+    state = _PARALLEL_RENDER_STATE
+    mesh_dict, view_matrix = built
+    return _parallel_worker_renderer().render_image(
         mesh_dict,
         view_matrix,
-        save_dir=state["frame_folder"],
-        save_name=f"frame_{frame_index:0>6}.png",
         resolution=state["renderer_resolution"],
         samples_per_pixel=state["renderer_spp"],
     )
+
+
+def _write_frame_parallel_worker(frame_index: int, image) -> None:
+    """Write a rendered frame inside a worker."""
+    from znvis.rendering import Mitsuba
+
+    Mitsuba.write_image(
+        image,
+        save_dir=_PARALLEL_RENDER_STATE["frame_folder"],
+        save_name=f"frame_{frame_index:0>6}.png",
+    )
+
+
+def _render_frame_parallel_worker(frame_index: int) -> int:
+    """Build, render and write one frame inside a worker process."""
+    built = _build_frame_parallel_worker(frame_index)
+    image = _render_built_frame_parallel_worker(frame_index, built)
+    _write_frame_parallel_worker(frame_index, image)
     return frame_index
 
 
 def _initialize_parallel_worker(state: dict):
-    """Initialize per-process rendering state for parallel worker execution."""
+    """Initialize per-process rendering state for parallel worker execution.
+
+    A renderer created for a previous job is kept so that a warm worker does
+    not pay the renderer setup again.
+    """
     global _PARALLEL_RENDER_STATE
+    renderer = _PARALLEL_RENDER_STATE.get("renderer")
     _PARALLEL_RENDER_STATE = dict(state)
-    _PARALLEL_RENDER_STATE["renderer"] = None
+    _PARALLEL_RENDER_STATE["renderer"] = renderer
+    # Static items are built once per job.
+    _PARALLEL_RENDER_STATE["static_entries"] = {}
 
 
-def _start_worker_process(spec: _WorkerSpec, state_path: str):
-    """Start one isolated CUDA worker subprocess pinned to one visible GPU."""
+def _start_worker_process(spec: _WorkerSpec, state_path: str | None):
+    """Start one isolated worker subprocess pinned to its GPU or CPU cores.
+
+    Without a ``state_path`` the worker waits for a ``LOAD`` message before
+    rendering.
+    """
     env = os.environ.copy()
     env["CUDA_VISIBLE_DEVICES"] = spec.cuda_visible_device
+    if spec.variant is not None:
+        env["ZNVIS_MITSUBA_VARIANT"] = spec.variant
+    if spec.cpu_cores:
+        env["ZNVIS_RENDER_CPU_CORES"] = ",".join(map(str, spec.cpu_cores))
+        env["OMP_NUM_THREADS"] = str(len(spec.cpu_cores))
     return subprocess.Popen(
         [
             sys.executable,
             "-m",
-            "znvis.visualizer.parallel.parallel_render_worker",
-            state_path,
+            "znvis.parallel_render.parallel_render_worker",
             str(spec.gpu_id),
+            *([state_path] if state_path is not None else []),
         ],
         stdin=subprocess.PIPE,
         stdout=subprocess.PIPE,
-        text=True,
-        bufsize=1,
+        bufsize=0,
         env=env,
     )
 
 
+def _new_worker(process: subprocess.Popen) -> dict:
+    """Create the scheduler bookkeeping of one started worker process.
+
+    ``pending`` counts the replies the worker owes; a worker with pending
+    replies must keep sending heartbeats. ``last_reply`` is the time of its
+    last reply, or of the first request it owes a reply for.
+    """
+    now = time.monotonic()
+    return {
+        "process": process,
+        "reader": MessageReader(process.stdout.fileno()),
+        "pending": 1,
+        "last_seen": now,
+        "last_reply": now,
+    }
+
+
+def _send_message(
+    worker: dict, message_type: MessageType, payload: dict | None = None
+) -> None:
+    """Send one message to a worker that answers it with one reply."""
+    if worker["pending"] == 0:
+        worker["last_seen"] = worker["last_reply"] = time.monotonic()
+    worker["pending"] += 1
+    write_message(worker["process"].stdin, message_type, payload)
+
+
 def _send_frame(worker: dict, frame_index: int) -> None:
     """Send one global frame index to a worker process."""
-    worker["process"].stdin.write(f"{frame_index}\n")
-    worker["process"].stdin.flush()
+    _send_message(worker, MessageType.FRAME, {"frame": frame_index})
+
+
+def _send_state(worker: dict, state_path: str) -> None:
+    """Ask a running worker process to switch to the state of a new job."""
+    _send_message(worker, MessageType.LOAD, {"state_path": state_path})
 
 
 def _stop_worker(worker: dict) -> None:
@@ -180,70 +401,163 @@ def _stop_worker(worker: dict) -> None:
     process = worker["process"]
     if process.poll() is not None or process.stdin.closed:
         return
-    process.stdin.write("STOP\n")
-    process.stdin.flush()
-
-
-def _parse_worker_payload(line: str, phase: str) -> dict | None:
-    """Parse one worker protocol line, ignoring unrelated stdout noise."""
-    raw_line = line.strip()
-    if not raw_line:
-        return None
+    write_message(process.stdin, MessageType.STOP)
+
+
+def _worker_messages(
+    selector,
+    workers: list[dict],
+    heartbeat_timeout: float,
+    frame_timeout: float | None = None,
+):
+    """Yield ``(worker, type, payload)`` for replies of the workers.
+
+    Heartbeats are consumed here. Raises if a worker reports an error, exits,
+    or owes replies without sending a heartbeat for ``heartbeat_timeout``
+    seconds. Heartbeats only show that the process is alive, so a worker that
+    owes replies without sending one for ``frame_timeout`` seconds counts as
+    stuck, e.g. in a render or a deadlocked pipeline stage.
+    """
+    while True:
+        for key, _mask in selector.select(timeout=HEARTBEAT_INTERVAL):
+            worker = key.data
+            reader = worker["reader"]
+            worker["last_seen"] = time.monotonic()
+            for message_type, payload in reader.read_available():
+                if message_type == MessageType.ERROR:
+                    raise RuntimeError(
+                        "Parallel render worker failed "
+                        f"pid={payload['pid']} "
+                        f"gpu_id={payload['gpu_id']} "
+                        f"frame={payload.get('frame')}:\n{payload['error']}"
+                    )
+                if message_type != MessageType.HEARTBEAT:
+                    worker["pending"] -= 1
+                    worker["last_reply"] = worker["last_seen"]
+                    yield worker, message_type, payload
+            if reader.closed:
+                selector.unregister(key.fileobj)
+                raise RuntimeError(
+                    "A parallel render worker exited unexpectedly "
+                    f"pid={worker['process'].pid}."
+                )
 
-    try:
-        payload = json.loads(raw_line)
-    except json.JSONDecodeError:
-        logger.warning(
-            "Ignoring non-JSON output from parallel render worker during %s: %s",
-            phase,
-            raw_line,
-        )
-        return None
+        now = time.monotonic()
+        for worker in workers:
+            if worker["pending"] and now - worker["last_seen"] > heartbeat_timeout:
+                raise RuntimeError(
+                    "A parallel render worker stopped responding "
+                    f"pid={worker['process'].pid}: no heartbeat for "
+                    f"{now - worker['last_seen']:.0f} s."
+                )
+            if (
+                frame_timeout is not None
+                and worker["pending"]
+                and now - worker["last_reply"] > frame_timeout
+            ):
+                raise RuntimeError(
+                    "A parallel render worker made no progress "
+                    f"pid={worker['process'].pid}: no frame finished for "
+                    f"{now - worker['last_reply']:.0f} s."
+                )
 
-    if not isinstance(payload, dict) or "status" not in payload:
-        logger.warning(
-            "Ignoring malformed parallel render worker payload during %s: %s",
-            phase,
-            raw_line,
-        )
-        return None
 
-    return payload
+def _wait_until_ready(
+    selector,
+    workers: list[dict],
+    status: MessageType = MessageType.READY,
+    heartbeat_timeout: float = DEFAULT_HEARTBEAT_TIMEOUT,
+    frame_timeout: float | None = DEFAULT_FRAME_TIMEOUT,
+) -> None:
+    """Wait until all workers reply with the given status, ``READY`` by default."""
+    waiting = {id(worker) for worker in workers}
+    if not waiting:
+        return
+    for worker, message_type, payload in _worker_messages(
+        selector, workers, heartbeat_timeout, frame_timeout=frame_timeout
+    ):
+        if message_type != status:
+            raise RuntimeError(
+                f"Unexpected parallel worker startup message {message_type.name}: "
+                f"{payload}"
+            )
+        waiting.discard(id(worker))
+        if not waiting:
+            return
+
+
+def _dispatch_frames(
+    selector,
+    workers: list[dict],
+    frame_indices: list[int],
+    progress_factory,
+    queue_depth: int = DEFAULT_QUEUE_DEPTH,
+    heartbeat_timeout: float = DEFAULT_HEARTBEAT_TIMEOUT,
+    frame_timeout: float | None = DEFAULT_FRAME_TIMEOUT,
+    on_frame_done=None,
+) -> None:
+    """Keep up to ``queue_depth`` frames queued per worker until all finish.
 
+    Workers find their next frame in their pipe as soon as they finish one,
+    instead of idling for a round trip to the scheduler. ``on_frame_done`` is
+    called with every frame index as soon as its image is written.
+    """
+    if queue_depth < 1:
+        raise ValueError("worker_queue_depth must be greater than or equal to 1.")
+    if not frame_indices:
+        return
 
-def _wait_until_ready(selector, workers: list[dict]) -> None:
-    """Wait until all workers emit a ready status."""
-    ready_workers = 0
-    while ready_workers < len(workers):
-        events = selector.select(timeout=1)
-        if not events:
-            if any(worker["process"].poll() is not None for worker in workers):
-                raise RuntimeError(
-                    "A parallel render worker exited before becoming ready."
-                )
-            continue
+    next_frame_position = 0
+    for _ in range(queue_depth):
+        for worker in workers:
+            if next_frame_position < len(frame_indices):
+                _send_frame(worker, frame_indices[next_frame_position])
+                next_frame_position += 1
 
-        for key, _mask in events:
-            line = key.fileobj.readline()
-            if line == "":
-                raise RuntimeError(
-                    "A parallel render worker closed stdout before becoming ready."
-                )
-            payload = _parse_worker_payload(line, "startup")
-            if payload is None:
-                continue
-            if payload["status"] != "ready":
+    completed_frames = 0
+    with progress_factory() as progress:
+        task = progress.add_task("Saving scenes...", total=len(frame_indices))
+        for worker, message_type, payload in _worker_messages(
+            selector, workers, heartbeat_timeout, frame_timeout=frame_timeout
+        ):
+            if message_type != MessageType.DONE:
                 raise RuntimeError(
-                    f"Unexpected parallel worker startup message: {payload}"
+                    f"Unexpected parallel worker message {message_type.name}: "
+                    f"{payload}"
                 )
-            ready_workers += 1
+            if on_frame_done is not None:
+                on_frame_done(payload["frame"])
+            completed_frames += 1
+            progress.update(task, advance=1)
+            if completed_frames == len(frame_indices):
+                return
+
+            if next_frame_position < len(frame_indices):
+                _send_frame(worker, frame_indices[next_frame_position])
+                next_frame_position += 1
 
 
 def render_frames_parallel(
-    render_config: dict, progress_factory, frame_indices=None
+    render_config: dict, progress_factory, frame_indices=None, on_frame_done=None
 ) -> None:
     """
-    Render selected global frames with isolated CUDA worker subprocesses.
+    Render selected global frames with isolated worker subprocesses.
+
+    Workers either run on one visible CUDA GPU each or, with
+    ``render_config["render_device"] == "cpu"``, on the LLVM variant with a
+    disjoint partition of the CPU cores each.
+
+    Each worker keeps ``render_config["worker_queue_depth"]`` frames queued
+    (default 2) and must send heartbeats while it has work; a worker silent for
+    ``render_config["heartbeat_timeout"]`` seconds (default 30) is treated as
+    hung. A worker that finishes no frame for ``render_config["frame_timeout"]``
+    seconds is treated as stuck; the default ``None`` disables this deadline.
+
+    The worker state and its large arrays are written to a temporary folder in
+    ``render_config["state_dir"]``, the system temporary folder if it is
+    missing or ``None``. Workers memory-map the arrays, so the folder should
+    not be in RAM, as ``/tmp`` often is on compute nodes. It is removed once
+    the workers have stopped, also if they fail to start.
 
     Parameters
     ----------
@@ -255,11 +569,21 @@ def render_frames_parallel(
     frame_indices : sequence[int] | None, optional
         Explicit global frame indices to render. If ``None``, all frames from
         ``range(number_of_steps)`` are scheduled.
+    on_frame_done : callable, optional
+        Called in the main process with the index of every frame once its
+        image is written, in completion order.
     """
     number_of_steps = render_config["number_of_steps"]
     parallel_render_workers = render_config["parallel_render_workers"]
     available_gpu_devices = render_config["available_gpu_devices"]
     base_worker_state = render_config["worker_state"]
+    render_device = render_config.get("render_device", "cuda")
+    queue_depth = render_config.get("worker_queue_depth", DEFAULT_QUEUE_DEPTH)
+    heartbeat_timeout = render_config.get(
+        "heartbeat_timeout", DEFAULT_HEARTBEAT_TIMEOUT
+    )
+    frame_timeout = render_config.get("frame_timeout", DEFAULT_FRAME_TIMEOUT)
+    state_dir = render_config.get("state_dir")
 
     selected_frame_indices = (
         list(range(number_of_steps)) if frame_indices is None else list(frame_indices)
@@ -269,7 +593,7 @@ def render_frames_parallel(
 
     try:
         worker_specs = _build_worker_specs(
-            parallel_render_workers, available_gpu_devices
+            parallel_render_workers, available_gpu_devices, render_device
         )
     except RuntimeError as e:
         raise RuntimeError(f"Parallel rendering requirements failed: {e}")
@@ -289,72 +613,39 @@ def render_frames_parallel(
     workers: list[dict] = []
     selector = selectors.DefaultSelector()
     interrupted = False
+    temp_dir = None
     try:
-        with tempfile.TemporaryDirectory(prefix="znvis-render-state-") as temp_dir:
-            state_path = os.path.join(temp_dir, "state.pkl")
-            with open(state_path, "wb") as file:
-                pickle.dump(base_worker_state, file)
-
-            for spec in worker_specs:
-                process = _start_worker_process(spec, state_path)
-                worker = {"process": process}
-                workers.append(worker)
-                selector.register(process.stdout, selectors.EVENT_READ, worker)
-
-            _wait_until_ready(selector, workers)
-
-            next_frame_position = 0
-            completed_frames = 0
-            for worker in workers:
-                if next_frame_position >= len(selected_frame_indices):
-                    break
-                _send_frame(worker, selected_frame_indices[next_frame_position])
-                next_frame_position += 1
+        if state_dir is not None:
+            os.makedirs(state_dir, exist_ok=True)
+        temp_dir = tempfile.mkdtemp(prefix=".znvis-render-state-", dir=state_dir)
+        state_path = os.path.join(temp_dir, "state.pkl")
+        _dump_worker_state(base_worker_state, state_path)
+
+        for spec in worker_specs:
+            process = _start_worker_process(spec, state_path)
+            worker = _new_worker(process)
+            workers.append(worker)
+            selector.register(process.stdout, selectors.EVENT_READ, worker)
+
+        _wait_until_ready(
+            selector,
+            workers,
+            heartbeat_timeout=heartbeat_timeout,
+            frame_timeout=frame_timeout,
+        )
+        _dispatch_frames(
+            selector,
+            workers,
+            selected_frame_indices,
+            progress_factory,
+            queue_depth=queue_depth,
+            heartbeat_timeout=heartbeat_timeout,
+            frame_timeout=frame_timeout,
+            on_frame_done=on_frame_done,
+        )
 
-            with progress_factory() as progress:
-                task = progress.add_task(
-                    "Saving scenes...", total=len(selected_frame_indices)
-                )
-                while completed_frames < len(selected_frame_indices):
-                    events = selector.select(timeout=1)
-                    if not events:
-                        if all(
-                            worker["process"].poll() is not None for worker in workers
-                        ):
-                            raise RuntimeError(
-                                "All parallel render workers exited before rendering "
-                                "completed."
-                            )
-                        continue
-
-                    for key, _mask in events:
-                        worker = key.data
-                        line = key.fileobj.readline()
-                        if line == "":
-                            selector.unregister(key.fileobj)
-                            continue
-
-                        payload = _parse_worker_payload(line, "rendering")
-                        if payload is None:
-                            continue
-                        if payload["status"] == "error":
-                            raise RuntimeError(
-                                "Parallel render worker failed "
-                                f"pid={payload['pid']} "
-                                f"gpu_id={payload['gpu_id']} "
-                                f"frame={payload['frame']}:\n{payload['error']}"
-                            )
-                        completed_frames += 1
-                        progress.update(task, advance=1)
-
-                        if next_frame_position < len(selected_frame_indices):
-                            _send_frame(
-                                worker, selected_frame_indices[next_frame_position]
-                            )
-                            next_frame_position += 1
-
-            for worker in workers:
-                _stop_worker(worker)
+        for worker in workers:
+            _stop_worker(worker)
     except KeyboardInterrupt:
         interrupted = True
         logger.warning(
@@ -377,3 +668,6 @@ def render_frames_parallel(
                 if process.poll() is None
             ]
             _wait_or_kill_processes(live_processes, timeout=1.0)
+        # Workers may map the arrays until they exit.
+        if temp_dir is not None:
+            shutil.rmtree(temp_dir, ignore_errors=True)
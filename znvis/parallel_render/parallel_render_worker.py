@@ -1,43 +1,68 @@
-"""Subprocess entry point for parallel headless rendering workers."""
+"""Subprocess entry point for parallel headless rendering workers.
+
+Protocol: the worker reads framed messages from stdin, ``FRAME`` to render a
+frame, ``LOAD`` to switch to the state of a new job, or ``STOP``. ``FRAME``
+and ``LOAD`` are answered with one framed reply on stdout. While the worker
+has work it also sends ``HEARTBEAT`` messages so the scheduler can tell a
+busy worker from a dead one. Heartbeats come from their own thread, so the
+scheduler also gives every frame a deadline for workers stuck in a stage.
+
+Queued frames run through a ``FramePipeline``, so the meshes of the next frame
+are built and the previous frame is written while the current one renders.
+"""
 
-import json
 import os
-import pickle
 import sys
+import threading
 import traceback
 
 from znvis.parallel_render.parallel_render_manager import (
+    _build_frame_parallel_worker,
     _initialize_parallel_worker,
-    _render_frame_parallel_worker,
+    _render_built_frame_parallel_worker,
+    _write_frame_parallel_worker,
+    load_worker_state,
 )
+from znvis.parallel_render.protocol import (
+    HEARTBEAT_INTERVAL,
+    MessageType,
+    read_message,
+    write_message,
+)
+from znvis.rendering.frame_pipeline import FramePipeline
 
 _PROTOCOL_STREAM = None
+_PROTOCOL_LOCK = threading.Lock()
 
 
 def _isolate_protocol_stdout() -> None:
-    """Keep worker JSON on the stdout pipe and move noisy stdout to stderr."""
+    """Keep protocol messages on the stdout pipe and move stdout to stderr."""
     global _PROTOCOL_STREAM
     if _PROTOCOL_STREAM is not None:
         return
 
     protocol_fd = os.dup(sys.stdout.fileno())
-    _PROTOCOL_STREAM = os.fdopen(protocol_fd, "w", buffering=1)
+    _PROTOCOL_STREAM = os.fdopen(protocol_fd, "wb", buffering=0)
     os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
     sys.stdout = os.fdopen(sys.stdout.fileno(), "w", buffering=1, closefd=False)
 
 
-def _emit(payload: dict) -> None:
-    """Emit one JSON message line to stdout for the parent scheduler."""
-    stream = _PROTOCOL_STREAM if _PROTOCOL_STREAM is not None else sys.stdout
-    print(json.dumps(payload), file=stream, flush=True)
+def _emit(message_type: MessageType, payload: dict | None = None) -> None:
+    """Emit one framed message to the parent scheduler."""
+    with _PROTOCOL_LOCK:
+        write_message(_PROTOCOL_STREAM, message_type, payload)
+
 
+def _send_heartbeats(is_busy, stop: threading.Event) -> None:
+    """Send heartbeats while the worker has work to do."""
+    while not stop.wait(HEARTBEAT_INTERVAL):
+        if is_busy():
+            _emit(MessageType.HEARTBEAT)
 
-def _worker_payload(
-    status: str, gpu_id: int, cuda_visible_device: str, **extra
-) -> dict:
+
+def _worker_payload(gpu_id: int, cuda_visible_device: str, **extra) -> dict:
     """Build a scheduler protocol payload for this worker process."""
     payload = {
-        "status": status,
         "gpu_id": gpu_id,
         "cuda_visible_device": cuda_visible_device,
         "pid": os.getpid(),
@@ -46,58 +71,126 @@ def _worker_payload(
     return payload
 
 
+def _apply_cpu_partition() -> list[int]:
+    """Restrict this worker to the CPU cores assigned by the parent."""
+    cpu_cores = os.getenv("ZNVIS_RENDER_CPU_CORES")
+    if not cpu_cores:
+        return []
+
+    cores = [int(core) for core in cpu_cores.split(",")]
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+
+    # Dr.Jit sizes its pool (also used for Embree builds) from the hardware
+    # concurrency, not the affinity mask.
+    import drjit as dr
+
+    dr.set_thread_count(len(cores))
+    return cores
+
+
 def main() -> int:
-    """Run the worker message loop for one GPU-pinned subprocess."""
+    """Run the worker message loop for one GPU- or CPU-pinned subprocess."""
     _isolate_protocol_stdout()
-
-    state_path, gpu_id_arg = sys.argv[1:3]
-    gpu_id = int(gpu_id_arg)
+    loading = threading.Event()
+    loading.set()
+    stop = threading.Event()
+    pipeline = None
+    threading.Thread(
+        target=_send_heartbeats,
+        args=(
+            lambda: loading.is_set() or (pipeline is not None and pipeline.pending),
+            stop,
+        ),
+        name="heartbeat",
+        daemon=True,
+    ).start()
+    cpu_cores = _apply_cpu_partition()
+
+    gpu_id = int(sys.argv[1])
+    state_path = sys.argv[2] if len(sys.argv) > 2 else None
     cuda_visible_device = os.getenv("CUDA_VISIBLE_DEVICES", "")
 
-    with open(state_path, "rb") as file:
-        state = pickle.load(file)
+    def load_state(path: str) -> None:
+        state = load_worker_state(path)
+        state["gpu_id"] = gpu_id
+        state["cuda_visible_device"] = cuda_visible_device
+        _initialize_parallel_worker(state)
+
+    def report_error(frame: int | None, error: str) -> None:
+        _emit(
+            MessageType.ERROR,
+            _worker_payload(gpu_id, cuda_visible_device, frame=frame, error=error),
+        )
 
-    state["gpu_id"] = gpu_id
-    state["cuda_visible_device"] = cuda_visible_device
-    _initialize_parallel_worker(state)
+    try:
+        if state_path is not None:
+            load_state(state_path)
+        else:
+            # Long-lived server worker: pay the renderer imports before the
+            # first job.
+            import znvis.visualizer.base_visualizer  # noqa: F401
+    except Exception:
+        report_error(None, traceback.format_exc())
+        return 1
 
     if os.getenv("ZNVIS_PARALLEL_DEBUG") == "1":
         print(
             "ZnVis parallel worker "
             f"pid={os.getpid()} gpu_id={gpu_id} "
-            f"CUDA_VISIBLE_DEVICES={cuda_visible_device}",
+            f"CUDA_VISIBLE_DEVICES={cuda_visible_device} "
+            f"cpu_cores={cpu_cores}",
             file=sys.stderr,
             flush=True,
         )
 
-    _emit(_worker_payload("ready", gpu_id, cuda_visible_device))
-
-    for line in sys.stdin:
-        message = line.strip()
-        if message == "STOP":
-            break
-        try:
-            frame_index = int(message)
-            rendered_frame = _render_frame_parallel_worker(frame_index)
-            _emit(
-                _worker_payload(
-                    "ok",
-                    gpu_id,
-                    cuda_visible_device,
-                    frame=rendered_frame,
-                )
-            )
-        except Exception:
-            _emit(
-                _worker_payload(
-                    "error",
-                    gpu_id,
-                    cuda_visible_device,
-                    frame=message,
-                    error=traceback.format_exc(),
-                )
-            )
-            break
+    pipeline = FramePipeline(
+        _build_frame_parallel_worker,
+        _render_built_frame_parallel_worker,
+        _write_frame_parallel_worker,
+        on_written=lambda frame: _emit(
+            MessageType.DONE,
+            _worker_payload(gpu_id, cuda_visible_device, frame=frame),
+        ),
+        on_error=lambda frame, error: report_error(
+            frame,
+            "".join(
+                traceback.format_exception(type(error), error, error.__traceback__)
+            ),
+        ),
+    )
+    _emit(MessageType.READY, _worker_payload(gpu_id, cuda_visible_device))
+    loading.clear()
+
+    try:
+        while pipeline.error is None:
+            message = read_message(sys.stdin.buffer)
+            if message is None or message[0] == MessageType.STOP:
+                break
+            message_type, payload = message
+            if message_type == MessageType.FRAME:
+                pipeline.submit(payload["frame"])
+                continue
+
+            # Frames of the current job must not see the state of the next one.
+            pipeline.join()
+            loading.set()
+            try:
+                if message_type != MessageType.LOAD:
+                    raise ValueError(f"Unexpected message {message_type.name}.")
+                load_state(payload["state_path"])
+                _emit(MessageType.LOADED, _worker_payload(gpu_id, cuda_visible_device))
+            except Exception:
+                report_error(None, traceback.format_exc())
+                break
+            finally:
+                loading.clear()
+        pipeline.close()
+    except Exception:
+        # A failed frame was already reported by the pipeline.
+        pass
+    finally:
+        stop.set()
 
     return 0
 
@@ -0,0 +1,144 @@
+"""
+ZnVis: A Zincwarecode package.
+License
+-------
+This program and the accompanying materials are made available under the terms
+of the Eclipse Public License v2.0 which accompanies this distribution, and is
+available at https://www.eclipse.org/legal/epl-v20.html
+SPDX-License-Identifier: EPL-2.0
+Copyright Contributors to the Zincwarecode Project.
+Contact Information
+-------------------
+email: zincwarecode@gmail.com
+github: https://github.com/zincware
+web: https://zincwarecode.com/
+Citation
+--------
+If you use this module please cite us with:
+
+Summary
+-------
+Framed control protocol between the render scheduler and its workers.
+
+Every message is a fixed binary header holding the message type and the payload
+length, followed by a UTF-8 JSON payload. Frames are self-delimiting, so stray
+output of native libraries cannot be mistaken for protocol messages and the
+scheduler can read whatever bytes are available without blocking.
+"""
+
+import enum
+import json
+import os
+import struct
+
+HEARTBEAT_INTERVAL = 1.0
+_HEADER = struct.Struct("!BI")
+
+
+class MessageType(enum.IntEnum):
+    """
+    Types of protocol messages.
+    """
+
+    # Scheduler to worker.
+    FRAME = 1
+    LOAD = 2
+    STOP = 3
+    # Worker to scheduler.
+    READY = 16
+    LOADED = 17
+    DONE = 18
+    ERROR = 19
+    HEARTBEAT = 20
+
+
+def encode_message(message_type: MessageType, payload: dict | None = None) -> bytes:
+    """
+    Encode one message into its framed binary form.
+    """
+    body = json.dumps(payload or {}).encode()
+    return _HEADER.pack(message_type, len(body)) + body
+
+
+def write_message(
+    stream, message_type: MessageType, payload: dict | None = None
+) -> None:
+    """
+    Write one message to a binary stream and flush it.
+    """
+    data = memoryview(encode_message(message_type, payload))
+    while data:
+        written = stream.write(data)
+        data = data[written if written is not None else len(data) :]
+    stream.flush()
+
+
+def read_message(stream) -> tuple[MessageType, dict] | None:
+    """
+    Read one message from a blocking binary stream.
+
+    Returns
+    -------
+    message : tuple[MessageType, dict] | None
+            Message type and payload, or None at the end of the stream.
+    """
+    header = _read_exactly(stream, _HEADER.size)
+    if header is None:
+        return None
+    message_type, length = _HEADER.unpack(header)
+    body = _read_exactly(stream, length)
+    if body is None:
+        return None
+    return MessageType(message_type), json.loads(body)
+
+
+def _read_exactly(stream, size: int) -> bytes | None:
+    data = b""
+    while len(data) < size:
+        chunk = stream.read(size - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return data
+
+
+class MessageReader:
+    """
+    Incremental decoder for messages arriving on a non-blocking pipe.
+    """
+
+    def __init__(self, fd: int):
+        """
+        Constructor for the message reader.
+
+        Parameters
+        ----------
+        fd : int
+                File descriptor to read from.
+        """
+        self.fd = fd
+        self.closed = False
+        self._buffer = bytearray()
+
+    def read_available(self) -> list[tuple[MessageType, dict]]:
+        """
+        Read the bytes that are available and return all complete messages.
+
+        Sets ``closed`` once the writing end of the pipe was closed.
+        """
+        data = os.read(self.fd, 65536)
+        if not data:
+            self.closed = True
+        self._buffer.extend(data)
+
+        messages = []
+        while len(self._buffer) >= _HEADER.size:
+            message_type, length = _HEADER.unpack_from(self._buffer)
+            end = _HEADER.size + length
+            if len(self._buffer) < end:
+                break
+            body = bytes(self._buffer[_HEADER.size : end])
+            del self._buffer[:end]
+            messages.append((MessageType(message_type), json.loads(body)))
+
+        return messages
@@ -0,0 +1,400 @@
+"""
+ZnVis: A Zincwarecode package.
+License
+-------
+This program and the accompanying materials are made available under the terms
+of the Eclipse Public License v2.0 which accompanies this distribution, and is
+available at https://www.eclipse.org/legal/epl-v20.html
+SPDX-License-Identifier: EPL-2.0
+Copyright Contributors to the Zincwarecode Project.
+Contact Information
+-------------------
+email: zincwarecode@gmail.com
+github: https://github.com/zincware
+web: https://zincwarecode.com/
+Citation
+--------
+If you use this module please cite us with:
+
+Summary
+-------
+Long-lived render server keeping parallel render workers warm between jobs.
+"""
+
+import multiprocessing as mp
+import os
+import queue
+import selectors
+import shutil
+import tempfile
+import threading
+from concurrent.futures import Future
+
+from rich.progress import Progress
+
+from znvis.parallel_render.parallel_render_manager import (
+    DEFAULT_FRAME_TIMEOUT,
+    DEFAULT_HEARTBEAT_TIMEOUT,
+    DEFAULT_QUEUE_DEPTH,
+    _build_worker_specs,
+    _dispatch_frames,
+    _dump_worker_state,
+    _force_stop_processes,
+    _new_worker,
+    _send_state,
+    _start_worker_process,
+    _stop_worker,
+    _wait_or_kill_processes,
+    _wait_until_ready,
+    _worker_processes,
+)
+from znvis.parallel_render.protocol import MessageType
+
+
+class RenderServer:
+    """
+    Pool of warm render workers serving a queue of visualizer jobs.
+
+    The worker subprocesses are started once and keep their imports, renderer
+    and compiled kernels between jobs. Jobs are rendered one after another and
+    each job uses all workers.
+
+    Attributes
+    ----------
+    device : str
+            Device of the workers, ``"cuda"`` or ``"cpu"``.
+    workers : int
+            Number of worker subprocesses.
+    available_gpu_devices : int
+            Number of visible CUDA GPUs.
+    queue_depth : int
+            Number of frames queued per worker.
+    heartbeat_timeout : float
+            Seconds without heartbeat after which a busy worker counts as hung.
+    frame_timeout : float | None
+            Seconds without a finished frame after which a busy worker counts
+            as stuck.
+
+    Examples
+    --------
+    >>> with RenderServer(workers=4) as server:
+    ...     futures = [server.submit(visualizer) for visualizer in visualizers]
+    ...     for future in futures:
+    ...         future.result()
+    """
+
+    def __init__(
+        self,
+        workers: int | None = None,
+        device: str | None = None,
+        queue_depth: int = DEFAULT_QUEUE_DEPTH,
+        heartbeat_timeout: float = DEFAULT_HEARTBEAT_TIMEOUT,
+        frame_timeout: float | None = DEFAULT_FRAME_TIMEOUT,
+    ):
+        """
+        Constructor for the render server.
+
+        Parameters
+        ----------
+        workers : int, optional
+                Number of worker subprocesses. If ``None``, one worker per visible
+                GPU, or one worker per four CPU cores when rendering on the CPU.
+        device : str, optional
+                ``"cuda"`` or ``"cpu"``. If ``None``, CUDA is used when a GPU is
+                visible and the CPU otherwise.
+        queue_depth : int, optional
+                Number of frames queued per worker, so that workers never wait
+                for the scheduler between frames.
+        heartbeat_timeout : float, optional
+                Seconds without heartbeat after which a busy worker counts as
+                hung and the job fails.
+        frame_timeout : float, optional
+                Seconds without a finished frame after which a busy worker
+                counts as stuck and the job fails, since a worker stuck in a
+                render keeps sending heartbeats. ``None``, the default,
+                disables the deadline.
+        """
+        # Imported here as the visualizers import this package.
+        from znvis.visualizer.base_visualizer import resolve_parallel_render_settings
+
+        (
+            self.device,
+            self.workers,
+            self.available_gpu_devices,
+        ) = resolve_parallel_render_settings(workers, device)
+        if queue_depth < 1:
+            raise ValueError("queue_depth must be greater than or equal to 1.")
+        self.queue_depth = int(queue_depth)
+        self.heartbeat_timeout = float(heartbeat_timeout)
+        self.frame_timeout = None if frame_timeout is None else float(frame_timeout)
+
+        self._workers = []
+        self._selector = None
+        self._job_dir = None
+        self._render_lock = threading.Lock()
+        self._jobs = queue.Queue()
+        self._dispatcher = None
+
+    def __enter__(self) -> "RenderServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.shutdown(cancel_pending=exc_type is not None)
+
+    @property
+    def running(self) -> bool:
+        """
+        Return whether the server accepts jobs.
+        """
+        return self._dispatcher is not None
+
+    def start(self) -> "RenderServer":
+        """
+        Start the workers and the job dispatcher.
+
+        Returns
+        -------
+        server : RenderServer
+                The started server.
+        """
+        if self.running:
+            return self
+        if mp.current_process().name != "MainProcess":
+            raise RuntimeError(
+                "The render server must be started from the main process. "
+                "Ensure your entry script only calls render code under "
+                "if __name__ == '__main__'."
+            )
+
+        with self._render_lock:
+            self._start_workers()
+        self._dispatcher = threading.Thread(
+            target=self._process_jobs, name="znvis-render-server", daemon=True
+        )
+        self._dispatcher.start()
+
+        return self
+
+    def submit(
+        self,
+        visualizer,
+        frame_indices=None,
+        frame_range: tuple[int, int] | None = None,
+        skip_existing_frames: bool = True,
+    ) -> Future:
+        """
+        Queue a visualizer job.
+
+        The job dispatcher attaches the visualizer to this server while it
+        runs its ``render_visualization`` with the given arguments. The
+        previous ``render_server`` of the visualizer is restored afterwards.
+
+        Parameters
+        ----------
+        visualizer : znvis.HeadlessVisualizer
+                Visualizer to render.
+        frame_indices : sequence of int, optional
+                Explicit global frame indices to render.
+        frame_range : tuple[int, int], optional
+                Contiguous half-open global frame range (start, stop).
+        skip_existing_frames : bool, optional
+                If True, existing frames are not rendered again.
+
+        Returns
+        -------
+        future : concurrent.futures.Future
+                Resolved once the frames, and the video if requested, are written.
+        """
+        if not self.running:
+            raise RuntimeError("The render server is not running. Call start() first.")
+
+        future = Future()
+        self._jobs.put(
+            (
+                future,
+                visualizer,
+                {
+                    "frame_indices": frame_indices,
+                    "frame_range": frame_range,
+                    "skip_existing_frames": skip_existing_frames,
+                },
+            )
+        )
+
+        return future
+
+    def render_frames(
+        self,
+        render_config: dict,
+        progress_factory=Progress,
+        frame_indices=None,
+        on_frame_done=None,
+    ) -> None:
+        """
+        Render the frames of one job on the warm workers.
+
+        Blocks until all frames are written. Calls from several threads are
+        rendered one after another.
+
+        Parameters
+        ----------
+        render_config : dict
+                Render configuration as built by the headless visualizer. Only
+                ``number_of_steps``, ``worker_state`` and ``state_dir`` are
+                used, the workers are fixed by the server.
+        progress_factory : callable
+                Context-manager factory returning a progress object.
+        frame_indices : sequence[int] | None, optional
+                Global frame indices to render. If ``None``, all frames.
+        on_frame_done : callable, optional
+                Called with the index of every frame once its image is written.
+        """
+        if not self.running:
+            raise RuntimeError("The render server is not running. Call start() first.")
+
+        selected_frame_indices = (
+            list(range(render_config["number_of_steps"]))
+            if frame_indices is None
+            else list(frame_indices)
+        )
+        if not selected_frame_indices:
+            return
+
+        with self._render_lock:
+            if not self._workers:
+                self._start_workers()
+
+            previous_job_dir = self._job_dir
+            try:
+                state_dir = render_config.get("state_dir")
+                if state_dir is not None:
+                    os.makedirs(state_dir, exist_ok=True)
+                self._job_dir = tempfile.mkdtemp(
+                    prefix=".znvis-render-job-", dir=state_dir
+                )
+                state_path = os.path.join(self._job_dir, "state.pkl")
+                _dump_worker_state(render_config["worker_state"], state_path)
+                for worker in self._workers:
+                    _send_state(worker, state_path)
+                _wait_until_ready(
+                    self._selector,
+                    self._workers,
+                    status=MessageType.LOADED,
+                    heartbeat_timeout=self.heartbeat_timeout,
+                    frame_timeout=self.frame_timeout,
+                )
+                _dispatch_frames(
+                    self._selector,
+                    self._workers,
+                    selected_frame_indices,
+                    progress_factory,
+                    queue_depth=self.queue_depth,
+                    heartbeat_timeout=self.heartbeat_timeout,
+                    frame_timeout=self.frame_timeout,
+                    on_frame_done=on_frame_done,
+                )
+            except BaseException:
+                # Frames may still be in flight; the next job starts a clean pool.
+                self._stop_workers(force=True)
+                raise
+            finally:
+                # Workers have switched to the new state by now.
+                if previous_job_dir is not None:
+                    shutil.rmtree(previous_job_dir, ignore_errors=True)
+
+    def shutdown(self, cancel_pending: bool = False) -> None:
+        """
+        Stop the server after the running job and shut down the workers.
+
+        Parameters
+        ----------
+        cancel_pending : bool, optional
+                If True, queued jobs that have not started are cancelled.
+                Otherwise they are rendered before the server stops.
+        """
+        if not self.running:
+            return
+
+        if cancel_pending:
+            while True:
+                try:
+                    job = self._jobs.get_nowait()
+                except queue.Empty:
+                    break
+                if job is not None:
+                    job[0].cancel()
+
+        self._jobs.put(None)
+        self._dispatcher.join()
+        self._dispatcher = None
+        with self._render_lock:
+            self._stop_workers()
+
+    def _process_jobs(self) -> None:
+        """
+        Run queued visualizer jobs until the shutdown sentinel arrives.
+        """
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                break
+
+            future, visualizer, kwargs = job
+            if not future.set_running_or_notify_cancel():
+                continue
+            previous_server = visualizer.render_server
+            visualizer.render_server = self
+            try:
+                future.set_result(visualizer.render_visualization(**kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+            finally:
+                visualizer.render_server = previous_server
+
+    def _start_workers(self) -> None:
+        """
+        Start the worker subprocesses and wait until they are ready.
+        """
+        worker_specs = _build_worker_specs(
+            self.workers, self.available_gpu_devices, self.device
+        )
+        self._selector = selectors.DefaultSelector()
+        try:
+            for spec in worker_specs:
+                process = _start_worker_process(spec, None)
+                worker = _new_worker(process)
+                self._workers.append(worker)
+                self._selector.register(process.stdout, selectors.EVENT_READ, worker)
+            _wait_until_ready(
+                self._selector,
+                self._workers,
+                heartbeat_timeout=self.heartbeat_timeout,
+                frame_timeout=self.frame_timeout,
+            )
+        except BaseException:
+            self._stop_workers(force=True)
+            raise
+
+    def _stop_workers(self, force: bool = False) -> None:
+        """
+        Stop the worker subprocesses and remove the state of the last job.
+        """
+        processes = _worker_processes(self._workers)
+        if force:
+            _force_stop_processes(processes)
+        else:
+            for worker in self._workers:
+                try:
+                    _stop_worker(worker)
+                except OSError:
+                    pass
+            _wait_or_kill_processes(processes, timeout=5.0)
+
+        if self._selector is not None:
+            self._selector.close()
+        self._selector = None
+        self._workers = []
+
+        if self._job_dir is not None:
+            shutil.rmtree(self._job_dir, ignore_errors=True)
+        self._job_dir = None
@@ -0,0 +1,114 @@
+"""
+ZnVis: A Zincwarecode package.
+License
+-------
+This program and the accompanying materials are made available under the terms
+of the Eclipse Public License v2.0 which accompanies this distribution, and is
+available at https://www.eclipse.org/legal/epl-v20.html
+SPDX-License-Identifier: EPL-2.0
+Copyright Contributors to the Zincwarecode Project.
+Contact Information
+-------------------
+email: zincwarecode@gmail.com
+github: https://github.com/zincware
+web: https://zincwarecode.com/
+Citation
+--------
+If you use this module please cite us with:
+
+Summary
+-------
+Process-pool construction of trajectory meshes.
+"""
+
+import math
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+from copy import copy
+
+from rich.progress import track
+
+from znvis.mesh.frame_store import CompactFrame, FrameStore
+
+_PARALLEL_BUILD_STATE = {}
+
+
+def _initialize_build_worker(item) -> None:
+    """
+    Store the item to build frames for once per worker process.
+    """
+    _PARALLEL_BUILD_STATE["item"] = item
+
+
+def _build_frame_arrays(frame_indices: list) -> list[CompactFrame]:
+    """
+    Build the frames of one shard and return them as compact arrays.
+
+    Frames of the shard share equal triangle arrays, which pickle sends only
+    once.
+    """
+    item = _PARALLEL_BUILD_STATE["item"]
+    frames = []
+    previous = None
+    for frame_index in frame_indices:
+        mesh = item.get_mesh_for_frame(frame_index)
+        previous = CompactFrame.from_triangle_mesh(mesh, previous=previous)
+        frames.append(previous)
+
+    return frames
+
+
+def _frame_shards(n_frames: int, workers: int) -> list:
+    """
+    Split the frame indices into contiguous shards.
+
+    Several shards per worker keep the pool balanced when frames differ in
+    size.
+    """
+    shard_size = max(1, math.ceil(n_frames / (4 * workers)))
+    return [
+        list(range(start, min(start + shard_size, n_frames)))
+        for start in range(0, n_frames, shard_size)
+    ]
+
+
+def build_mesh_list_parallel(item, n_frames: int, workers: int) -> FrameStore:
+    """
+    Build the meshes of all frames of an item in a pool of processes.
+
+    Frames are sharded across the workers and returned as compact frames
+    instead of pickled Open3D meshes.
+
+    Parameters
+    ----------
+    item : znvis.Particle | znvis.VectorField
+            Item providing ``get_mesh_for_frame``.
+    n_frames : int
+            Number of frames to build.
+    workers : int
+            Number of worker processes.
+
+    Returns
+    -------
+    mesh_list : FrameStore
+            One frame per time step in frame order.
+    """
+    worker_item = copy(item)
+    worker_item.mesh_list = None
+    shards = _frame_shards(n_frames, workers)
+
+    mesh_list = FrameStore()
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(shards)),
+        mp_context=mp.get_context("spawn"),
+        initializer=_initialize_build_worker,
+        initargs=(worker_item,),
+    ) as executor:
+        results = executor.map(_build_frame_arrays, shards)
+        for frames in track(
+            results, total=len(shards), description=f"Building {item.name} Mesh"
+        ):
+            for frame in frames:
+                mesh_list.append_frame(frame)
+
+    return mesh_list
@@ -28,6 +28,9 @@ import numpy as np
 from rich.progress import track
 
 from znvis.mesh import Mesh
+from znvis.mesh.frame_store import FrameStore
+from znvis.mesh.instancing import paint_instances
+from znvis.particle.parallel_build import build_mesh_list_parallel
 
 
 @dataclass
@@ -53,17 +56,16 @@ class Particle:
     director: Union[np.ndarray, list of np.ndarray]
             Director tensor of either (n_confs, n_particles, n_dims) or
             list of (n_particles_t, n_dims) with len n_confs
-    mesh_list : list
-            A list of mesh objects, one for each time step.
+    mesh_list : FrameStore
+            Compact store of the mesh objects, one for each time step.
     static : bool (default=False)
             If true, only render the mesh once at initialization. Be careful
             as this changes the shape of the required position and director
             to (n_particles, n_dims).
 
     smoothing : bool (default=False)
-            If true, apply smoothing to each mesh object as it is rendered.
-            This will slow down the initial construction of the mesh objects
-            but not the deployment.
+            If true, apply smoothing to the mesh objects. The template mesh
+            is smoothed once and shared by all particles and frames.
     """
 
     name: str
@@ -72,51 +74,96 @@ class Particle:
     velocity: typing.Union[np.ndarray, typing.List[np.ndarray]] = None
     force: typing.Union[np.ndarray, typing.List[np.ndarray]] = None
     director: typing.Union[np.ndarray, typing.List[np.ndarray]] = None
-    mesh_list: typing.List[Mesh] = None
+    mesh_list: FrameStore = None
     static: bool = False
     smoothing: bool = False
 
-    def _create_mesh(self, position, director, time_step=None, index=None):
+    def _create_mesh(self, positions, directors, time_step=None, selection=None):
         """
-        Create a mesh object for the particle.
+        Create the combined mesh object for all particles of one frame.
 
         Parameters
         ----------
-        position : np.ndarray
-                Position of the particle
-        director : np.ndarray
-                Director of the particle
+        positions : np.ndarray shape=(n_particles, 3)
+                Positions of the particles
+        directors : np.ndarray shape=(n_particles, 3)
+                Directors of the particles. May be None.
+        time_step : int
+                Time step used to look up per-particle colours.
+        selection : np.ndarray (default=None)
+                Particles of the frame the positions and directors belong to,
+                used to look up their colours. If None, all particles.
 
         Returns
         -------
         mesh : o3d.geometry.TriangleMesh
-                A mesh object
+                A mesh object containing every particle of the frame.
         """
-        if director is not None:
-            mesh = self.mesh.instantiate_mesh(position, starting_orientation=director)
-        else:
-            mesh = self.mesh.instantiate_mesh(position)
-
-        if self.smoothing:
-            mesh = mesh.filter_smooth_taubin(100)
+        mesh = self.mesh.instantiate_meshes(
+            positions, orientations=directors, smoothing=self.smoothing
+        )
 
         if self.mesh.material.colour.ndim == 3:
-            mesh.paint_uniform_color(self.mesh.material.colour[time_step, index, :])
+            self.paint_mesh(mesh, time_step, selection=selection)
 
         return mesh
 
-    def construct_mesh_list(self):
+    @property
+    def has_dynamic_colour(self) -> bool:
+        """
+        Whether the particle colours change between frames.
+        """
+        colour = self.mesh.material.colour
+        return colour.ndim == 3 and colour.shape[0] > 1
+
+    def paint_mesh(self, mesh, time_step: int, selection=None):
+        """
+        Paint a frame mesh with the per-particle colours of a time step.
+
+        This also allows re-colouring cached static geometry whose colours
+        change over time without rebuilding it.
+
+        Parameters
+        ----------
+        mesh : o3d.geometry.TriangleMesh
+                Combined frame mesh of this particle, painted in place.
+        time_step : int
+                Time step of the colour tensor to use.
+        selection : np.ndarray (default=None)
+                Particles the mesh was built from. If None, all particles.
+
+        Returns
+        -------
+        mesh : o3d.geometry.TriangleMesh
+                The painted mesh.
+        """
+        colours = self.mesh.material.colour[time_step]
+        if selection is not None:
+            colours = colours[selection]
+        n_vertices = len(self.mesh.get_template().vertices)
+        paint_instances(mesh, colours[: len(mesh.vertices) // n_vertices])
+
+        return mesh
+
+    def construct_mesh_list(self, workers: int = 1):
         """
         Constructor the mesh list for the class.
 
         The mesh list is a list of mesh objects for each
         time step in the parsed trajectory.
 
+        Parameters
+        ----------
+        workers : int (default=1)
+                Number of processes to build the frames with. Frames are
+                independent, so more workers scale the construction of long
+                trajectories with the available cores.
+
         Returns
         -------
         Updates the class attributes mesh_list
         """
-        self.mesh_list = []
+        self.mesh_list = FrameStore()
 
         # Convert ndarrays into lists
         if isinstance(self.position, np.ndarray):
@@ -190,6 +237,10 @@ class Particle:
                         f"NaN value at time step {i}.",
                     )
         # Create the mesh
+        if workers > 1 and n_time_steps > 1:
+            self.mesh_list = build_mesh_list_parallel(self, n_time_steps, workers)
+            return
+
         for frame_index in track(
             range(n_time_steps), description=f"Building {self.name} Mesh"
         ):
@@ -197,29 +248,27 @@ class Particle:
             frame_dir = (
                 self.director[frame_index] if self.director is not None else None
             )
-            n_particles = frame_pos.shape[0]
-            meshes = []
-            for particle_index in range(n_particles):
-                pos = frame_pos[particle_index]
-                dir = frame_dir[particle_index] if frame_dir is not None else None
-                mesh = self._create_mesh(pos, dir, frame_index, particle_index)
-                meshes.append(mesh)
-
-            # Combine all meshes into one
-            if not meshes:
+            if frame_pos.shape[0] == 0:
                 raise ValueError(f"No particles found at time step {frame_index}.")
-            combined_mesh = meshes[0]
-            for m in meshes[1:]:
-                combined_mesh += m
 
-            self.mesh_list.append(combined_mesh)
+            self.mesh_list.append(self._create_mesh(frame_pos, frame_dir, frame_index))
 
-    def get_mesh_for_frame(self, frame_index: int):
+    def get_frame_data(self, frame_index: int, selection=None) -> tuple:
         """
-        Build and return a combined mesh for a single frame.
+        Return the positions and directors of the particles in one frame.
 
-        This enables lazy rendering in headless mode without storing the full
-        trajectory of meshes in memory.
+        Parameters
+        ----------
+        frame_index : int
+                Frame to look up. Static particles always use their first frame.
+        selection : np.ndarray (default=None)
+                Boolean mask or indices of the particles to return. If None,
+                all particles are returned.
+
+        Returns
+        -------
+        positions : np.ndarray shape=(n_particles, 3)
+        directors : np.ndarray shape=(n_particles, 3) or None
         """
         if self.position is None:
             raise ValueError("Position data must be not None.")
@@ -246,19 +295,78 @@ class Particle:
             if frame_dir is not None:
                 frame_dir = frame_dir[idx]
 
-        n_particles = frame_pos.shape[0]
-        meshes = []
+        if frame_pos.shape[0] == 0:
+            raise ValueError(f"No particles found at time step {frame_index}.")
+
+        if selection is not None:
+            frame_pos = frame_pos[selection]
+            if frame_dir is not None:
+                frame_dir = frame_dir[selection]
+
+        return frame_pos, frame_dir
+
+    def get_mesh_for_frame(self, frame_index: int, selection=None):
+        """
+        Build and return a combined mesh for a single frame.
+
+        This enables lazy rendering in headless mode without storing the full
+        trajectory of meshes in memory.
+
+        Parameters
+        ----------
+        frame_index : int
+                Frame to build.
+        selection : np.ndarray (default=None)
+                Boolean mask or indices of the particles to build, e.g. the
+                particles in view. If None, all particles are built.
+        """
+        frame_pos, frame_dir = self.get_frame_data(frame_index, selection=selection)
         time_index = 0 if self.static else frame_index
-        for particle_index in range(n_particles):
-            pos = frame_pos[particle_index]
-            dir = frame_dir[particle_index] if frame_dir is not None else None
-            meshes.append(self._create_mesh(pos, dir, time_index, particle_index))
+        return self._create_mesh(frame_pos, frame_dir, time_index, selection=selection)
 
-        if not meshes:
-            raise ValueError(f"No particles found at time step {frame_index}.")
+    def get_instance_transforms(self, frame_index: int, selection=None) -> np.ndarray:
+        """
+        Return the transform placing the mesh of every particle in a frame.
 
-        combined_mesh = meshes[0]
-        for m in meshes[1:]:
-            combined_mesh += m
+        Renderers that instance the mesh template use these instead of the
+        combined mesh of ``get_mesh_for_frame``.
 
-        return combined_mesh
+        Parameters
+        ----------
+        frame_index : int
+                Frame to look up.
+        selection : np.ndarray (default=None)
+                Boolean mask or indices of the particles to place. If None,
+                all particles are placed.
+
+        Returns
+        -------
+        transforms : np.ndarray shape=(n_particles, 4, 4)
+        """
+        frame_pos, frame_dir = self.get_frame_data(frame_index, selection=selection)
+        return self.mesh.instance_transforms(frame_pos, orientations=frame_dir)
+
+    def get_instance_colours(self, frame_index: int, selection=None):
+        """
+        Return the colour of every particle in a frame.
+
+        Parameters
+        ----------
+        frame_index : int
+                Frame to look up.
+        selection : np.ndarray (default=None)
+                Boolean mask or indices of the particles to look up. If None,
+                all particles.
+
+        Returns
+        -------
+        colours : np.ndarray shape=(n_particles, 3) or None
+                None if the particles share the colour of their material.
+        """
+        colour = self.mesh.material.colour
+        if colour.ndim != 3:
+            return None
+        colours = colour[frame_index if self.has_dynamic_colour else 0]
+        if selection is not None:
+            colours = colours[selection]
+        return colours
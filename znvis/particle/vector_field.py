@@ -21,13 +21,15 @@ Summary
 Module for the particle parent class
 """
 
-import typing
 from dataclasses import dataclass
 
 import numpy as np
 from rich.progress import track
 
 from znvis.mesh.arrow import Arrow
+from znvis.mesh.frame_store import FrameStore
+from znvis.mesh.instancing import paint_instances
+from znvis.particle.parallel_build import build_mesh_list_parallel
 
 
 @dataclass
@@ -45,8 +47,8 @@ class VectorField:
             Position tensor of the shape (n_steps, n_vectors, n_dims)
     direction : np.ndarray
             Direction tensor of the shape (n_steps, n_vectors, n_dims)
-    mesh_list : list
-            A list of mesh objects, one for each time step.
+    mesh_list : FrameStore
+            Compact store of the mesh objects, one for each time step.
     static : bool (default=False)
             If true, only render the mesh once at initialization. Be careful
             as this changes the shape of the required position and direction
@@ -61,52 +63,99 @@ class VectorField:
     mesh: Arrow = None  # Should be an instance of the Arrow class
     position: np.ndarray = None
     direction: np.ndarray = None
-    mesh_list: typing.List[Arrow] = None
+    mesh_list: FrameStore = None
     static: bool = False
     smoothing: bool = False
 
     def _create_mesh(
-        self, position: np.ndarray, direction: np.ndarray, time_step: int, index: int
+        self, positions: np.ndarray, directions: np.ndarray, time_step: int
     ):
         """
-        Create a mesh object for the vector field.
+        Create the combined mesh object for all arrows of one frame.
+
+        Vectors of length zero are skipped.
 
         Parameters
         ----------
-        position : np.ndarray
-                Position of the arrow
-        direction : np.ndarray
-                Direction of the arrow
+        positions : np.ndarray shape=(n_vectors, 3)
+                Positions of the arrows
+        directions : np.ndarray shape=(n_vectors, 3)
+                Directions of the arrows
+        time_step : int
+                Time step used to look up per-arrow colours.
 
         Returns
         -------
         mesh : o3d.geometry.TriangleMesh
-                A mesh object
+                A mesh object or None if all vectors have length zero.
         """
+        mask = np.any(directions != 0, axis=1)
+        if not mask.any():
+            return None
 
-        mesh = self.mesh.instantiate_mesh(position, direction)
-        if self.smoothing:
-            mesh = mesh.filter_smooth_taubin(100)
+        mesh = self.mesh.instantiate_meshes(
+            positions[mask], directions[mask], smoothing=self.smoothing
+        )
 
         if self.mesh.material.colour.ndim == 3:
-            mesh = mesh.paint_uniform_color(
-                self.mesh.material.colour[time_step, index, :]
-            )
+            colours = self.mesh.material.colour[time_step, : len(mask)]
+            paint_instances(mesh, colours[mask])
+
+        return mesh
+
+    @property
+    def has_dynamic_colour(self) -> bool:
+        """
+        Whether the arrow colours change between frames.
+        """
+        colour = self.mesh.material.colour
+        return colour.ndim == 3 and colour.shape[0] > 1
+
+    def paint_mesh(self, mesh, time_step: int):
+        """
+        Paint the static frame mesh with the per-arrow colours of a time step.
+
+        This re-colours cached static geometry whose colours change over time
+        without rebuilding it.
+
+        Parameters
+        ----------
+        mesh : o3d.geometry.TriangleMesh
+                Combined static mesh of this vector field, painted in place.
+        time_step : int
+                Time step of the colour tensor to use.
+
+        Returns
+        -------
+        mesh : o3d.geometry.TriangleMesh
+                The painted mesh.
+        """
+        directions = self.direction[0] if self.direction.ndim == 3 else self.direction
+        mask = np.any(directions != 0, axis=1)
+        colours = self.mesh.material.colour[time_step, : len(mask)]
+        paint_instances(mesh, colours[mask])
 
         return mesh
 
-    def construct_mesh_list(self):
+    def construct_mesh_list(self, workers: int = 1):
         """
         Constructor the mesh list for the class.
 
         The mesh list is a list of mesh objects for each
         time step in the parsed trajectory.
 
+        Parameters
+        ----------
+        workers : int (default=1)
+                Number of processes to build the frames with. Frames are
+                independent, so more workers scale the construction of long
+                trajectories with the available cores.
+
         Returns
         -------
         Updates the class attributes mesh_list
         """
-        self.mesh_list = []
+        self.mesh_list = FrameStore()
 
         if self.position is None:
             raise ValueError("Position data cannot be None.")
@@ -115,10 +164,10 @@ class VectorField:
 
         try:
             if not self.static:
-                n_particles = int(self.position.shape[1])
+                if self.position.ndim != 3:
+                    raise IndexError
                 n_time_steps = int(self.position.shape[0])
             else:
-                n_particles = int(self.position.shape[0])
                 n_time_steps = 1
                 self.position = self.position[np.newaxis, :, :]
                 self.direction = self.direction[np.newaxis, :, :]
@@ -128,26 +177,19 @@ class VectorField:
         if np.isnan(self.position).any() or np.isnan(self.direction).any():
             raise ValueError("The provided data contains NaNs.")
 
-        new_mesh = True
+        if workers > 1 and n_time_steps > 1:
+            self.mesh_list = build_mesh_list_parallel(self, n_time_steps, workers)
+            return
 
         for i in track(range(n_time_steps), description=f"Building {self.name} Mesh"):
-            for j in range(n_particles):
-                if (
-                    np.max(np.abs(self.direction[i][j])) > 0
-                ):  # ignore vectors with length zero
-                    if new_mesh is True:
-                        mesh = self._create_mesh(
-                            self.position[i][j], self.direction[i][j], i, j
-                        )
-                        new_mesh = False
-                    else:
-                        mesh += self._create_mesh(
-                            self.position[i][j], self.direction[i][j], i, j
-                        )
-
-            new_mesh = True
-
-            self.mesh_list.append(mesh)
+            mesh = self._create_mesh(self.position[i], self.direction[i], i)
+            if mesh is not None:
+                self.mesh_list.append(mesh)
+            elif len(self.mesh_list) == 0:
+                raise ValueError(f"No non-zero vectors found at time step {i}.")
+            else:
+                # Frames without vectors show the previous frame again.
+                self.mesh_list.append_frame(self.mesh_list.frame(-1))
 
     def get_mesh_for_frame(self, frame_index: int):
         """
@@ -172,24 +214,9 @@ class VectorField:
             dir_frame = self.direction[frame_index]
             time_index = frame_index
 
-        n_particles = int(pos_frame.shape[0])
-        new_mesh = True
-        mesh = None
-        for particle_index in range(n_particles):
-            if np.max(np.abs(dir_frame[particle_index])) > 0:
-                current = self._create_mesh(
-                    pos_frame[particle_index],
-                    dir_frame[particle_index],
-                    time_index,
-                    particle_index,
-                )
-                if new_mesh:
-                    mesh = current
-                    new_mesh = False
-                else:
-                    mesh += current
-
-        if new_mesh:
+        mesh = self._create_mesh(pos_frame, dir_frame, time_index)
+
+        if mesh is None:
             if frame_index > 0:
                 return self.get_mesh_for_frame(frame_index - 1)
             raise ValueError(f"No non-zero vectors found at time step {frame_index}.")
@@ -0,0 +1,160 @@
+"""
+ZnVis: A Zincwarecode package.
+License
+-------
+This program and the accompanying materials are made available under the terms
+of the Eclipse Public License v2.0 which accompanies this distribution, and is
+available at https://www.eclipse.org/legal/epl-v20.html
+SPDX-License-Identifier: EPL-2.0
+Copyright Contributors to the Zincwarecode Project.
+Contact Information
+-------------------
+email: zincwarecode@gmail.com
+github: https://github.com/zincware
+web: https://zincwarecode.com/
+Citation
+--------
+If you use this module please cite us with:
+
+Summary
+-------
+Analytic Mitsuba shapes for instanced spheres and cylinders.
+
+Mitsuba intersects its sphere, cylinder and disk shapes analytically, so a
+particle costs one to three primitives instead of a tessellated mesh. Every
+shape is placed through its ``to_world`` transform alone, which is derived from
+the instance transforms of the particles, so a loaded scene follows the
+particles by updating the transforms.
+"""
+
+import typing
+
+import numpy as np
+
+from znvis.mesh.cylinder import Cylinder
+from znvis.mesh.mesh import Mesh
+from znvis.mesh.sphere import Sphere
+
+
+class AnalyticPart(typing.NamedTuple):
+    """
+    One analytic shape per instance of a mesh.
+
+    Attributes
+    ----------
+    suffix : str
+            Suffix of the shape ids of this part.
+    shape_type : str
+            Mitsuba shape plugin.
+    to_world : np.ndarray shape=(n_instances, 4, 4)
+            Transform of the unit shape of every instance.
+    """
+
+    suffix: str
+    shape_type: str
+    to_world: np.ndarray
+
+
+def supports_analytic_shapes(primitive: Mesh | None) -> bool:
+    """
+    Return whether instances of a mesh can be drawn as analytic shapes.
+    """
+    # Subclasses may change the tessellation, so only the exact types qualify.
+    return type(primitive) in (Sphere, Cylinder)
+
+
+def analytic_parts(primitive: Mesh, transforms: np.ndarray) -> list[AnalyticPart]:
+    """
+    Place the analytic shapes of every instance of a mesh.
+
+    The shapes are fitted to the untransformed Open3D mesh and moved by the
+    instance transforms, so translations, rotations and uniform scaling
+    applied while instancing are all kept.
+
+    Parameters
+    ----------
+    primitive : Sphere | Cylinder
+            Mesh every instance is created from.
+    transforms : np.ndarray shape=(n_instances, 4, 4)
+            Transforms placing the mesh on every instance, see
+            ``Mesh.instance_transforms``.
+
+    Returns
+    -------
+    parts : list[AnalyticPart]
+            Shapes making up every instance.
+    """
+    transforms = np.asarray(transforms, dtype=np.float64).reshape(-1, 4, 4)
+
+    if type(primitive) is Sphere:
+        # Open3D spheres are centered on the origin, like Mitsuba's.
+        radius = primitive.radius
+        return [
+            AnalyticPart("", "sphere", transforms @ _local([radius, radius, radius]))
+        ]
+
+    if type(primitive) is Cylinder:
+        # Open3D cylinders are centered on the origin along the z axis, while
+        # Mitsuba's run from z = 0 to z = 1.
+        radius, half_height = primitive.radius, primitive.height / 2
+        return [
+            AnalyticPart(
+                "",
+                "cylinder",
+                transforms @ _local([radius, radius, primitive.height], -half_height),
+            ),
+            # Caps face outwards, as the BSDFs are one-sided, so the bottom cap
+            # is turned over about the x axis. Disks must be scaled uniformly.
+            AnalyticPart(
+                "_cap0",
+                "disk",
+                transforms @ _local([radius, -radius, -radius], -half_height),
+            ),
+            AnalyticPart(
+                "_cap1",
+                "disk",
+                transforms @ _local([radius, radius, radius], half_height),
+            ),
+        ]
+
+    raise TypeError(f"{type(primitive).__name__} has no analytic shape.")
+
+
+def group_colours(colours: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Group the instances of a painted mesh by their colour.
+
+    Groups are numbered in the order their colours first appear, so instances
+    whose colours all change keep their groups from frame to frame.
+
+    Parameters
+    ----------
+    colours : np.ndarray shape=(n_instances, 3)
+            Colour of every instance.
+
+    Returns
+    -------
+    group_colours : np.ndarray shape=(n_groups, 3)
+            Colour of every group.
+    groups : np.ndarray shape=(n_instances,)
+            Group of every instance.
+    """
+    unique, first, inverse = np.unique(
+        np.asarray(colours).reshape(-1, 3),
+        axis=0,
+        return_index=True,
+        return_inverse=True,
+    )
+    order = np.argsort(first)
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    return unique[order], rank[inverse.reshape(-1)]
+
+
+def _local(scale: list, offset: float = 0.0) -> np.ndarray:
+    """
+    Build the transform scaling a unit shape and moving it along the z axis.
+    """
+    local = np.diag([*scale, 1.0])
+    local[2, 3] = offset
+    return local
@@ -0,0 +1,208 @@
+"""
+ZnVis: A Zincwarecode package.
+License
+-------
+This program and the accompanying materials are made available under the terms
+of the Eclipse Public License v2.0 which accompanies this distribution, and is
+available at https://www.eclipse.org/legal/epl-v20.html
+SPDX-License-Identifier: EPL-2.0
+Copyright Contributors to the Zincwarecode Project.
+Contact Information
+-------------------
+email: zincwarecode@gmail.com
+github: https://github.com/zincware
+web: https://zincwarecode.com/
+Citation
+--------
+If you use this module please cite us with:
+
+Summary
+-------
+Staged build/render/write pipeline for rendering trajectory frames.
+"""
+
+import queue
+import threading
+import typing
+
+_STOP = object()
+
+
+class FramePipeline:
+    """
+    Render frames in three overlapping stages connected by bounded queues.
+
+    While frame i renders, a build thread prepares the meshes of frame i + 1
+    and a writer thread encodes and saves frame i - 1. Every stage runs in one
+    thread of its own, so each stage sees the frames in submission order and
+    may keep state such as a persistent renderer scene.
+
+    If a stage fails, frames submitted after the failed one are skipped, the
+    earlier ones are still finished, and the error is raised from the next
+    ``submit`` or ``join``.
+    """
+
+    def __init__(
+        self,
+        build_frame: typing.Callable[[int], typing.Any],
+        render_frame: typing.Callable[[int, typing.Any], typing.Any],
+        write_frame: typing.Callable[[int, typing.Any], None],
+        on_written: typing.Callable[[int], None] | None = None,
+        on_error: typing.Callable[[int, BaseException], None] | None = None,
+        queue_size: int = 2,
+    ):
+        """
+        Constructor for the frame pipeline.
+
+        Parameters
+        ----------
+        build_frame : callable
+                ``build_frame(frame_index)`` returns what the renderer needs,
+                e.g. the mesh dict and view matrix of the frame.
+        render_frame : callable
+                ``render_frame(frame_index, built)`` returns the rendered image.
+        write_frame : callable
+                ``write_frame(frame_index, image)`` encodes and saves the image.
+        on_written : callable, optional
+                Called from the writer thread with every saved frame index.
+        on_error : callable, optional
+                Called once from the failing stage with the frame index and the
+                exception.
+        queue_size : int
+                Maximum number of frames waiting in front of each stage.
+        """
+        self._stages = [
+            (self._build, queue.Queue(maxsize=queue_size)),
+            (self._render, queue.Queue(maxsize=queue_size)),
+            (self._write, queue.Queue(maxsize=queue_size)),
+        ]
+        self._build_frame = build_frame
+        self._render_frame = render_frame
+        self._write_frame = write_frame
+        self._on_written = on_written
+        self._on_error = on_error
+
+        self.error = None
+        self.failed_frame = None
+        self._failed_sequence = None
+        self._submitted = 0
+        self._pending = 0
+        self._condition = threading.Condition()
+        self._threads = []
+        for index, (stage, _) in enumerate(self._stages):
+            thread = threading.Thread(
+                target=self._run_stage,
+                args=(index, stage),
+                name=f"znvis-frame-{stage.__name__.strip('_')}",
+                daemon=True,
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def __enter__(self) -> "FramePipeline":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    @property
+    def pending(self) -> int:
+        """
+        Return the number of submitted frames that are not written yet.
+        """
+        with self._condition:
+            return self._pending
+
+    def submit(self, frame_index: int) -> None:
+        """
+        Queue a frame, blocking while the build stage is full.
+        """
+        self._raise_error()
+        with self._condition:
+            self._pending += 1
+            self._submitted += 1
+            sequence = self._submitted
+        self._stages[0][1].put((sequence, frame_index, None))
+
+    def join(self) -> None:
+        """
+        Wait until all submitted frames are written or skipped.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._pending == 0)
+        self._raise_error()
+
+    def close(self) -> None:
+        """
+        Finish the submitted frames and stop the stage threads.
+        """
+        if not self._threads:
+            return
+        self._stages[0][1].put(_STOP)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def _build(self, frame_index: int, _item):
+        return self._build_frame(frame_index)
+
+    def _render(self, frame_index: int, built):
+        return self._render_frame(frame_index, built)
+
+    def _write(self, frame_index: int, image) -> None:
+        self._write_frame(frame_index, image)
+        if self._on_written is not None:
+            self._on_written(frame_index)
+
+    def _run_stage(self, index: int, stage) -> None:
+        """
+        Process the items of one stage and pass results to the next one.
+        """
+        inbox = self._stages[index][1]
+        is_last = index == len(self._stages) - 1
+        while True:
+            item = inbox.get()
+            if item is _STOP:
+                if not is_last:
+                    self._stages[index + 1][1].put(_STOP)
+                return
+
+            sequence, frame_index, value = item
+            skipped = self._skipped(sequence)
+            if not skipped:
+                try:
+                    value = stage(frame_index, value)
+                except BaseException as e:
+                    self._fail(sequence, frame_index, e)
+                    skipped = True
+
+            if skipped or is_last:
+                # Either way the frame leaves the pipeline.
+                self._frame_done()
+            else:
+                self._stages[index + 1][1].put((sequence, frame_index, value))
+
+    def _skipped(self, sequence: int) -> bool:
+        with self._condition:
+            return (
+                self._failed_sequence is not None and sequence >= self._failed_sequence
+            )
+
+    def _fail(self, sequence: int, frame_index: int, error: BaseException) -> None:
+        with self._condition:
+            if self.error is not None:
+                return
+            self.error = error
+            self.failed_frame = frame_index
+            self._failed_sequence = sequence
+        if self._on_error is not None:
+            self._on_error(frame_index, error)
+
+    def _frame_done(self) -> None:
+        with self._condition:
+            self._pending -= 1
+            self._condition.notify_all()
+
+    def _raise_error(self) -> None:
+        if self.error is not None:
+            raise self.error
@@ -0,0 +1,74 @@
+"""
+ZnVis: A Zincwarecode package.
+License
+-------
+This program and the accompanying materials are made available under the terms
+of the Eclipse Public License v2.0 which accompanies this distribution, and is
+available at https://www.eclipse.org/legal/epl-v20.html
+SPDX-License-Identifier: EPL-2.0
+Copyright Contributors to the Zincwarecode Project.
+Contact Information
+-------------------
+email: zincwarecode@gmail.com
+github: https://github.com/zincware
+web: https://zincwarecode.com/
+Citation
+--------
+If you use this module please cite us with:
+
+Summary
+-------
+View-frustum culling of bounding spheres.
+
+Particles outside the view of the camera do not need to be built. Their
+bounding spheres are tested against the four side planes of the view frustum
+and the plane of the camera, all at once.
+"""
+
+import numpy as np
+
+
+def spheres_in_frustum(
+    centers: np.ndarray,
+    radii: np.ndarray | float,
+    view_matrix: np.ndarray,
+    tan_half_fov: tuple[float, float],
+    margin: float = 0.0,
+) -> np.ndarray:
+    """
+    Find the spheres that may be seen by a perspective camera.
+
+    Parameters
+    ----------
+    centers : np.ndarray shape=(n_spheres, 3)
+            Centers of the spheres in world coordinates.
+    radii : np.ndarray shape=(n_spheres,) or float
+            Radii of the spheres.
+    view_matrix : np.ndarray shape=(4, 4)
+            Open3D view matrix, mapping world coordinates to camera coordinates
+            with the camera looking along -z.
+    tan_half_fov : tuple[float, float]
+            Tangents of half the horizontal and vertical field of view.
+    margin : float (default = 0.0)
+            Distance by which every sphere is grown. Off-screen geometry can
+            still cast shadows or appear in reflections, a margin keeps it when
+            it is close to the view.
+
+    Returns
+    -------
+    visible : np.ndarray shape=(n_spheres,)
+            True for every sphere that intersects the frustum.
+    """
+    view_matrix = np.asarray(view_matrix, dtype=float)
+    camera = np.asarray(centers, dtype=float) @ view_matrix[:3, :3].T
+    camera += view_matrix[:3, 3]
+    depth = -camera[:, 2]
+    radii = np.asarray(radii, dtype=float) + margin
+
+    visible = depth > -radii
+    for offset, tan_half in zip(camera[:, :2].T, tan_half_fov):
+        # Distance to the side planes through the camera, positive outside.
+        cos_half = 1.0 / np.sqrt(1.0 + tan_half**2)
+        distance = (np.abs(offset) - depth * tan_half) * cos_half
+        visible &= distance < radii
+    return visible
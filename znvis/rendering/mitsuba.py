@@ -21,14 +21,24 @@ Summary
 Mitsuba rendering module.
 """
 
+import contextlib
 import os
 
 import mitsuba as mi
 import numpy as np
 import open3d as o3d
 
+from znvis.mesh.instancing import to_triangle_mesh
+from znvis.rendering.analytic_shapes import (
+    analytic_parts,
+    group_colours,
+    supports_analytic_shapes,
+)
+from znvis.rendering.frustum_culling import spheres_in_frustum
+
+# Parallel render workers request their variant, e.g. LLVM on CPU-only nodes.
 try:
-    mi.set_variant("cuda_ad_rgb")
+    mi.set_variant(os.getenv("ZNVIS_MITSUBA_VARIANT", "cuda_ad_rgb"))
 except (AttributeError, ImportError):
     try:
         mi.set_variant("llvm_ad_rgb")
@@ -59,12 +69,54 @@ default_scene_dict = {
 }
 
 
+@contextlib.contextmanager
+def _without_warnings():
+    """
+    Hide Mitsuba's warnings, which flag analytic shapes scaled to a point as
+    scaled non-uniformly.
+    """
+    logger = mi.logger() if hasattr(mi, "logger") else mi.Thread.thread().logger()
+    log_level = logger.log_level()
+    logger.set_log_level(mi.LogLevel.Error)
+    try:
+        yield
+    finally:
+        logger.set_log_level(log_level)
+
+
+def _freeze(value, path: tuple, ignored: set):
+    """
+    Turn a scene dict entry into a comparable snapshot of its current value.
+    """
+    if isinstance(value, dict):
+        return tuple(
+            (key, _freeze(item, path + (key,), ignored))
+            for key, item in value.items()
+            if path + (key,) not in ignored
+        )
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item, path, ignored) for item in value)
+    if isinstance(value, np.ndarray):
+        return value.shape, value.dtype.str, value.tobytes()
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    # Mitsuba objects such as transforms print their values.
+    return type(value).__name__, repr(value)
+
+
 class Mitsuba:
     """
     Class for Mitsuba rendering.
     """
 
-    def __init__(self, scene_dict: dict = None, update_camera: bool = True) -> None:
+    def __init__(
+        self,
+        scene_dict: dict = None,
+        update_camera: bool = True,
+        persistent_scene: bool = True,
+        analytic_shapes: bool = True,
+        instanced_meshes: bool = True,
+    ) -> None:
         """
         Initialize the Mitsuba renderer.
 
@@ -80,11 +132,36 @@ class Mitsuba:
             If True, the camera will be updated to look at the mesh center.
             Set this to False if you want to use a custom camera which is
             defined in the scene_dict.
+        persistent_scene : bool (default = True)
+            If True, the scene is loaded once and later frames only update the
+            vertex buffers and the camera through the scene parameters. The
+            scene is reloaded when the meshes, their topology, the render
+            settings or any other entry of the scene dict, such as the lights
+            or the integrator, change.
+        analytic_shapes : bool (default = True)
+            If True, sphere and cylinder particles are rendered as Mitsuba's
+            analytic sphere, cylinder and disk shapes, one set per particle,
+            instead of their tessellated meshes, see ``renders_analytic``.
+        instanced_meshes : bool (default = True)
+            If True, the mesh of other uniformly coloured particles is stored
+            once in a Mitsuba shapegroup and every particle is an instance of
+            it, see ``renders_instances``.
         """
         if scene_dict is None:
             scene_dict = default_scene_dict
         self.scene_dict = scene_dict
         self.update_camera = update_camera
+        self.persistent_scene = persistent_scene
+        self.analytic_shapes = analytic_shapes
+        self.instanced_meshes = instanced_meshes
+        self._scene_keys = []
+        self._analytic_bsdfs = {}
+        self._meshes = {}
+        self._rendered_objects = {}
+        self._scene = None
+        self._scene_parameters = None
+        self._scene_signature = None
+        self._to_world_matrix = None
 
     def _update_camera(self, view_matrix: np.ndarray) -> None:
         """
@@ -111,6 +188,150 @@ class Mitsuba:
         self.scene_dict["sensor"]["to_world"] = mi.ScalarTransform4f(
             adjusted_to_world_matrix
         )
+        self._to_world_matrix = adjusted_to_world_matrix
+
+    @staticmethod
+    def _get_scene_signature(
+        mesh_objects: dict, resolution: list, samples_per_pixel: int
+    ) -> tuple:
+        """
+        Describe everything that requires a full reload of the scene.
+
+        Vertex positions, normals, colours and the camera can be updated in a
+        loaded scene. Changing meshes, vertex or triangle counts, materials or
+        render settings needs a reload.
+        """
+        meshes = tuple(
+            (
+                (
+                    mesh_name,
+                    id(mesh_object.get("template")),
+                    len(mesh_object["instances"]),
+                    Mitsuba._colour_groups(mesh_object),
+                )
+                if "instances" in mesh_object
+                else (
+                    mesh_name,
+                    len(mesh_object["mesh"].vertices),
+                    len(mesh_object["mesh"].triangles),
+                    mesh_object["mesh"].has_vertex_normals(),
+                    mesh_object["mesh"].has_vertex_colors(),
+                )
+            )
+            + (id(mesh_object["bsdf"]), id(mesh_object["material"]))
+            for mesh_name, mesh_object in mesh_objects.items()
+        )
+        return meshes, tuple(resolution), samples_per_pixel
+
+    def _get_scene_dict_signature(self) -> tuple:
+        """
+        Describe the entries of the scene dict that ZnVis does not manage.
+
+        Lights, emitters, the integrator or a custom sensor changed by the user
+        between renders are only picked up by a reload. The shapes of the
+        previous frame, the film size, the sample count and the camera set by
+        ``_update_camera`` are left out, as they are covered by the scene
+        signature or updated in place.
+        """
+        managed = {
+            ("sensor", "thefilm", "width"),
+            ("sensor", "thefilm", "height"),
+            ("sensor", "thesampler", "sample_count"),
+        }
+        if self.update_camera:
+            managed.add(("sensor", "to_world"))
+        scene_keys = set(self._scene_keys)
+        return tuple(
+            (key, _freeze(value, (key,), managed))
+            for key, value in self.scene_dict.items()
+            if key not in scene_keys
+        )
+
+    def _update_scene_parameters(self, mesh_objects: dict) -> None:
+        """
+        Update the vertex buffers and the camera of the loaded scene.
+
+        Mitsuba recomputes the vertex normals whenever the vertex positions
+        change, so the positions are committed first and the normals of the
+        meshes are written in a second update. Mesh objects passed again for
+        this frame, such as cached static items, are skipped.
+
+        Parameters
+        ----------
+        mesh_objects : dict
+            Mesh objects with the same topology as the loaded scene.
+        """
+        parameters = self._scene_parameters
+        shading = {}
+
+        for mesh_name, mesh_object in mesh_objects.items():
+            if self._rendered_objects.get(mesh_name) is mesh_object:
+                # Cached static items are already in the scene.
+                continue
+            if self._is_analytic(mesh_object):
+                self._update_analytic_shapes(mesh_name, mesh_object)
+                continue
+            if "instances" in mesh_object:
+                for index, to_world in enumerate(mesh_object["instances"]):
+                    key = f"{mesh_name}_{index}.to_world"
+                    parameters[key] = type(parameters[key])(to_world)
+                continue
+            geometry, shading[mesh_name] = self._mesh_buffers(mesh_object["mesh"])
+            self._set_buffers(parameters, geometry, prefix=f"{mesh_name}.")
+        if self.update_camera:
+            parameters["sensor.to_world"] = type(parameters["sensor.to_world"])(
+                self._to_world_matrix
+            )
+        parameters.update()
+
+        for mesh_name, buffers in shading.items():
+            self._set_buffers(parameters, buffers, prefix=f"{mesh_name}.")
+        parameters.update()
+
+    @staticmethod
+    def _mesh_buffers(mesh: o3d.geometry.TriangleMesh) -> tuple[dict, dict]:
+        """
+        Return the Mitsuba buffers of an Open3D mesh as flat NumPy arrays.
+
+        The geometry and the shading buffers are returned separately, since
+        Mitsuba recomputes the normals whenever the positions change and the
+        shading buffers have to be written afterwards.
+
+        Parameters
+        ----------
+        mesh : o3d.geometry.TriangleMesh
+            Mesh to convert.
+
+        Returns
+        -------
+        geometry : dict
+            Contiguous float32 vertex positions and uint32 faces.
+        shading : dict
+            Contiguous float32 vertex normals and colours, if the mesh has them.
+        """
+        geometry = {
+            "vertex_positions": np.asarray(mesh.vertices, np.float32).ravel(),
+            "faces": np.asarray(mesh.triangles, np.uint32).ravel(),
+        }
+        shading = {}
+        if mesh.has_vertex_normals():
+            shading["vertex_normals"] = np.asarray(
+                mesh.vertex_normals, np.float32
+            ).ravel()
+        if mesh.has_vertex_colors():
+            shading["vertex_color"] = np.asarray(mesh.vertex_colors, np.float32).ravel()
+        return geometry, shading
+
+    @staticmethod
+    def _set_buffers(
+        parameters: mi.SceneParameters, buffers: dict, prefix: str = ""
+    ) -> None:
+        """
+        Copy NumPy buffers into the Mitsuba parameters of the same name.
+        """
+        for name, buffer in buffers.items():
+            key = prefix + name
+            parameters[key] = type(parameters[key])(buffer)
 
     def render_mesh_objects(
         self,
@@ -143,36 +364,137 @@ class Mitsuba:
         -------
         Saves an image to disk.
         """
+        bitmap = self.render_image(
+            mesh_objects, view_matrix, resolution, samples_per_pixel
+        )
+        self.write_image(bitmap, save_dir, save_name)
+
+    def render_image(
+        self,
+        mesh_objects: dict,
+        view_matrix: np.ndarray,
+        resolution: list,
+        samples_per_pixel: int,
+    ) -> mi.Bitmap:
+        """
+        Render mesh objects into an image held in memory.
+
+        Parameters
+        ----------
+        mesh_objects : list
+            List of mesh objects to render.
+        view_matrix : np.ndarray
+            View matrix for the camera from open3d.
+        resolution : list
+            Resolution of the exported image/video.
+        samples_per_pixel : int
+            Sample count per pixel for the sampler.
+
+        Returns
+        -------
+        bitmap : mi.Bitmap
+            Rendered image, to be saved with ``write_image``.
+        """
         # Update camera.
         if self.update_camera:
             self._update_camera(view_matrix)
 
+        # Update the loaded scene in place if only the vertex data changed.
+        signature = (
+            self._get_scene_signature(mesh_objects, resolution, samples_per_pixel),
+            self._get_scene_dict_signature(),
+        )
+        with (
+            _without_warnings()
+            if self._has_parked_shapes(mesh_objects)
+            else contextlib.nullcontext()
+        ):
+            if self.persistent_scene and signature == self._scene_signature:
+                self._update_scene_parameters(mesh_objects)
+            else:
+                self._load_scene(mesh_objects, resolution, samples_per_pixel)
+                self._scene_signature = signature if self.persistent_scene else None
+        self._rendered_objects = dict(mesh_objects)
+
+        img = mi.render(self._scene)
+        return mi.Bitmap(img)
+
+    @staticmethod
+    def write_image(bitmap: mi.Bitmap, save_dir: str, save_name: str) -> None:
+        """
+        Encode a rendered image as 8-bit RGB and write it to disk.
+
+        Parameters
+        ----------
+        bitmap : mi.Bitmap
+            Image returned by ``render_image``.
+        save_dir : str
+            Directory to save the rendered image.
+        save_name : str
+            Name of the rendered image.
+        """
+        bmp = bitmap.convert(mi.Bitmap.PixelFormat.RGB, mi.Struct.Type.UInt8, True)
+        # Write next to the target and rename, so frames are never partial.
+        temporary_path = os.path.join(save_dir, f".{os.getpid()}-{save_name}")
+        bmp.write(temporary_path)
+        os.replace(temporary_path, os.path.join(save_dir, save_name))
+
+    @staticmethod
+    def image_to_array(bitmap: mi.Bitmap) -> np.ndarray:
+        """
+        Convert a rendered image to an 8-bit sRGB array.
+
+        Parameters
+        ----------
+        bitmap : mi.Bitmap
+            Image returned by ``render_image``.
+
+        Returns
+        -------
+        image : np.ndarray
+            Array of shape (height, width, 3) in RGB order, with the same
+            pixel values as the image written by ``write_image``.
+        """
+        return np.array(
+            bitmap.convert(mi.Bitmap.PixelFormat.RGB, mi.Struct.Type.UInt8, True)
+        )
+
+    def _load_scene(
+        self, mesh_objects: dict, resolution: list, samples_per_pixel: int
+    ) -> None:
+        """
+        Convert all mesh objects and load the full scene.
+
+        Parameters
+        ----------
+        mesh_objects : dict
+            Mesh objects to render.
+        resolution : list
+            Resolution of the exported image/video.
+        samples_per_pixel : int
+            Sample count per pixel for the sampler.
+        """
+        # Drop the shapes of the previous scene.
+        for key in self._scene_keys:
+            self.scene_dict.pop(key, None)
+        self._scene_keys = []
+        self._analytic_bsdfs = {}
+
         # Add mesh objects to scene dict.
-        for mesh_name in mesh_objects:
-            bsdf = mesh_objects[mesh_name]["bsdf"]
-            material = mesh_objects[mesh_name]["material"]
-
-            # Convert to a tensor mesh.
-            # print(mesh_objects[mesh_name]["mesh"].material)
-            mesh = o3d.t.geometry.TriangleMesh.from_legacy(
-                mesh_objects[mesh_name]["mesh"]
-            )
+        for mesh_name, mesh_object in mesh_objects.items():
+            if self._is_analytic(mesh_object):
+                self._add_analytic_shapes(mesh_name, mesh_object)
+                continue
 
-            if bsdf is None:
-                mesh.material.set_default_properties()
-                mesh.material.material_name = "defaultLit"
-                mesh.material.vector_properties["base_color"] = material.base_color
-                mesh.material.scalar_properties["roughness"] = material.base_roughness
-                mesh.material.scalar_properties["metallic"] = material.base_metallic
-                mesh.material.scalar_properties["reflectance"] = (
-                    material.base_reflectance
-                )
-                mesh.material.scalar_properties["anisotropy"] = material.base_anisotropy
+            if "instances" in mesh_object:
+                self._add_instances(mesh_name, mesh_object)
+                continue
 
-            # Convert to Mitsuba mesh
-            mitsuba_mesh = mesh.to_mitsuba(mesh_name, bsdf=bsdf)
             # Add to scene dict.
-            self.scene_dict[mesh_name] = mitsuba_mesh
+            self.scene_dict[mesh_name] = self._to_mitsuba_mesh(
+                mesh_name, mesh_object["mesh"], mesh_object
+            )
+            self._scene_keys.append(mesh_name)
 
         # Render the scene.
         self.scene_dict["sensor"]["thefilm"]["width"] = resolution[0]
@@ -180,10 +502,301 @@ class Mitsuba:
 
         self.scene_dict["sensor"]["thesampler"]["sample_count"] = samples_per_pixel
 
-        scene = mi.load_dict(self.scene_dict)
+        # Meshes of items that left the scene are not reused.
+        self._meshes = {
+            name: cached
+            for name, cached in self._meshes.items()
+            if name in mesh_objects
+        }
+
+        self._scene = mi.load_dict(self.scene_dict)
+        self._scene_parameters = (
+            mi.traverse(self._scene) if self.persistent_scene else None
+        )
+
+    def _to_mitsuba_mesh(
+        self, mesh_name: str, mesh: o3d.geometry.TriangleMesh, mesh_object: dict
+    ) -> mi.Mesh:
+        """
+        Convert an Open3D mesh with the material of a mesh object.
+
+        The Mitsuba mesh is filled straight from NumPy buffers. A mesh of the
+        same name, size and material converted for a previous scene is reused,
+        only its buffers are overwritten. They are kept as they are if the
+        previous frame passed the same mesh object.
+        """
+        cached = self._meshes.get(mesh_name)
+        if cached is not None and self._rendered_objects.get(mesh_name) is mesh_object:
+            return cached[1]
+
+        geometry, shading = self._mesh_buffers(mesh)
+        vertex_count = len(geometry["vertex_positions"]) // 3
+        face_count = len(geometry["faces"]) // 3
+        signature = (
+            vertex_count,
+            face_count,
+            tuple(shading),
+            id(mesh_object["bsdf"]),
+            id(mesh_object["material"]),
+        )
+
+        if cached is not None and cached[0] == signature:
+            mitsuba_mesh = cached[1]
+        else:
+            bsdf = mesh_object["bsdf"]
+            if bsdf is None:
+                # Same BSDF as Open3D's conversion of the material.
+                material = mesh_object["material"]
+                description = self._principled_bsdf(material, material.base_color[:3])
+                if "vertex_color" in shading:
+                    description["base_color"] = {
+                        "type": "mesh_attribute",
+                        "name": "vertex_color",
+                    }
+                bsdf = mi.load_dict(description)
+
+            properties = mi.Properties()
+            properties["mesh_bsdf"] = bsdf
+            mitsuba_mesh = mi.Mesh(
+                mesh_name,
+                vertex_count=vertex_count,
+                face_count=face_count,
+                has_vertex_normals="vertex_normals" in shading,
+                has_vertex_texcoords=False,
+                props=properties,
+            )
+            if "vertex_color" in shading:
+                mitsuba_mesh.add_attribute("vertex_color", 3, shading["vertex_color"])
+            self._meshes[mesh_name] = (signature, mitsuba_mesh)
+
+        parameters = mi.traverse(mitsuba_mesh)
+        self._set_buffers(parameters, geometry)
+        parameters.update()
+        self._set_buffers(parameters, shading)
+        parameters.update()
+        return mitsuba_mesh
+
+    def visible_spheres(
+        self,
+        centers: np.ndarray,
+        radii: np.ndarray | float,
+        view_matrix: np.ndarray,
+        resolution: list,
+        margin: float = 0.0,
+    ) -> np.ndarray:
+        """
+        Find the bounding spheres that may be seen by the sensor.
+
+        Parameters
+        ----------
+        centers : np.ndarray shape=(n_spheres, 3)
+            Centers of the spheres.
+        radii : np.ndarray shape=(n_spheres,) or float
+            Radii of the spheres.
+        view_matrix : np.ndarray
+            View matrix for the camera from open3d.
+        resolution : list
+            Resolution of the exported image/video.
+        margin : float (default = 0.0)
+            Distance by which every sphere is grown, to keep geometry just
+            outside the view for shadows and reflections.
+
+        Returns
+        -------
+        visible : np.ndarray shape=(n_spheres,)
+            True for every sphere in view.
+        """
+        sensor = self.scene_dict["sensor"]
+        if "fov" not in sensor:
+            raise ValueError("Frustum culling needs the 'fov' of the sensor.")
+
+        width, height = resolution
+        fov_axis = sensor.get("fov_axis", "x")
+        if fov_axis == "smaller":
+            fov_axis = "x" if width <= height else "y"
+        elif fov_axis == "larger":
+            fov_axis = "x" if width >= height else "y"
+        extent = {"x": width, "y": height, "diagonal": np.hypot(width, height)}
+        tan_half = np.tan(np.radians(sensor["fov"]) / 2) / extent[fov_axis]
+
+        return spheres_in_frustum(
+            centers,
+            radii,
+            view_matrix,
+            (tan_half * width, tan_half * height),
+            margin=margin,
+        )
+
+    def renders_instances(self, primitive) -> bool:
+        """
+        Return whether particles of a mesh are rendered as instances.
+
+        Instanced particles are passed as their mesh template and one
+        transform per particle, so the geometry is stored only once.
+        Particles drawn as analytic shapes are not instanced.
+
+        Parameters
+        ----------
+        primitive : Mesh
+            Mesh of the particles.
+
+        Returns
+        -------
+        instanced : bool
+        """
+        return (
+            self.instanced_meshes
+            and primitive is not None
+            and not self.renders_analytic(primitive)
+        )
+
+    def renders_analytic(self, primitive) -> bool:
+        """
+        Return whether particles of a mesh are rendered as analytic shapes.
+
+        Such particles are passed as one transform and, if painted, one
+        colour per particle. Particles passed as a combined mesh are
+        rendered as that mesh.
 
-        img = mi.render(scene)
-        bmp = mi.Bitmap(img)
+        Parameters
+        ----------
+        primitive : Mesh
+            Mesh of the particles.
+
+        Returns
+        -------
+        analytic : bool
+        """
+        return self.analytic_shapes and supports_analytic_shapes(primitive)
+
+    def _add_instances(self, mesh_name: str, mesh_object: dict) -> None:
+        """
+        Add the template of a mesh object as a shapegroup and instance it.
+        """
+        template = mesh_object["template"]
+        group_key = f"{mesh_name}_template"
+        self.scene_dict[group_key] = {
+            "type": "shapegroup",
+            mesh_name: self._to_mitsuba_mesh(
+                mesh_name,
+                to_triangle_mesh(
+                    template.vertices.copy(),
+                    template.triangles.copy(),
+                    template.normals.copy(),
+                ),
+                mesh_object,
+            ),
+        }
+        self._scene_keys.append(group_key)
+
+        for index, to_world in enumerate(mesh_object["instances"]):
+            key = f"{mesh_name}_{index}"
+            self.scene_dict[key] = {
+                "type": "instance",
+                "shapegroup": {"type": "ref", "id": group_key},
+                "to_world": mi.ScalarTransform4f(to_world),
+            }
+            self._scene_keys.append(key)
+
+    def _has_parked_shapes(self, mesh_objects: dict) -> bool:
+        """
+        Return whether analytic shapes were shrunk to a point by culling.
+        """
+        return any(
+            self._is_analytic(mesh_object)
+            and not mesh_object["instances"][:, :3, :3].any(axis=(1, 2)).all()
+            for mesh_object in mesh_objects.values()
+        )
+
+    def _is_analytic(self, mesh_object: dict) -> bool:
+        """
+        Return whether a mesh object is rendered as analytic shapes.
+        """
+        return "instances" in mesh_object and self.renders_analytic(
+            mesh_object["primitive"]
+        )
+
+    @staticmethod
+    def _principled_bsdf(material, base_color) -> dict:
+        """
+        Describe the principled BSDF Open3D derives from a material record.
+        """
+        return {
+            "type": "principled",
+            "base_color": {"type": "rgb", "value": base_color},
+            "roughness": {"type": "rgb", "value": material.base_roughness},
+            "metallic": {"type": "rgb", "value": material.base_metallic},
+            "anisotropic": {"type": "rgb", "value": material.base_anisotropy},
+            "specular": material.base_reflectance,
+        }
+
+    @staticmethod
+    def _colour_groups(mesh_object: dict) -> bytes | None:
+        """
+        Describe which instances of a mesh object share a colour, else None.
+        """
+        colours = mesh_object.get("colours")
+        if colours is None:
+            return None
+        return group_colours(colours)[1].tobytes()
+
+    def _add_analytic_shapes(self, mesh_name: str, mesh_object: dict) -> None:
+        """
+        Add one set of analytic shapes per instance to the scene dict.
+
+        Painted instances of the same colour share a BSDF; otherwise all
+        shapes share one.
+        """
+        material = mesh_object["material"]
+        colours = mesh_object.get("colours")
+        if colours is not None:
+            group_colour, groups = group_colours(colours)
+            bsdfs = [
+                mi.load_dict(self._principled_bsdf(material, colour))
+                for colour in group_colour
+            ]
+            self._analytic_bsdfs[mesh_name] = bsdfs
+        else:
+            bsdf = mesh_object["bsdf"]
+            if bsdf is None:
+                bsdf = mi.load_dict(
+                    self._principled_bsdf(material, material.base_color[:3])
+                )
+            bsdfs, groups = [bsdf], np.zeros(len(mesh_object["instances"]), int)
+
+        parts = analytic_parts(mesh_object["primitive"], mesh_object["instances"])
+        for part in parts:
+            for index, to_world in enumerate(part.to_world):
+                key = f"{mesh_name}_{index}{part.suffix}"
+                self.scene_dict[key] = {
+                    "type": part.shape_type,
+                    "to_world": mi.ScalarTransform4f(to_world),
+                    "bsdf": bsdfs[groups[index]],
+                }
+                self._scene_keys.append(key)
+
+    def _update_analytic_shapes(self, mesh_name: str, mesh_object: dict) -> None:
+        """
+        Move the analytic shapes of a mesh object and update their colours.
+
+        The instances are grouped by colour as in the loaded scene, so only
+        the colour of every group is updated.
+        """
+        parameters = self._scene_parameters
+        parts = analytic_parts(mesh_object["primitive"], mesh_object["instances"])
+        for part in parts:
+            for index, to_world in enumerate(part.to_world):
+                key = f"{mesh_name}_{index}{part.suffix}.to_world"
+                parameters[key] = type(parameters[key])(to_world)
 
-        bmp = bmp.convert(mi.Bitmap.PixelFormat.RGB, mi.Struct.Type.UInt8, True)
-        bmp.write(os.path.join(save_dir, save_name))
+        colours = mesh_object.get("colours")
+        if colours is None:
+            return
+        for bsdf, colour in zip(
+            self._analytic_bsdfs[mesh_name], group_colours(colours)[0]
+        ):
+            bsdf_parameters = mi.traverse(bsdf)
+            bsdf_parameters["base_color.value"] = type(
+                bsdf_parameters["base_color.value"]
+            )(colour)
+            bsdf_parameters.update()
@@ -39,16 +39,66 @@ def rotation_matrix(current: np.ndarray, target: np.ndarray):
     rotation : np.ndarray shape=(3, 3)
             A 3x3 rotation matrix to move a into b
     """
-    if (abs(current - target)).sum() == 0.0:
-        return np.eye(3)
-    else:
-        a, b = (current / np.linalg.norm(current)).reshape(3), (
-            target / np.linalg.norm(target)
-        ).reshape(3)
-        v = np.cross(a, b)
-        c = np.dot(a, b)
-        s = np.linalg.norm(v)
-        kmat = np.array([[0, -v[2], v[1]], [v[2], 0, -v[0]], [-v[1], v[0], 0]])
-        rotation_matrix = np.eye(3) + kmat + kmat.dot(kmat) * ((1 - c) / (s**2))
-
-        return rotation_matrix
+    return rotation_matrices(current, np.reshape(target, (1, 3)))[0]
+
+
+def rotation_matrices(
+    current: np.ndarray, targets: np.ndarray, tolerance: float = 1e-12
+) -> np.ndarray:
+    """
+    Compute the rotation matrices between many pairs of vectors at once.
+
+    Parallel pairs map to the identity and antiparallel pairs to a rotation by
+    pi about an axis perpendicular to ``current``. Zero length targets carry no
+    orientation and also map to the identity.
+
+    Parameters
+    ----------
+    current : np.ndarray shape=(3,) or (n_vectors, 3)
+            Current orientation vector(s). A single vector is used for all
+            targets.
+    targets : np.ndarray shape=(n_vectors, 3)
+            Vectors to rotate into.
+    tolerance : float (default = 1e-12)
+            Threshold below which pairs are treated as (anti)parallel.
+
+    Returns
+    -------
+    rotations : np.ndarray shape=(n_vectors, 3, 3)
+            Stack of rotation matrices moving each current vector into its target.
+    """
+    targets = np.asarray(targets, dtype=float).reshape(-1, 3)
+    current = np.broadcast_to(np.asarray(current, dtype=float), targets.shape)
+
+    target_norms = np.linalg.norm(targets, axis=1)
+    valid = target_norms > 0
+    a = current / np.linalg.norm(current, axis=1, keepdims=True)
+    b = np.zeros_like(targets)
+    b[valid] = targets[valid] / target_norms[valid, None]
+
+    v = np.cross(a, b)
+    c = np.einsum("ij,ij->i", a, b)
+
+    kmat = np.zeros((len(targets), 3, 3))
+    kmat[:, 0, 1], kmat[:, 0, 2] = -v[:, 2], v[:, 1]
+    kmat[:, 1, 0], kmat[:, 1, 2] = v[:, 2], -v[:, 0]
+    kmat[:, 2, 0], kmat[:, 2, 1] = -v[:, 1], v[:, 0]
+
+    rotations = np.broadcast_to(np.eye(3), kmat.shape).copy()
+    general = valid & (np.abs(1 + c) > tolerance) & (np.abs(1 - c) > tolerance)
+    rotations[general] += (
+        kmat[general]
+        + np.einsum("nij,njk->nik", kmat[general], kmat[general])
+        / (1 + c[general])[:, None, None]
+    )
+
+    antiparallel = valid & (np.abs(1 + c) <= tolerance)
+    if antiparallel.any():
+        a_anti = a[antiparallel]
+        # Cross with the coordinate axis least aligned with a for a stable axis.
+        axes = np.eye(3)[np.argmin(np.abs(a_anti), axis=1)]
+        u = np.cross(a_anti, axes)
+        u /= np.linalg.norm(u, axis=1, keepdims=True)
+        rotations[antiparallel] = 2 * np.einsum("ni,nj->nij", u, u) - np.eye(3)
+
+    return rotations
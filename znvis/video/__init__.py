@@ -20,6 +20,6 @@ Summary
 Video utilities for ZnVis.
 """
 
-from .video_manager import VideoManager
+from .video_manager import VideoManager, VideoStream
 
-__all__ = ["VideoManager"]
+__all__ = ["VideoManager", "VideoStream"]
@@ -21,11 +21,19 @@ Summary
 Video management utilities for ZnVis.
 """
 
+import multiprocessing as mp
+import os
 import pathlib
 import re
-from typing import List, Union
+import shutil
+import subprocess
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import Callable, Iterator, List, Optional, Sequence, Union
 
 import cv2
+import numpy as np
 from rich.progress import track
 
 
@@ -56,7 +64,17 @@ class VideoManager:
         "apng": "apng",  # Animated PNG (not widely supported)
     }
 
-    def __init__(self, output_folder: Union[str, pathlib.Path], frame_rate: int = 60):
+    # Containers whose segments ffmpeg can concatenate by stream copy
+    SEGMENT_FORMATS = {"mp4", "mov", "m4v", "mkv", "avi"}
+
+    def __init__(
+        self,
+        output_folder: Union[str, pathlib.Path],
+        frame_rate: int = 60,
+        decode_workers: Optional[int] = None,
+        prefetch_frames: int = 16,
+        encode_segments: int = 1,
+    ):
         """
         Initialize the VideoManager.
 
@@ -66,9 +84,29 @@ class VideoManager:
             Directory where videos will be saved
         frame_rate : int, default=60
             Frame rate for video export
+        decode_workers : int, optional
+            Number of threads decoding frames ahead of the video writer.
+            Defaults to the number of CPU cores, at most 8.
+        prefetch_frames : int, default=16
+            Maximum number of frames decoded ahead of the video writer, which
+            bounds the memory used for decoded frames.
+        encode_segments : int, default=1
+            Number of segments encoded in parallel processes when creating a
+            video from frames. The segments are joined without re-encoding by
+            ffmpeg, so this needs ffmpeg on the PATH and a format listed in
+            ``SEGMENT_FORMATS``. Otherwise the video is encoded in one piece.
+            Every segment process imports ZnVis first, so this pays off for
+            long or high-resolution videos.
         """
+        if prefetch_frames < 1:
+            raise ValueError("prefetch_frames must be greater than or equal to 1.")
+        if encode_segments < 1:
+            raise ValueError("encode_segments must be greater than or equal to 1.")
         self.output_folder = pathlib.Path(output_folder).resolve()
         self.frame_rate = frame_rate
+        self.decode_workers = decode_workers or min(8, os.cpu_count() or 1)
+        self.prefetch_frames = prefetch_frames
+        self.encode_segments = encode_segments
 
     @classmethod
     def get_supported_formats(cls) -> List[str]:
@@ -134,6 +172,282 @@ class VideoManager:
             )
             return "mp4"
 
+    def _decode_frames(
+        self, image_paths: List[str]
+    ) -> Iterator[tuple[str, Optional[np.ndarray]]]:
+        """
+        Decode frames on a thread pool and yield them in order.
+
+        OpenCV releases the GIL while decoding, so frames are decoded in
+        parallel. At most ``prefetch_frames`` frames are decoded ahead of the
+        consumer.
+
+        Yields
+        ------
+        tuple[str, Optional[np.ndarray]]
+            Path of the frame and its image, None if it could not be read.
+        """
+        with ThreadPoolExecutor(
+            max_workers=self.decode_workers, thread_name_prefix="znvis-decode"
+        ) as executor:
+            pending = deque()
+            try:
+                for image_path in image_paths:
+                    if len(pending) >= self.prefetch_frames:
+                        path, future = pending.popleft()
+                        yield path, future.result()
+                    pending.append(
+                        (image_path, executor.submit(cv2.imread, image_path))
+                    )
+                while pending:
+                    path, future = pending.popleft()
+                    yield path, future.result()
+            finally:
+                for _, future in pending:
+                    future.cancel()
+
+    def _open_writer(
+        self, video_name: str, video_format: str, width: int, height: int
+    ) -> tuple[cv2.VideoWriter, pathlib.Path]:
+        """
+        Open a video writer for frames of the given size.
+
+        Returns
+        -------
+        tuple[cv2.VideoWriter, pathlib.Path]
+            The opened writer and the path of the video file.
+
+        Raises
+        ------
+        RuntimeError
+            If the writer cannot be initialized
+        """
+        # Validate format and get codec
+        video_format = self.validate_video_format(video_format)
+        try:
+            codec = self.get_video_codec(video_format)
+            fourcc = cv2.VideoWriter_fourcc(*codec)
+        except ValueError as e:
+            print(f"Warning: {e}. Falling back to mp4v codec.")
+            fourcc = cv2.VideoWriter_fourcc(*"mp4v")
+            video_format = "mp4"
+
+        # Create output path
+        self.output_folder.mkdir(parents=True, exist_ok=True)
+        output_path = self.output_folder / f"{video_name}.{video_format}"
+
+        # Create video writer
+        video = cv2.VideoWriter(
+            output_path.as_posix(),
+            fourcc,
+            self.frame_rate,
+            (width, height),
+        )
+        if not video.isOpened():
+            raise RuntimeError(
+                f"Failed to initialize VideoWriter for '{output_path}' "
+                f"with codec '{codec}' at {width}x{height}@{self.frame_rate}fps."
+            )
+
+        return video, output_path
+
+    def _encode_frames(
+        self,
+        image_paths: List[str],
+        video_name: str,
+        video_format: str,
+        width: int,
+        height: int,
+        show_progress: bool = True,
+    ) -> pathlib.Path:
+        """
+        Encode frame files into one video with a single writer.
+
+        Returns
+        -------
+        pathlib.Path
+            Path to the created video file
+        """
+        video, output_path = self._open_writer(video_name, video_format, width, height)
+
+        frames = self._decode_frames(image_paths)
+        if show_progress:
+            frames = track(
+                frames, total=len(image_paths), description="Exporting Video..."
+            )
+
+        # Write frames to video
+        try:
+            for image_path, frame in frames:
+                if frame is None:
+                    print(f"Warning: Could not read frame {image_path}, skipping...")
+                    continue
+                video.write(frame)
+        except Exception as e:
+            raise RuntimeError(f"Error while writing video frames: {e}")
+        finally:
+            video.release()
+            cv2.destroyAllWindows()
+
+        return output_path
+
+    def _can_encode_segments(self, number_of_frames: int, video_format: str) -> bool:
+        """
+        Check whether a video can be encoded as parallel segments.
+        """
+        if self.encode_segments < 2 or number_of_frames < 2:
+            return False
+        if video_format.lower() not in self.SEGMENT_FORMATS:
+            print(
+                f"Warning: Segment encoding does not support '{video_format}', "
+                "encoding the video in one piece."
+            )
+            return False
+        if shutil.which("ffmpeg") is None:
+            print(
+                "Warning: Segment encoding needs ffmpeg to join the segments, "
+                "encoding the video in one piece."
+            )
+            return False
+        return True
+
+    def _encode_segments(
+        self,
+        image_paths: List[str],
+        video_name: str,
+        video_format: str,
+        width: int,
+        height: int,
+    ) -> pathlib.Path:
+        """
+        Encode contiguous segments in parallel processes and join them.
+
+        The segments use the same codec and frame size, so ffmpeg's concat
+        demuxer joins them by copying the streams.
+
+        Returns
+        -------
+        pathlib.Path
+            Path to the created video file
+        """
+        video_format = self.validate_video_format(video_format)
+        number_of_segments = min(self.encode_segments, len(image_paths))
+        bounds = [
+            round(index * len(image_paths) / number_of_segments)
+            for index in range(number_of_segments + 1)
+        ]
+
+        self.output_folder.mkdir(parents=True, exist_ok=True)
+        output_path = self.output_folder / f"{video_name}.{video_format}"
+        segment_folder = pathlib.Path(
+            tempfile.mkdtemp(prefix=f".{video_name}-segments-", dir=self.output_folder)
+        )
+        try:
+            with ProcessPoolExecutor(
+                max_workers=number_of_segments,
+                mp_context=mp.get_context("spawn"),
+            ) as executor:
+                futures = [
+                    executor.submit(
+                        _encode_video_segment,
+                        segment_folder,
+                        self.frame_rate,
+                        max(1, self.decode_workers // number_of_segments),
+                        self.prefetch_frames,
+                        image_paths[start:stop],
+                        f"segment_{index:0>4}",
+                        video_format,
+                        width,
+                        height,
+                    )
+                    for index, (start, stop) in enumerate(zip(bounds, bounds[1:]))
+                ]
+                for future in track(
+                    as_completed(futures),
+                    total=len(futures),
+                    description="Exporting Video...",
+                ):
+                    future.result()
+                segment_paths = [future.result() for future in futures]
+
+            segment_list = segment_folder / "segments.txt"
+            segment_list.write_text(
+                "".join(
+                    # Quotes are escaped as required by the concat demuxer.
+                    "file '{}'\n".format(path.as_posix().replace("'", "'\\''"))
+                    for path in segment_paths
+                )
+            )
+            result = subprocess.run(
+                [
+                    "ffmpeg",
+                    "-hide_banner",
+                    "-loglevel",
+                    "error",
+                    "-y",
+                    "-f",
+                    "concat",
+                    "-safe",
+                    "0",
+                    "-i",
+                    segment_list.as_posix(),
+                    "-c",
+                    "copy",
+                    output_path.as_posix(),
+                ],
+                capture_output=True,
+                text=True,
+            )
+            if result.returncode != 0:
+                raise RuntimeError(
+                    f"Failed to join the video segments: {result.stderr.strip()}"
+                )
+        finally:
+            shutil.rmtree(segment_folder, ignore_errors=True)
+
+        return output_path
+
+    def open_video_stream(
+        self,
+        frame_indices: Sequence[int],
+        video_name: str = "ZnVis-Video",
+        video_format: str = "mp4",
+        frame_loader: Optional[Callable[[int], np.ndarray]] = None,
+        max_buffered_frames: Optional[int] = None,
+    ) -> "VideoStream":
+        """
+        Open a video that is encoded while its frames are being rendered.
+
+        Parameters
+        ----------
+        frame_indices : Sequence[int]
+            Indices of all frames of the video, in video order.
+        video_name : str, default="ZnVis-Video"
+            Name of the output video (without extension)
+        video_format : str, default="mp4"
+            Video format extension
+        frame_loader : Callable[[int], np.ndarray], optional
+            Returns the BGR image of a frame that was added without an image,
+            e.g. by reading it from disk.
+        max_buffered_frames : int, optional
+            Maximum number of out-of-order images kept in memory, further ones
+            are moved to disk until it is their turn. Defaults to
+            ``prefetch_frames``.
+
+        Returns
+        -------
+        VideoStream
+            Stream accepting the frames in any order.
+        """
+        return VideoStream(
+            self,
+            frame_indices,
+            video_name,
+            video_format,
+            frame_loader,
+            max_buffered_frames=max_buffered_frames,
+        )
+
     def create_video_from_frames(
         self,
         frame_folder: Union[str, pathlib.Path],
@@ -188,48 +502,15 @@ class VideoManager:
             raise RuntimeError(f"Could not read first frame: {first_image_path}")
         height, width = single_frame.shape[:2]
 
-        # Validate format and get codec
-        video_format = self.validate_video_format(video_format)
-        try:
-            codec = self.get_video_codec(video_format)
-            fourcc = cv2.VideoWriter_fourcc(*codec)
-        except ValueError as e:
-            print(f"Warning: {e}. Falling back to mp4v codec.")
-            fourcc = cv2.VideoWriter_fourcc(*"mp4v")
-            video_format = "mp4"
-
-        # Create output path
-        self.output_folder.mkdir(parents=True, exist_ok=True)
-        output_path = self.output_folder / f"{video_name}.{video_format}"
-
-        # Create video writer
-        video = cv2.VideoWriter(
-            output_path.as_posix(),
-            fourcc,
-            self.frame_rate,
-            (width, height),
-        )
-        if not video.isOpened():
-            raise RuntimeError(
-                f"Failed to initialize VideoWriter for '{output_path}' "
-                f"with codec '{codec}' at {width}x{height}@{self.frame_rate}fps."
+        image_paths = [img.as_posix() for img in images]
+        if self._can_encode_segments(len(image_paths), video_format):
+            output_path = self._encode_segments(
+                image_paths, video_name, video_format, width, height
+            )
+        else:
+            output_path = self._encode_frames(
+                image_paths, video_name, video_format, width, height
             )
-
-        # Write frames to video
-        try:
-            for image_path in track(
-                [img.as_posix() for img in images], description="Exporting Video..."
-            ):
-                frame = cv2.imread(image_path)
-                if frame is None:
-                    print(f"Warning: Could not read frame {image_path}, skipping...")
-                    continue
-                video.write(frame)
-        except Exception as e:
-            raise RuntimeError(f"Error while writing video frames: {e}")
-        finally:
-            video.release()
-            cv2.destroyAllWindows()
 
         print(f"Video successfully created: {output_path}")
 
@@ -286,3 +567,232 @@ class VideoManager:
             cap.release()
 
         return info
+
+
+def _encode_video_segment(
+    segment_folder: pathlib.Path,
+    frame_rate: int,
+    decode_workers: int,
+    prefetch_frames: int,
+    image_paths: List[str],
+    segment_name: str,
+    video_format: str,
+    width: int,
+    height: int,
+) -> pathlib.Path:
+    """
+    Encode one segment of a video inside a worker process.
+    """
+    manager = VideoManager(
+        segment_folder,
+        frame_rate=frame_rate,
+        decode_workers=decode_workers,
+        prefetch_frames=prefetch_frames,
+    )
+    return manager._encode_frames(
+        image_paths, segment_name, video_format, width, height, show_progress=False
+    )
+
+
+class VideoStream:
+    """
+    Video encoded while its frames are being produced.
+
+    Frames may be added in any order. They are held in a reorder buffer until
+    all earlier frames of the video have been encoded, so the video is written
+    in order without reading the frames back from disk.
+    Frames added without an image are loaded with the frame loader once it is
+    their turn, which keeps frames stored on disk out of the buffer. At most
+    ``max_buffered_frames`` images are kept in memory; if an early frame is
+    slow, the images needed last are moved to a temporary folder instead.
+    """
+
+    def __init__(
+        self,
+        manager: VideoManager,
+        frame_indices: Sequence[int],
+        video_name: str = "ZnVis-Video",
+        video_format: str = "mp4",
+        frame_loader: Optional[Callable[[int], np.ndarray]] = None,
+        max_buffered_frames: Optional[int] = None,
+    ):
+        """
+        Initialize the stream. Prefer ``VideoManager.open_video_stream``.
+
+        Parameters
+        ----------
+        manager : VideoManager
+            Manager providing output folder, frame rate and codecs.
+        frame_indices : Sequence[int]
+            Indices of all frames of the video, in video order.
+        video_name : str, default="ZnVis-Video"
+            Name of the output video (without extension)
+        video_format : str, default="mp4"
+            Video format extension
+        frame_loader : Callable[[int], np.ndarray], optional
+            Returns the BGR image of a frame that was added without an image.
+        max_buffered_frames : int, optional
+            Maximum number of out-of-order images kept in memory. Defaults to
+            the ``prefetch_frames`` of the manager.
+        """
+        if max_buffered_frames is None:
+            max_buffered_frames = manager.prefetch_frames
+        if max_buffered_frames < 0:
+            raise ValueError("max_buffered_frames must not be negative.")
+        self.manager = manager
+        self.frame_indices = list(frame_indices)
+        self.video_name = video_name
+        self.video_format = video_format
+        self.frame_loader = frame_loader
+        self.max_buffered_frames = max_buffered_frames
+        self.output_path = None
+
+        self._positions = {
+            frame_index: position
+            for position, frame_index in enumerate(self.frame_indices)
+        }
+        self._video = None
+        self._next = 0
+        self._buffer = {}
+        self._buffered_images = 0
+        self._spill_folder = None
+
+    def __enter__(self) -> "VideoStream":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self._release()
+
+    @property
+    def frames_written(self) -> int:
+        """
+        Number of frames encoded so far.
+        """
+        return self._next
+
+    def add_frame(self, frame_index: int, image: Optional[np.ndarray] = None):
+        """
+        Add a frame and encode all frames that are now in order.
+
+        Frames that were already encoded are ignored, so a frame may be added
+        again, e.g. when rendering is retried.
+
+        Parameters
+        ----------
+        frame_index : int
+            Index of the frame in ``frame_indices``.
+        image : np.ndarray, optional
+            8-bit BGR image. If None, the frame loader provides it when the
+            frame is encoded.
+        """
+        if frame_index not in self._positions:
+            raise ValueError(f"Frame {frame_index} is not part of the video.")
+        if image is None and self.frame_loader is None:
+            raise ValueError("Frames without an image require a frame_loader.")
+        if self._positions[frame_index] < self._next:
+            return
+        self._discard(self._buffer.get(frame_index))
+        self._buffer[frame_index] = image
+        if isinstance(image, np.ndarray):
+            self._buffered_images += 1
+
+        while (
+            self._next < len(self.frame_indices)
+            and self.frame_indices[self._next] in self._buffer
+        ):
+            frame_index = self.frame_indices[self._next]
+            image = self._buffer.pop(frame_index)
+            if image is None:
+                image = self.frame_loader(frame_index)
+            elif isinstance(image, pathlib.Path):
+                spilled_path, image = image, np.load(image)
+                spilled_path.unlink()
+            else:
+                self._buffered_images -= 1
+            self._write(image)
+            self._next += 1
+
+        if self._buffered_images > self.max_buffered_frames:
+            self._spill()
+
+    def close(self) -> pathlib.Path:
+        """
+        Finish the video.
+
+        Returns
+        -------
+        pathlib.Path
+            Path to the created video file
+
+        Raises
+        ------
+        RuntimeError
+            If the video has no frames or frames were never added
+        """
+        self._release()
+        if not self.frame_indices:
+            raise RuntimeError("No frames were selected for the video stream.")
+        missing = len(self.frame_indices) - self._next
+        if missing:
+            raise RuntimeError(
+                f"Video stream closed with {missing} missing frames, starting "
+                f"at frame {self.frame_indices[self._next]}."
+            )
+        print(f"Video successfully created: {self.output_path}")
+        return self.output_path
+
+    def _spill(self) -> None:
+        """
+        Move the buffered images needed last to disk until the bound holds.
+        """
+        if self._spill_folder is None:
+            self.manager.output_folder.mkdir(parents=True, exist_ok=True)
+            self._spill_folder = pathlib.Path(
+                tempfile.mkdtemp(
+                    prefix=f".{self.video_name}-buffer-",
+                    dir=self.manager.output_folder,
+                )
+            )
+        in_memory = sorted(
+            (
+                frame_index
+                for frame_index, image in self._buffer.items()
+                if isinstance(image, np.ndarray)
+            ),
+            key=self._positions.get,
+        )
+        for frame_index in in_memory[self.max_buffered_frames :]:
+            path = self._spill_folder / f"frame_{frame_index}.npy"
+            np.save(path, self._buffer[frame_index])
+            self._buffer[frame_index] = path
+            self._buffered_images -= 1
+
+    def _discard(self, image) -> None:
+        """
+        Drop a buffered image that is replaced or no longer needed.
+        """
+        if isinstance(image, pathlib.Path):
+            image.unlink(missing_ok=True)
+        elif isinstance(image, np.ndarray):
+            self._buffered_images -= 1
+
+    def _write(self, image: np.ndarray) -> None:
+        if self._video is None:
+            height, width = image.shape[:2]
+            self._video, self.output_path = self.manager._open_writer(
+                self.video_name, self.video_format, width, height
+            )
+        self._video.write(image)
+
+    def _release(self) -> None:
+        self._buffer.clear()
+        self._buffered_images = 0
+        if self._spill_folder is not None:
+            shutil.rmtree(self._spill_folder, ignore_errors=True)
+            self._spill_folder = None
+        if self._video is not None:
+            self._video.release()
+            self._video = None
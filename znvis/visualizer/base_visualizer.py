@@ -26,7 +26,12 @@ import pathlib
 import typing
 from numbers import Integral
 
+import numpy as np
+import open3d as o3d
+
 import znvis
+from znvis.mesh import Mesh
+from znvis.parallel_render.parallel_render_manager import CPU_THREADS_PER_WORKER
 from znvis.rendering import Mitsuba
 from znvis.video import VideoManager
 
@@ -35,27 +40,199 @@ def build_mesh_dict_for_frame(
     particles: typing.List[znvis.Particle],
     vector_field: typing.List[znvis.VectorField] | None,
     frame_index: int,
+    instanced: typing.Callable[[Mesh], bool] | None = None,
+    static_entries: dict | None = None,
+    visible: typing.Callable[[np.ndarray, float], np.ndarray] | None = None,
+    analytic: typing.Callable[[Mesh], bool] | None = None,
 ) -> dict:
     """
     Build the renderer mesh dictionary for a specific frame.
+
+    Parameters
+    ----------
+    particles : list[Particle]
+            Particles of the scene.
+    vector_field : list[VectorField] | None
+            Vector fields of the scene.
+    frame_index : int
+            Frame to build.
+    instanced : callable (default = None)
+            Tells whether the renderer instances a mesh, e.g.
+            ``Mitsuba.renders_instances``. Uniformly coloured particles with
+            such a mesh are described by their template and per-particle
+            transforms instead of a combined mesh.
+    static_entries : dict (default = None)
+            Entries of static items built for earlier frames of the same
+            render, keyed by item name. Static items are built once and then
+            taken from here, only items with changing colours are repainted.
+            The same entry object is returned on every frame, so renderers
+            can skip unchanged items.
+    visible : callable (default = None)
+            Frustum test of the frame, taking bounding sphere centers and a
+            radius and returning which spheres are in view, e.g. a partial of
+            ``Mitsuba.visible_spheres``. Particles built per frame are culled
+            before their meshes are built, particles without any in view are
+            left out. Instanced and analytic particles are shrunk to a point
+            instead, so their number stays the same from frame to frame.
+            Static items and vector fields are never culled.
+    analytic : callable (default = None)
+            Tells whether the renderer draws a mesh as analytic shapes, e.g.
+            ``Mitsuba.renders_analytic``. Unsmoothed particles with such a
+            mesh are described by their per-particle transforms and colours
+            instead of a combined mesh.
     """
     mesh_dict = {}
     items = (vector_field or []) + particles
     for item in items:
-        idx = 0 if item.static else frame_index
-        mesh = (
-            item.mesh_list[idx]
-            if item.mesh_list is not None
-            else item.get_mesh_for_frame(frame_index)
-        )
-        mesh_dict[item.name] = {
-            "mesh": mesh,
-            "bsdf": item.mesh.material.mitsuba_bsdf,
-            "material": item.mesh.o3d_material,
-        }
+        if not item.static or static_entries is None:
+            entry = _build_item_entry(item, frame_index, instanced, visible, analytic)
+            if entry is not None:
+                mesh_dict[item.name] = entry
+            continue
+
+        if item.name not in static_entries:
+            static_entries[item.name] = _build_item_entry(
+                item, 0, instanced, None, analytic
+            )
+        entry = static_entries[item.name]
+        if item.has_dynamic_colour and "mesh" not in entry:
+            entry = dict(entry, colours=item.get_instance_colours(frame_index))
+        elif item.has_dynamic_colour:
+            # Paint a copy, the cached mesh may still be rendering.
+            mesh = item.paint_mesh(
+                o3d.geometry.TriangleMesh(entry["mesh"]), frame_index
+            )
+            entry = build_mesh_entry(item, mesh)
+        mesh_dict[item.name] = entry
     return mesh_dict
 
 
+def _build_item_entry(
+    item: znvis.Particle | znvis.VectorField,
+    frame_index: int,
+    instanced: typing.Callable[[Mesh], bool] | None,
+    visible: typing.Callable[[np.ndarray, float], np.ndarray] | None,
+    analytic: typing.Callable[[Mesh], bool] | None = None,
+) -> dict | None:
+    """
+    Build the renderer entry of one item in a frame, None if it is not in view.
+    """
+    in_view = None
+    if (
+        visible is not None
+        and isinstance(item, znvis.Particle)
+        and not item.static
+        and item.mesh_list is None
+    ):
+        positions, _ = item.get_frame_data(frame_index)
+        in_view = visible(
+            positions + item.mesh.get_template().pivot,
+            item.mesh.bounding_radius(smoothing=item.smoothing),
+        )
+
+    if (
+        analytic is not None
+        and isinstance(item, znvis.Particle)
+        and not item.smoothing
+        and analytic(item.mesh)
+    ):
+        return _park_culled_instances(build_analytic_entry(item, frame_index), in_view)
+
+    if (
+        instanced is not None
+        and isinstance(item, znvis.Particle)
+        and item.mesh.material.colour.ndim != 3
+        and instanced(item.mesh)
+    ):
+        return _park_culled_instances(build_instanced_entry(item, frame_index), in_view)
+
+    # Combined meshes lose the culled particles, which changes their vertex
+    # count and makes a persistent renderer reload its scene.
+    selection = None
+    if in_view is not None:
+        if not in_view.any():
+            return None
+        if not in_view.all():
+            selection = np.flatnonzero(in_view)
+
+    idx = 0 if item.static else frame_index
+    if item.mesh_list is not None:
+        mesh = item.mesh_list[idx]
+    elif selection is not None:
+        mesh = item.get_mesh_for_frame(frame_index, selection=selection)
+    else:
+        mesh = item.get_mesh_for_frame(frame_index)
+    if item.static and item.has_dynamic_colour:
+        mesh = item.paint_mesh(mesh, frame_index)
+    return build_mesh_entry(item, mesh)
+
+
+def _park_culled_instances(entry: dict, in_view: np.ndarray | None) -> dict:
+    """
+    Shrink the instances of an entry that are not in view to a point.
+
+    Culled instances keep their place, so a renderer is passed the same
+    number of instances every frame and can update its scene in place.
+    """
+    if in_view is not None:
+        entry["instances"][~in_view, :3, :3] = 0.0
+    return entry
+
+
+def build_mesh_entry(
+    item: znvis.Particle | znvis.VectorField, mesh: o3d.geometry.TriangleMesh
+) -> dict:
+    """
+    Describe the frame mesh of an item for the renderer.
+
+    The primitive is the mesh every instance was created from. It is left out
+    for smoothed items, whose instances no longer match it.
+    """
+    return {
+        "mesh": mesh,
+        "bsdf": item.mesh.material.mitsuba_bsdf,
+        "material": item.mesh.o3d_material,
+        "primitive": None if item.smoothing else item.mesh,
+    }
+
+
+def build_instanced_entry(
+    item: znvis.Particle, frame_index: int, selection: np.ndarray | None = None
+) -> dict:
+    """
+    Describe the particles of a frame as instances of their mesh template.
+
+    Only the template and one transform per particle are kept, the combined
+    mesh is never built. A selection limits the instances to those particles.
+    """
+    return {
+        "template": item.mesh.get_template(smoothing=item.smoothing),
+        "instances": item.get_instance_transforms(frame_index, selection=selection),
+        "bsdf": item.mesh.material.mitsuba_bsdf,
+        "material": item.mesh.o3d_material,
+        "primitive": item.mesh,
+    }
+
+
+def build_analytic_entry(
+    item: znvis.Particle, frame_index: int, selection: np.ndarray | None = None
+) -> dict:
+    """
+    Describe the particles of a frame for drawing as analytic shapes.
+
+    Only one transform and, for painted particles, one colour per particle
+    are kept, the combined mesh is never built. A selection limits the
+    particles to those in it.
+    """
+    return {
+        "instances": item.get_instance_transforms(frame_index, selection=selection),
+        "colours": item.get_instance_colours(frame_index, selection=selection),
+        "bsdf": item.mesh.material.mitsuba_bsdf,
+        "material": item.mesh.o3d_material,
+        "primitive": item.mesh,
+    }
+
+
 def _detect_available_gpu_devices() -> int:
     """
     Detect number of visible CUDA GPU devices.
@@ -87,6 +264,67 @@ def _detect_available_gpu_devices() -> int:
     return 0
 
 
+def _detect_available_cpu_cores() -> int:
+    """
+    Detect number of CPU cores available to this process.
+    """
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def resolve_parallel_render_settings(
+    parallel_render_workers: int | None = None,
+    parallel_render_device: str | None = None,
+) -> tuple[str, int, int]:
+    """
+    Resolve the device and worker count of parallel rendering.
+
+    Parameters
+    ----------
+    parallel_render_workers : int, optional
+            Requested number of workers. If ``None``, one worker per visible GPU,
+            or one worker per four CPU cores when rendering on the CPU.
+    parallel_render_device : str, optional
+            ``"cuda"``, ``"cpu"`` or ``None`` to use CUDA when a GPU is visible.
+
+    Returns
+    -------
+    device : str
+            Resolved render device.
+    workers : int
+            Resolved number of workers.
+    available_gpu_devices : int
+            Number of visible CUDA GPUs.
+    """
+    available_gpu_devices = _detect_available_gpu_devices()
+    if parallel_render_device is None:
+        parallel_render_device = "cuda" if available_gpu_devices else "cpu"
+    elif parallel_render_device not in ("cuda", "cpu"):
+        raise ValueError(
+            "parallel_render_device must be 'cuda', 'cpu' or None for "
+            "automatic selection."
+        )
+    if parallel_render_workers is None:
+        if parallel_render_device == "cuda":
+            parallel_render_workers = max(1, available_gpu_devices)
+        else:
+            parallel_render_workers = max(
+                1, _detect_available_cpu_cores() // CPU_THREADS_PER_WORKER
+            )
+    elif not isinstance(parallel_render_workers, Integral) or isinstance(
+        parallel_render_workers, bool
+    ):
+        raise ValueError(
+            "parallel_render_workers must be an integer (not a boolean) "
+            "greater than or equal to 1, or None for automatic selection."
+        )
+    if parallel_render_workers < 1:
+        raise ValueError("parallel_render_workers must be greater than or equal to 1.")
+
+    return parallel_render_device, int(parallel_render_workers), available_gpu_devices
+
+
 class BaseVisualizer:
     """
     Base class for visualizers containing shared functionality.
@@ -137,6 +375,11 @@ class BaseVisualizer:
         renderer: Mitsuba | None = None,
         parallel_render_workers: int | None = None,
         parallel_render: bool = False,
+        mesh_build_workers: int = 1,
+        parallel_render_device: str | None = None,
+        video_decode_workers: int | None = None,
+        video_prefetch_frames: int = 16,
+        video_encode_segments: int = 1,
     ):
         """
         Initialize the base visualizer.
@@ -171,13 +414,30 @@ class BaseVisualizer:
                 The renderer engine to use for rendering.
         parallel_render_workers : int, optional
                 Number of worker processes to use for headless parallel
-                rendering. If ``None``, ZnVis uses one worker per visible GPU.
+                rendering. If ``None``, ZnVis uses one worker per visible GPU,
+                or one worker per four CPU cores when rendering on the CPU.
                 Only add more workers than visible GPUs if you exactly know what you're
                 doing. Only implemented as experimental feature!
         parallel_render : bool, optional
-                If ``True``, enables headless parallel rendering. If no visible
-                CUDA GPU is available, ZnVis warns and falls back to serial
+                If ``True``, enables headless parallel rendering. If the workers
+                cannot be started, ZnVis warns and falls back to serial
                 rendering.
+        mesh_build_workers : int, optional
+                Number of processes used to construct the mesh lists of all
+                particles and vector fields when meshes are built eagerly.
+        parallel_render_device : str, optional
+                Device of the parallel render workers, either ``"cuda"`` for one
+                worker per visible GPU or ``"cpu"`` for LLVM workers on disjoint
+                partitions of the CPU cores. If ``None``, CUDA is used when a GPU
+                is visible and the CPU otherwise.
+        video_decode_workers : int, optional
+                Number of threads decoding frames for the video writer. If
+                ``None``, the number of CPU cores, at most 8.
+        video_prefetch_frames : int, optional
+                Maximum number of frames decoded ahead of the video writer.
+        video_encode_segments : int, optional
+                Number of segments of a video created from frames that are
+                encoded in parallel processes and joined by ffmpeg.
         """
         self.particles = particles
         self.vector_field = vector_field
@@ -207,26 +467,25 @@ class BaseVisualizer:
         )
         self.renderer_spp = renderer_spp
         self.renderer = renderer or Mitsuba()
-        self.available_gpu_devices = _detect_available_gpu_devices()
-        if parallel_render_workers is None:
-            parallel_render_workers = max(1, self.available_gpu_devices)
-        elif not isinstance(parallel_render_workers, Integral) or isinstance(
-            parallel_render_workers, bool
-        ):
-            raise ValueError(
-                "parallel_render_workers must be an integer (not a boolean) "
-                "greater than or equal to 1, or None for automatic selection."
-            )
-        if parallel_render_workers < 1:
-            raise ValueError(
-                "parallel_render_workers must be greater than or equal to 1."
-            )
-        self.parallel_render_workers = int(parallel_render_workers)
+        (
+            self.parallel_render_device,
+            self.parallel_render_workers,
+            self.available_gpu_devices,
+        ) = resolve_parallel_render_settings(
+            parallel_render_workers, parallel_render_device
+        )
         self.parallel_render = parallel_render
+        if mesh_build_workers < 1:
+            raise ValueError("mesh_build_workers must be greater than or equal to 1.")
+        self.mesh_build_workers = int(mesh_build_workers)
 
         # Initialize video manager
         self.video_manager = VideoManager(
-            output_folder=self.output_folder, frame_rate=self.frame_rate
+            output_folder=self.output_folder,
+            frame_rate=self.frame_rate,
+            decode_workers=video_decode_workers,
+            prefetch_frames=video_prefetch_frames,
+            encode_segments=video_encode_segments,
         )
         # Validate video format
         self.video_format = self.video_manager.validate_video_format(video_format)
@@ -262,7 +521,7 @@ class BaseVisualizer:
         """
         # Build the mesh dict for each particle
         for item in self.particles:
-            item.construct_mesh_list()
+            item.construct_mesh_list(workers=self.mesh_build_workers)
 
     def _initialize_vector_field(self):
         """
@@ -272,7 +531,7 @@ class BaseVisualizer:
         """
         if self.vector_field is not None:
             for item in self.vector_field:
-                item.construct_mesh_list()
+                item.construct_mesh_list(workers=self.mesh_build_workers)
 
     def _update_particles(self, visualizer=None, step: int = None):
         """
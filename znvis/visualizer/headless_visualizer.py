@@ -21,23 +21,34 @@ Summary
 Main visualizer class.
 """
 
+import functools
 import os
 
 os.environ["OPENCV_IO_ENABLE_OPENEXR"] = "1"
 
 import pathlib
+import re
+import time
 import typing
 
+import cv2
 import numpy as np
 from rich.progress import Progress
 
 import znvis
 from znvis import cameras
+from znvis.parallel_render.frame_queue import FrameLeaseQueue
 from znvis.parallel_render.parallel_render_manager import (
+    DEFAULT_FRAME_TIMEOUT,
+    DEFAULT_HEARTBEAT_TIMEOUT,
+    DEFAULT_QUEUE_DEPTH,
     make_spawn_safe_render_items,
     render_frames_parallel,
 )
+from znvis.parallel_render.render_server import RenderServer
 from znvis.rendering import Mitsuba
+from znvis.rendering.frame_pipeline import FramePipeline
+from znvis.video import VideoStream
 from znvis.visualizer.base_visualizer import BaseVisualizer, build_mesh_dict_for_frame
 
 
@@ -72,6 +83,18 @@ class HeadlessVisualizer(BaseVisualizer):
         camera: cameras.BaseCamera | None = None,
         parallel_render_workers: int | None = None,
         parallel_render: bool = False,
+        parallel_render_device: str | None = None,
+        render_server: RenderServer | None = None,
+        parallel_render_state_dir: str | pathlib.Path | None = None,
+        stream_video: bool = False,
+        frustum_culling: bool = False,
+        frustum_culling_margin: float = 0.0,
+        video_decode_workers: int | None = None,
+        video_prefetch_frames: int = 16,
+        video_encode_segments: int = 1,
+        parallel_render_queue_depth: int = DEFAULT_QUEUE_DEPTH,
+        parallel_render_heartbeat_timeout: float = DEFAULT_HEARTBEAT_TIMEOUT,
+        parallel_render_frame_timeout: float | None = DEFAULT_FRAME_TIMEOUT,
     ):
         """
         Constructor for the visualizer.
@@ -110,11 +133,64 @@ class HeadlessVisualizer(BaseVisualizer):
                 will be used.
         parallel_render_workers : int
                 Number of worker processes to use when ``parallel_render`` is
-                enabled. If ``None``, ZnVis uses one worker per visible GPU.
+                enabled. If ``None``, ZnVis uses one worker per visible GPU, or
+                one worker per four CPU cores when rendering on the CPU.
         parallel_render : bool
                 If ``True``, render frames through isolated worker subprocesses.
-                If no visible CUDA GPU is available, ZnVis warns and falls back
+                If the workers cannot be started, ZnVis warns and falls back
                 to serial rendering.
+        parallel_render_device : str
+                ``"cuda"`` or ``"cpu"``. CPU workers render with the LLVM variant,
+                each on its own partition of the CPU cores. If ``None``, CUDA is
+                used when a GPU is visible and the CPU otherwise.
+        render_server : znvis.RenderServer
+                Running render server whose warm workers render the frames
+                instead of workers started for this call.
+        parallel_render_state_dir : str | pathlib.Path
+                Folder in which the state of the parallel render workers is
+                written for the duration of a render. Workers memory-map the
+                large trajectory arrays from there, so it should be on disk
+                rather than on a RAM-backed ``/tmp``. If None, the output
+                folder is used.
+        stream_video : bool
+                If True, frames are encoded into the video as they are rendered
+                instead of being read back from disk once all are done. Rendered
+                frames are only kept on disk if ``keep_frames`` is True. Parallel
+                workers still write every frame as a PNG file, which the stream
+                reads back once all earlier frames are encoded.
+        frustum_culling : bool
+                If True, particles whose bounding sphere is outside the view of
+                the camera are dropped before their meshes are built, which
+                makes close-ups of large systems cheaper. Static particles and
+                vector fields are always built. Instanced and analytic
+                particles are shrunk to a point instead of dropped, so a
+                persistent scene is still updated in place; dropping particles
+                of a combined mesh reloads it. Culling is skipped if the
+                renderer does not take its camera from the view matrix.
+        frustum_culling_margin : float
+                Distance by which the bounding spheres are grown for culling.
+                Particles just outside the view can still cast shadows or show
+                in reflections, a margin keeps them.
+        video_decode_workers : int
+                Number of threads decoding frames for the video writer. If None,
+                the number of CPU cores, at most 8.
+        video_prefetch_frames : int
+                Maximum number of frames decoded ahead of the video writer.
+        video_encode_segments : int
+                Number of segments of a video created from frames that are
+                encoded in parallel processes and joined by ffmpeg. Streamed
+                videos are always encoded in one piece.
+        parallel_render_queue_depth : int
+                Number of frames queued per parallel render worker, so that
+                workers never wait for the scheduler between frames.
+        parallel_render_heartbeat_timeout : float
+                Seconds without heartbeat after which a busy parallel render
+                worker counts as hung.
+        parallel_render_frame_timeout : float | None
+                Seconds without a finished frame after which a busy parallel
+                render worker counts as stuck. None, the default, disables the
+                deadline, as slow renders cannot be told apart from stuck ones.
+                A render server uses its own queue depth and timeouts.
         """
         # Call parent constructor
         super().__init__(
@@ -132,10 +208,26 @@ class HeadlessVisualizer(BaseVisualizer):
             renderer=renderer,
             parallel_render_workers=parallel_render_workers,
             parallel_render=parallel_render,
+            parallel_render_device=parallel_render_device,
+            video_decode_workers=video_decode_workers,
+            video_prefetch_frames=video_prefetch_frames,
+            video_encode_segments=video_encode_segments,
         )
 
         # Headless-specific attributes
         self.do_create_video = do_create_video
+        self.render_server = render_server
+        self.parallel_render_state_dir = (
+            self.output_folder
+            if parallel_render_state_dir is None
+            else pathlib.Path(parallel_render_state_dir).resolve()
+        )
+        self.parallel_render_queue_depth = parallel_render_queue_depth
+        self.parallel_render_heartbeat_timeout = parallel_render_heartbeat_timeout
+        self.parallel_render_frame_timeout = parallel_render_frame_timeout
+        self.stream_video = stream_video
+        self.frustum_culling = frustum_culling
+        self.frustum_culling_margin = frustum_culling_margin
         self.app = None
         self.vis = None
 
@@ -153,36 +245,118 @@ class HeadlessVisualizer(BaseVisualizer):
                 [[1, 0, 0, -100], [0, 1, 0, -90], [0, 0, 1, -230], [0, 0, 0, 1]]
             )
 
-    def _render_frame(self, frame_index: int, renderer: Mitsuba | None = None):
+    def _build_frame(
+        self,
+        frame_index: int,
+        renderer: Mitsuba | None = None,
+        static_entries: dict | None = None,
+    ) -> tuple[dict, np.ndarray]:
         """
-        Render a single frame by index.
+        Build the mesh dict and view matrix of a frame.
 
         Parameters
         ----------
         frame_index : int
-                Frame index to render.
+                Frame index to build.
         renderer : Mitsuba, optional
-                Renderer instance to use. Defaults to the visualizer renderer.
+                Renderer the frame is built for. Defaults to the visualizer
+                renderer.
+        static_entries : dict, optional
+                Cache of the static items shared by the frames of one render.
+
+        Returns
+        -------
+        mesh_dict : dict
+                Meshes of the frame keyed by item name.
+        view_matrix : np.ndarray
+                View matrix of the frame.
         """
-        mesh_dict = build_mesh_dict_for_frame(
-            particles=self.particles,
-            vector_field=self.vector_field,
-            frame_index=frame_index,
-        )
+        renderer = renderer or self.renderer
         view_matrix = (
             self.camera.get_view_matrix(frame_index)
             if self.camera is not None
             else self.view_matrix
         )
-        (renderer or self.renderer).render_mesh_objects(
+        visible = None
+        # A custom sensor decides what is seen, not the Open3D view.
+        if self.frustum_culling and renderer.update_camera:
+            visible = functools.partial(
+                renderer.visible_spheres,
+                view_matrix=view_matrix,
+                resolution=self.renderer_resolution,
+                margin=self.frustum_culling_margin,
+            )
+        mesh_dict = build_mesh_dict_for_frame(
+            particles=self.particles,
+            vector_field=self.vector_field,
+            frame_index=frame_index,
+            instanced=renderer.renders_instances,
+            analytic=renderer.renders_analytic,
+            static_entries=static_entries,
+            visible=visible,
+        )
+        return mesh_dict, view_matrix
+
+    def _render_built_frame(
+        self, frame_index: int, built: tuple, renderer: Mitsuba | None = None
+    ):
+        """
+        Render a frame built by ``_build_frame`` into an in-memory image.
+        """
+        mesh_dict, view_matrix = built
+        return (renderer or self.renderer).render_image(
             mesh_dict,
             view_matrix,
-            save_dir=self.frame_folder,
-            save_name=f"frame_{frame_index:0>6}.png",
             resolution=self.renderer_resolution,
             samples_per_pixel=self.renderer_spp,
         )
 
+    def _write_frame(
+        self, frame_index: int, image, video_stream: VideoStream | None = None
+    ) -> None:
+        """
+        Write a rendered frame to the frame folder and the video stream.
+
+        With a video stream, the frame is only written to disk if frames are
+        kept.
+        """
+        if video_stream is None or self.keep_frames:
+            Mitsuba.write_image(
+                image,
+                save_dir=self.frame_folder,
+                save_name=f"frame_{frame_index:0>6}.png",
+            )
+        if video_stream is not None:
+            # OpenCV encodes BGR images.
+            video_stream.add_frame(
+                frame_index, Mitsuba.image_to_array(image)[..., ::-1]
+            )
+
+    def _read_frame(self, frame_index: int) -> np.ndarray:
+        """
+        Read a frame written to the frame folder as a BGR image.
+        """
+        path = self.frame_folder / f"frame_{frame_index:0>6}.png"
+        image = cv2.imread(path.as_posix())
+        if image is None:
+            raise RuntimeError(f"Could not read frame {path}")
+        return image
+
+    def _render_frame(self, frame_index: int, renderer: Mitsuba | None = None):
+        """
+        Render a single frame by index.
+
+        Parameters
+        ----------
+        frame_index : int
+                Frame index to render.
+        renderer : Mitsuba, optional
+                Renderer instance to use. Defaults to the visualizer renderer.
+        """
+        built = self._build_frame(frame_index, renderer=renderer)
+        image = self._render_built_frame(frame_index, built, renderer=renderer)
+        self._write_frame(frame_index, image)
+
     def _resolve_frame_indices(
         self,
         frame_indices: typing.Sequence[int] | None = None,
@@ -240,9 +414,17 @@ class HeadlessVisualizer(BaseVisualizer):
             if not (self.frame_folder / f"frame_{frame_index:0>6}.png").exists()
         ]
 
-    def _render_frames_serial(self, frame_indices: typing.Sequence[int] | None = None):
+    def _render_frames_serial(
+        self,
+        frame_indices: typing.Sequence[int] | None = None,
+        video_stream: VideoStream | None = None,
+    ):
         """
-        Render selected frames sequentially in the main process.
+        Render selected frames in the main process.
+
+        Frames are rendered one after another, but the meshes of the next frame
+        are built and the previous frame is written while a frame renders.
+        Static items are built once for all frames.
         """
         selected_frame_indices = (
             list(range(self.number_of_steps))
@@ -253,22 +435,72 @@ class HeadlessVisualizer(BaseVisualizer):
             task = progress.add_task(
                 "Saving scenes...", total=len(selected_frame_indices)
             )
-            for frame_index in selected_frame_indices:
-                self._render_frame(frame_index)
-                progress.update(task, advance=1)
+            with FramePipeline(
+                functools.partial(self._build_frame, static_entries={}),
+                self._render_built_frame,
+                (
+                    self._write_frame
+                    if video_stream is None
+                    else functools.partial(self._write_frame, video_stream=video_stream)
+                ),
+                on_written=lambda _: progress.update(task, advance=1),
+            ) as pipeline:
+                for frame_index in selected_frame_indices:
+                    pipeline.submit(frame_index)
+                pipeline.join()
 
     def _render_frames_parallel(
-        self, frame_indices: typing.Sequence[int] | None = None
+        self,
+        frame_indices: typing.Sequence[int] | None = None,
+        video_stream: VideoStream | None = None,
     ):
         """
         Package up state data and pass it to the rendering module.
 
         Falls back to serial rendering if parallel worker startup fails.
         """
-        render_config = {
+        render_config = self._make_render_config()
+        # Workers write the frames to disk; the stream reads each one back once
+        # all earlier frames are encoded.
+        on_frame_done = video_stream.add_frame if video_stream is not None else None
+        try:
+            # Call the pure rendering utility function
+            if self.render_server is not None:
+                self.render_server.render_frames(
+                    render_config,
+                    Progress,
+                    frame_indices=frame_indices,
+                    on_frame_done=on_frame_done,
+                )
+            else:
+                render_frames_parallel(
+                    render_config,
+                    Progress,
+                    frame_indices=frame_indices,
+                    on_frame_done=on_frame_done,
+                )
+        except Exception as e:
+            # Handle the serial fallback right here in the visualizer context!
+            print(
+                f"Parallel rendering failed ({e}). Falling back to serial rendering..."
+            )
+            self._render_frames_serial(
+                frame_indices=frame_indices, video_stream=video_stream
+            )
+
+    def _make_render_config(self) -> dict:
+        """
+        Collect the state the parallel render workers need.
+        """
+        return {
             "number_of_steps": self.number_of_steps,
             "parallel_render_workers": self.parallel_render_workers,
             "available_gpu_devices": getattr(self, "available_gpu_devices", 0),
+            "render_device": getattr(self, "parallel_render_device", "cuda"),
+            "state_dir": self.parallel_render_state_dir,
+            "worker_queue_depth": self.parallel_render_queue_depth,
+            "heartbeat_timeout": self.parallel_render_heartbeat_timeout,
+            "frame_timeout": self.parallel_render_frame_timeout,
             "worker_state": {
                 "particles": make_spawn_safe_render_items(self.particles),
                 "vector_field": (
@@ -281,30 +513,91 @@ class HeadlessVisualizer(BaseVisualizer):
                 "frame_folder": self.frame_folder,
                 "renderer_resolution": self.renderer_resolution,
                 "renderer_spp": self.renderer_spp,
+                "frustum_culling": self.frustum_culling,
+                "frustum_culling_margin": self.frustum_culling_margin,
             },
         }
-        try:
-            # Call the pure rendering utility function
-            render_frames_parallel(render_config, Progress, frame_indices=frame_indices)
-        except Exception as e:
-            # Handle the serial fallback right here in the visualizer context!
-            print(
-                f"Parallel rendering failed ({e}). Falling back to serial rendering..."
+
+    def _render_frames(
+        self,
+        frame_indices: typing.Sequence[int] | None = None,
+        video_stream: VideoStream | None = None,
+    ):
+        """
+        Render the selected frames serially or on parallel workers.
+        """
+        if self.parallel_render or self.render_server is not None:
+            self._render_frames_parallel(
+                frame_indices=frame_indices, video_stream=video_stream
+            )
+        else:
+            self._render_frames_serial(
+                frame_indices=frame_indices, video_stream=video_stream
             )
-            self._render_frames_serial(frame_indices=frame_indices)
 
     def _record_trajectory(self, frame_indices: typing.Sequence[int] | None = None):
         """
         Record the selected trajectory frames.
         """
-        if self.parallel_render:
-            self._render_frames_parallel(frame_indices=frame_indices)
-        else:
-            self._render_frames_serial(frame_indices=frame_indices)
+        if self.do_create_video and self.stream_video:
+            self._record_trajectory_streamed(frame_indices=frame_indices)
+            return
+
+        self._render_frames(frame_indices=frame_indices)
 
         if self.do_create_video:
             self._create_movie()
 
+    def _record_trajectory_streamed(
+        self, frame_indices: typing.Sequence[int] | None = None
+    ):
+        """
+        Record the selected frames while encoding them into the video.
+
+        Like a video created from the frame folder, the video also contains
+        the frames already on disk, which are read when it is their turn.
+        """
+        selected_frame_indices = (
+            list(range(self.number_of_steps))
+            if frame_indices is None
+            else list(frame_indices)
+        )
+        existing_frame_indices = {
+            int(match.group(1))
+            for path in self.frame_folder.glob("frame_*.png")
+            if (match := re.fullmatch(r"frame_(\d+)\.png", path.name))
+        } - set(selected_frame_indices)
+        video_frame_indices = sorted(
+            existing_frame_indices | set(selected_frame_indices)
+        )
+        if not video_frame_indices:
+            raise RuntimeError(
+                f"No frames to create a video from in {self.frame_folder}"
+            )
+
+        with self.video_manager.open_video_stream(
+            video_frame_indices,
+            video_name=self.video_title,
+            video_format=self.video_format,
+            frame_loader=self._read_frame,
+        ) as video_stream:
+            for frame_index in sorted(existing_frame_indices):
+                video_stream.add_frame(frame_index)
+            self._render_frames(
+                frame_indices=selected_frame_indices, video_stream=video_stream
+            )
+
+        if not self.keep_frames:
+            for frame_index in video_frame_indices:
+                (self.frame_folder / f"frame_{frame_index:0>6}.png").unlink(
+                    missing_ok=True
+                )
+            try:
+                self.frame_folder.rmdir()
+            except OSError:
+                # Directory not empty or cannot be removed; ignore
+                pass
+
     def create_video_from_frames(self):
         """
         Create a video from already-rendered frames.
@@ -347,3 +640,76 @@ class HeadlessVisualizer(BaseVisualizer):
             skip_existing_frames=skip_existing_frames,
         )
         self._record_trajectory(frame_indices=selected_frame_indices)
+
+    def render_visualization_from_queue(
+        self,
+        frame_indices: typing.Sequence[int] | None = None,
+        frame_range: tuple[int, int] | None = None,
+        batch_size: int = 16,
+        lease_timeout: float = 600.0,
+        poll_interval: float = 10.0,
+    ) -> bool:
+        """
+        Render frames claimed from a lease queue shared with other processes.
+
+        Any number of processes, e.g. jobs on different cluster nodes, can run
+        this on the same output folder. They claim batches of frames through
+        lease files in ``output_folder/.frame_queue``, take over batches of
+        processes that stopped renewing their lease, and wait for batches still
+        in progress elsewhere. The last process to finish creates the video.
+
+        Parameters
+        ----------
+        frame_indices : sequence of int, optional
+                Global frame indices to render. All processes must use the same
+                selection.
+        frame_range : tuple[int, int], optional
+                Contiguous half-open global frame range (start, stop).
+        batch_size : int, optional
+                Number of frames claimed at once.
+        lease_timeout : float, optional
+                Seconds without renewal after which a claimed batch is taken over
+                by another process.
+        poll_interval : float, optional
+                Seconds to wait before looking for expired leases when all
+                remaining batches are claimed by other processes.
+
+        Returns
+        -------
+        finalized : bool
+                True if this process completed the queue and created the video.
+        """
+        selected_frame_indices = self._resolve_frame_indices(
+            frame_indices=frame_indices,
+            frame_range=frame_range,
+        )
+        self.frame_folder.mkdir(parents=True, exist_ok=True)
+        frame_queue = FrameLeaseQueue(
+            self.output_folder / ".frame_queue",
+            selected_frame_indices,
+            batch_size=batch_size,
+            lease_timeout=lease_timeout,
+        )
+
+        while not frame_queue.all_done():
+            batch = frame_queue.claim()
+            if batch is None:
+                time.sleep(poll_interval)
+                continue
+            try:
+                # Frames are written atomically, so existing ones are complete.
+                self._render_frames(
+                    frame_indices=self._filter_existing_frame_indices(
+                        batch.frame_indices
+                    )
+                )
+            except BaseException:
+                frame_queue.release(batch)
+                raise
+            frame_queue.complete(batch)
+
+        if not frame_queue.claim_finalization():
+            return False
+        if self.do_create_video:
+            self._create_movie()
+        return True
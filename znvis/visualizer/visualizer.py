@@ -30,16 +30,19 @@ import threading
 import time
 import typing
 
+import numpy as np
 import open3d as o3d
 import open3d.visualization.gui as gui
+import open3d.visualization.rendering as rendering
 from rich.progress import Progress
 
 import znvis
 from znvis.cameras import KeyframeCamera
+from znvis.mesh.frame_store import CompactFrame, FrameStore
 from znvis.mesh_cache.mesh_cache_manager import MeshCacheManager
 from znvis.mesh_cache.mesh_frame_cache import MeshFrameCache
 from znvis.rendering import Mitsuba
-from znvis.visualizer.base_visualizer import BaseVisualizer
+from znvis.visualizer.base_visualizer import BaseVisualizer, build_mesh_entry
 
 
 class Visualizer(BaseVisualizer):
@@ -77,6 +80,11 @@ class Visualizer(BaseVisualizer):
         lazy_mesh_loading: bool = False,
         mesh_cache_max_gb: float | None = None,
         mesh_cache_future_fraction: float = 2 / 3,
+        mesh_build_workers: int = 1,
+        in_place_updates: bool = True,
+        video_decode_workers: int | None = None,
+        video_prefetch_frames: int = 16,
+        video_encode_segments: int = 1,
     ):
         """
         Constructor for the visualizer.
@@ -123,6 +131,26 @@ class Visualizer(BaseVisualizer):
                 Default: 2 / 3
                 Fraction of the rolling cache window to place in the current playback
                 direction. The rest is placed behind the current frame.
+        mesh_build_workers : int
+                Default: 1
+                Number of processes used to construct all meshes when they are
+                preloaded eagerly.
+        in_place_updates : bool
+                Default: True
+                Keep dynamic geometry registered in the window and only update
+                its vertex positions, normals and colours when the number of
+                vertices and triangles does not change between frames.
+        video_decode_workers : int | None
+                Default: None
+                Number of threads decoding frames for the video writer. If None,
+                the number of CPU cores, at most 8.
+        video_prefetch_frames : int
+                Default: 16
+                Maximum number of frames decoded ahead of the video writer.
+        video_encode_segments : int
+                Default: 1
+                Number of segments of a video created from frames that are
+                encoded in parallel processes and joined by ffmpeg.
 
         """
         # Call parent constructor
@@ -139,6 +167,10 @@ class Visualizer(BaseVisualizer):
             renderer_resolution=renderer_resolution,
             renderer_spp=renderer_spp,
             renderer=renderer,
+            mesh_build_workers=mesh_build_workers,
+            video_decode_workers=video_decode_workers,
+            video_prefetch_frames=video_prefetch_frames,
+            video_encode_segments=video_encode_segments,
         )
 
         # Visualizer-specific attributes
@@ -160,6 +192,8 @@ class Visualizer(BaseVisualizer):
             max(0.0, float(mesh_cache_future_fraction)),
         )
         self._trajectory_update_pending = False
+        self.in_place_updates = in_place_updates
+        self._geometry_topology = {}
 
         # Camera Handling
         if keyframe_camera is not None:
@@ -373,32 +407,14 @@ class Visualizer(BaseVisualizer):
 
         if self.vector_field is not None:
             for item in self.vector_field:
-                if item.static:
-                    mesh_dict[item.name] = {
-                        "mesh": self._get_mesh_for_item(item, 0),
-                        "bsdf": item.mesh.material.mitsuba_bsdf,
-                        "material": item.mesh.o3d_material,
-                    }
-                else:
-                    mesh_dict[item.name] = {
-                        "mesh": self._get_mesh_for_item(item, self.counter),
-                        "bsdf": item.mesh.material.mitsuba_bsdf,
-                        "material": item.mesh.o3d_material,
-                    }
+                mesh_dict[item.name] = build_mesh_entry(
+                    item, self._get_mesh_for_item(item, self.counter)
+                )
 
         for item in self.particles:
-            if item.static:
-                mesh_dict[item.name] = {
-                    "mesh": self._get_mesh_for_item(item, 0),
-                    "bsdf": item.mesh.material.mitsuba_bsdf,
-                    "material": item.mesh.o3d_material,
-                }
-            else:
-                mesh_dict[item.name] = {
-                    "mesh": self._get_mesh_for_item(item, self.counter),
-                    "bsdf": item.mesh.material.mitsuba_bsdf,
-                    "material": item.mesh.o3d_material,
-                }
+            mesh_dict[item.name] = build_mesh_entry(
+                item, self._get_mesh_for_item(item, self.counter)
+            )
 
         view_matrix = vis.scene.camera.get_view_matrix()
         # Create output folder
@@ -425,9 +441,27 @@ class Visualizer(BaseVisualizer):
         if self.lazy_mesh_loading:
             if self.mesh_cache_manager is None:
                 raise RuntimeError("Mesh cache is not initialized yet.")
-            return self.mesh_cache_manager.get(item, idx)
+            mesh = self.mesh_cache_manager.get(item, idx)
+        else:
+            mesh = item.mesh_list[idx]
+
+        if item.static and item.has_dynamic_colour:
+            mesh = item.paint_mesh(mesh, frame_index)
+
+        return mesh
+
+    def _get_stored_frame(self, item, frame_index) -> CompactFrame | None:
+        """
+        Return the compact buffers stored for an item at a given frame.
 
-        return item.mesh_list[idx]
+        Returns None if the frame has to be materialized as a mesh, i.e. when
+        meshes are loaded lazily or a static item is painted per frame.
+        """
+        if self.lazy_mesh_loading or not isinstance(item.mesh_list, FrameStore):
+            return None
+        if item.static and item.has_dynamic_colour:
+            return None
+        return item.mesh_list.frame(0 if item.static else frame_index)
 
     def _get_mesh_cache_max_bytes(self):
         if self.mesh_cache_max_gb is None:
@@ -466,7 +500,7 @@ class Visualizer(BaseVisualizer):
             self._initialize_mesh_cache()
         else:
             for item in self.particles:
-                item.construct_mesh_list()
+                item.construct_mesh_list(workers=self.mesh_build_workers)
 
         self._draw_particles(initial=True)
 
@@ -475,10 +509,75 @@ class Visualizer(BaseVisualizer):
             self._initialize_mesh_cache()
         else:
             for item in self.vector_field:
-                item.construct_mesh_list()
+                item.construct_mesh_list(workers=self.mesh_build_workers)
 
         self._draw_vector_field(initial=True)
 
+    def _add_item_geometry(self, visualizer, item, mesh):
+        """
+        Register the mesh of an item in the visualizer window.
+
+        With in-place updates the mesh is added as tensor geometry, as only
+        tensor geometry buffers can be updated by the renderer.
+        """
+        if self.in_place_updates:
+            visualizer.add_geometry(
+                item.name,
+                o3d.t.geometry.TriangleMesh.from_legacy(mesh),
+                item.mesh.o3d_material,
+            )
+            self._geometry_topology[item.name] = (
+                len(mesh.vertices),
+                len(mesh.triangles),
+            )
+        else:
+            visualizer.add_geometry(item.name, mesh, item.mesh.o3d_material)
+
+    def _redraw_item_geometry(self, visualizer, item):
+        """
+        Show the mesh of the current frame for an already registered item.
+
+        If the topology is unchanged, only the vertex buffers of the registered
+        geometry are updated. Otherwise, the geometry is registered again.
+        Stored frames are updated from their compact buffers without
+        materializing a mesh.
+        """
+        mesh = None
+        frame = self._get_stored_frame(item, self.counter)
+        if frame is not None:
+            vertices, normals, colours = frame.vertices, frame.normals, frame.colours
+            n_triangles = len(frame.triangles)
+        else:
+            mesh = self._get_mesh_for_item(item, self.counter)
+            vertices, normals = mesh.vertices, mesh.vertex_normals
+            colours = mesh.vertex_colors if mesh.has_vertex_colors() else None
+            n_triangles = len(mesh.triangles)
+        topology = (len(vertices), n_triangles)
+
+        if self.in_place_updates and self._geometry_topology.get(item.name) == topology:
+            points = o3d.t.geometry.PointCloud(
+                o3d.core.Tensor(np.asarray(vertices, dtype=np.float32))
+            )
+            points.point.normals = o3d.core.Tensor(
+                np.asarray(normals, dtype=np.float32)
+            )
+            update_flags = (
+                rendering.Scene.UPDATE_POINTS_FLAG | rendering.Scene.UPDATE_NORMALS_FLAG
+            )
+            if colours is not None:
+                points.point.colors = o3d.core.Tensor(
+                    np.asarray(colours, dtype=np.float32)
+                )
+                update_flags |= rendering.Scene.UPDATE_COLORS_FLAG
+
+            visualizer.update_geometry(item.name, points, update_flags)
+            return
+
+        if mesh is None:
+            mesh = self._get_mesh_for_item(item, self.counter)
+        visualizer.remove_geometry(item.name)
+        self._add_item_geometry(visualizer, item, mesh)
+
     def _draw_particles(self, visualizer=None, initial: bool = False):
         """
         Draw the particles on the visualizer.
@@ -491,11 +590,6 @@ class Visualizer(BaseVisualizer):
         Returns
         -------
         updates the information in the visualizer.
-
-        Notes
-        -----
-        TODO: Use of initial is a dirty fix. It can be removed when support for
-              transforming multiple geometry objects is added to open3d.
         """
         # Check if a visualizer was passed.
         if visualizer is None:
@@ -505,14 +599,12 @@ class Visualizer(BaseVisualizer):
             visualizer.add_geometry("Box", self.bounding_box)
 
         for item in self.particles:
-            if not initial:
-                if not item.static:
-                    visualizer.remove_geometry(item.name)
-                else:
-                    continue
-
-            mesh = self._get_mesh_for_item(item, self.counter)
-            visualizer.add_geometry(item.name, mesh, item.mesh.o3d_material)
+            if initial:
+                self._add_item_geometry(
+                    visualizer, item, self._get_mesh_for_item(item, self.counter)
+                )
+            elif not item.static or item.has_dynamic_colour:
+                self._redraw_item_geometry(visualizer, item)
 
     def _draw_vector_field(self, visualizer=None, initial: bool = False):
         """
@@ -531,22 +623,13 @@ class Visualizer(BaseVisualizer):
         if visualizer is None:
             visualizer = self.vis
 
-        if initial:
-            for i, item in enumerate(self.vector_field):
-                visualizer.add_geometry(
-                    item.name,
-                    self._get_mesh_for_item(item, self.counter),
-                    item.mesh.o3d_material,
+        for item in self.vector_field:
+            if initial:
+                self._add_item_geometry(
+                    visualizer, item, self._get_mesh_for_item(item, self.counter)
                 )
-        else:
-            for i, item in enumerate(self.vector_field):
-                if not item.static:
-                    visualizer.remove_geometry(item.name)
-                    visualizer.add_geometry(
-                        item.name,
-                        self._get_mesh_for_item(item, self.counter),
-                        item.mesh.o3d_material,
-                    )
+            elif not item.static or item.has_dynamic_colour:
+                self._redraw_item_geometry(visualizer, item)
 
     def _continuous_trajectory(self, vis):
         """
@@ -579,11 +662,9 @@ class Visualizer(BaseVisualizer):
         items = (self.vector_field or []) + self.particles
 
         for item in items:
-            mesh_dict[item.name] = {
-                "mesh": self._get_mesh_for_item(item, counter),
-                "bsdf": item.mesh.material.mitsuba_bsdf,
-                "material": item.mesh.o3d_material,
-            }
+            mesh_dict[item.name] = build_mesh_entry(
+                item, self._get_mesh_for_item(item, counter)
+            )
         return mesh_dict
 
     def _record_trajectory(self):